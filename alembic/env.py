@@ -6,8 +6,11 @@ from sqlalchemy.ext.asyncio import create_async_engine
 from alembic import context
 
 from app.models import Base
+from app.config.settings import settings
 
 config = context.config
+# The URL comes from the application settings, not from alembic.ini
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
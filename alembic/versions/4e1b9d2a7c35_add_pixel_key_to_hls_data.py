@@ -0,0 +1,49 @@
+"""Add pixel_key to harmonized_landsat_sentinel_data
+
+Revision ID: 4e1b9d2a7c35
+Revises: 827b3c622956
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4e1b9d2a7c35'
+down_revision: Union[str, None] = '827b3c622956'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('harmonized_landsat_sentinel_data', sa.Column('pixel_key', sa.BigInteger(), nullable=True))
+
+    # Same quantization as app.external_apis.appears.hls_scenes.pixel_keys (1e-5 degrees)
+    op.execute("""
+        UPDATE harmonized_landsat_sentinel_data
+        SET pixel_key = round((ST_Y(location::geometry) + 90.0) / 1e-5)::bigint * 36000001
+                      + round((ST_X(location::geometry) + 180.0) / 1e-5)::bigint
+    """)
+
+    # Rows written per band before the upsert existed may share a pixel, keep the newest one
+    op.execute("""
+        DELETE FROM harmonized_landsat_sentinel_data AS h
+        USING harmonized_landsat_sentinel_data AS newer
+        WHERE h.place_id IS NOT DISTINCT FROM newer.place_id
+          AND h.capture_date = newer.capture_date
+          AND h.pixel_key = newer.pixel_key
+          AND h.id < newer.id
+    """)
+    op.execute("DELETE FROM harmonized_landsat_sentinel_data WHERE pixel_key IS NULL")
+
+    op.alter_column('harmonized_landsat_sentinel_data', 'pixel_key', existing_type=sa.BigInteger(), nullable=False)
+    op.create_index('uq_hls_place_date_pixel', 'harmonized_landsat_sentinel_data',
+                    ['place_id', 'capture_date', 'pixel_key'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_hls_place_date_pixel', table_name='harmonized_landsat_sentinel_data')
+    op.drop_column('harmonized_landsat_sentinel_data', 'pixel_key')
@@ -0,0 +1,44 @@
+"""Add hls_scenes table for scenes stored as COGs
+
+Revision ID: 5f8c2e91a7d3
+Revises: d42a7f6c19e8
+Create Date: 2026-10-18 17:21:43.918260
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5f8c2e91a7d3'
+down_revision: Union[str, None] = 'd42a7f6c19e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('hls_scenes',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('capture_date', sa.DateTime(), nullable=False),
+        sa.Column('storage_key', sa.String(), nullable=False),
+        sa.Column('footprint', geoalchemy2.types.Geography(geometry_type='POLYGON', srid=4326), nullable=True),
+        sa.Column('bands', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('valid_pixels', sa.Integer(), nullable=False),
+        sa.Column('size_bytes', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_hls_scenes_place_date', 'hls_scenes', ['place_id', 'capture_date'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_hls_scenes_place_date', table_name='hls_scenes')
+    op.drop_table('hls_scenes')
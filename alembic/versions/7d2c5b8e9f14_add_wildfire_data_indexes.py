@@ -0,0 +1,31 @@
+"""Add acq_date and GIST location indexes to wildfire_data
+
+Revision ID: 7d2c5b8e9f14
+Revises: e3a94c1f7b20
+Create Date: 2026-10-18 13:22:48.561072
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d2c5b8e9f14'
+down_revision: Union[str, None] = 'e3a94c1f7b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Left commented out in 5cecaf787c43; databases built with create_tables.py already have them
+    op.create_index(op.f('ix_wildfire_data_acq_date'), 'wildfire_data', ['acq_date'], unique=False,
+                    if_not_exists=True)
+    op.create_index('idx_wildfire_data_location', 'wildfire_data', ['location'], unique=False,
+                    postgresql_using='gist', if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_wildfire_data_location', table_name='wildfire_data', postgresql_using='gist')
+    op.drop_index(op.f('ix_wildfire_data_acq_date'), table_name='wildfire_data')
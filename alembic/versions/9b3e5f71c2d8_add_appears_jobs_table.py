@@ -0,0 +1,47 @@
+"""Add appears_jobs table
+
+Revision ID: 9b3e5f71c2d8
+Revises: 4e1b9d2a7c35
+Create Date: 2026-10-18 10:03:55.427613
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b3e5f71c2d8'
+down_revision: Union[str, None] = '4e1b9d2a7c35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('appears_jobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('start_date', sa.Date(), nullable=False),
+        sa.Column('end_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('task_id', sa.String(), nullable=True),
+        sa.Column('error', sa.String(), nullable=True),
+        sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_appears_jobs_place_id'), 'appears_jobs', ['place_id'], unique=False)
+    op.create_index(op.f('ix_appears_jobs_status'), 'appears_jobs', ['status'], unique=False)
+    op.create_index('uq_appears_jobs_active_window', 'appears_jobs', ['place_id', 'start_date', 'end_date'],
+                    unique=True, postgresql_where=sa.text("status IN ('queued', 'submitted', 'ingesting')"))
+
+
+def downgrade() -> None:
+    op.drop_index('uq_appears_jobs_active_window', table_name='appears_jobs')
+    op.drop_index(op.f('ix_appears_jobs_status'), table_name='appears_jobs')
+    op.drop_index(op.f('ix_appears_jobs_place_id'), table_name='appears_jobs')
+    op.drop_table('appears_jobs')
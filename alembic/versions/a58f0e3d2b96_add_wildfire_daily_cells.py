@@ -0,0 +1,58 @@
+"""Add wildfire_daily_cells rollup table
+
+Revision ID: a58f0e3d2b96
+Revises: 7d2c5b8e9f14
+Create Date: 2026-10-18 14:05:31.840127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a58f0e3d2b96'
+down_revision: Union[str, None] = '7d2c5b8e9f14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('wildfire_daily_cells',
+        sa.Column('grid_level', sa.SmallInteger(), nullable=False),
+        sa.Column('acq_date', sa.Date(), nullable=False),
+        sa.Column('satellite', sa.String(), nullable=False),
+        sa.Column('cell_x', sa.Integer(), nullable=False),
+        sa.Column('cell_y', sa.Integer(), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.Column('max_frp', sa.Float(), nullable=True),
+        sa.Column('max_confidence', sa.SmallInteger(), nullable=True),
+        sa.Column('sum_latitude', sa.Float(), nullable=False),
+        sa.Column('sum_longitude', sa.Float(), nullable=False),
+        sa.PrimaryKeyConstraint('grid_level', 'acq_date', 'satellite', 'cell_x', 'cell_y')
+    )
+
+    # Same grid levels and confidence mapping as app.external_apis.firms.rollups
+    for level, size in enumerate([2.0, 0.5, 0.125, 0.03125]):
+        op.execute(f"""
+            INSERT INTO wildfire_daily_cells
+            SELECT {level}, acq_date::date, satellite,
+                   floor(longitude / {size})::integer, floor(latitude / {size})::integer,
+                   count(*), max(frp),
+                   max(CASE WHEN confidence IN ('h', 'high') THEN 3
+                            WHEN confidence IN ('n', 'nominal') THEN 2
+                            WHEN confidence IN ('l', 'low') THEN 1
+                            WHEN confidence ~ '^[0-9]+$' THEN
+                                CASE WHEN confidence::integer >= 80 THEN 3
+                                     WHEN confidence::integer >= 30 THEN 2 ELSE 1 END
+                            ELSE 0 END),
+                   sum(latitude), sum(longitude)
+            FROM wildfire_data
+            WHERE acq_date IS NOT NULL AND satellite IS NOT NULL
+            GROUP BY 1, 2, 3, 4, 5
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table('wildfire_daily_cells')
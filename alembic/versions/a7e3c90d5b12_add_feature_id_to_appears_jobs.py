@@ -0,0 +1,29 @@
+"""Add feature_id to appears_jobs for tasks covering several places
+
+Revision ID: a7e3c90d5b12
+Revises: 5f8c2e91a7d3
+Create Date: 2026-10-18 18:12:36.540781
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7e3c90d5b12'
+down_revision: Union[str, None] = '5f8c2e91a7d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Jobs submitted so far had their place as the only feature of the task
+    op.add_column('appears_jobs', sa.Column('feature_id', sa.Integer(), server_default=sa.text('1'), nullable=False))
+    op.create_index(op.f('ix_appears_jobs_task_id'), 'appears_jobs', ['task_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_appears_jobs_task_id'), table_name='appears_jobs')
+    op.drop_column('appears_jobs', 'feature_id')
@@ -0,0 +1,33 @@
+"""Count submitting appears_jobs as active
+
+Revision ID: b2d81f4a6c93
+Revises: a7e3c90d5b12
+Create Date: 2026-10-18 21:05:12.318407
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d81f4a6c93'
+down_revision: Union[str, None] = 'a7e3c90d5b12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Jobs claimed by a worker keep their window, a duplicate request joins them
+    op.drop_index('uq_appears_jobs_active_window', table_name='appears_jobs')
+    op.create_index('uq_appears_jobs_active_window', 'appears_jobs', ['place_id', 'start_date', 'end_date'],
+                    unique=True,
+                    postgresql_where=sa.text("status IN ('queued', 'submitting', 'submitted', 'ingesting')"))
+
+
+def downgrade() -> None:
+    op.execute("UPDATE appears_jobs SET status = 'queued' WHERE status = 'submitting'")
+    op.drop_index('uq_appears_jobs_active_window', table_name='appears_jobs')
+    op.create_index('uq_appears_jobs_active_window', 'appears_jobs', ['place_id', 'start_date', 'end_date'],
+                    unique=True, postgresql_where=sa.text("status IN ('queued', 'submitted', 'ingesting')"))
@@ -0,0 +1,55 @@
+"""Add place_index_stats rollup table
+
+Revision ID: b6d1e8a0f3c5
+Revises: f19b6a4c83e7
+Create Date: 2026-10-18 15:32:04.671983
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1e8a0f3c5'
+down_revision: Union[str, None] = 'f19b6a4c83e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('place_index_stats',
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('capture_date', sa.DateTime(), nullable=False),
+        sa.Column('index_name', sa.String(), nullable=False),
+        sa.Column('mean', sa.Float(), nullable=True),
+        sa.Column('median', sa.Float(), nullable=True),
+        sa.Column('p10', sa.Float(), nullable=True),
+        sa.Column('p90', sa.Float(), nullable=True),
+        sa.Column('valid_pixels', sa.Integer(), nullable=False),
+        sa.Column('cloud_fraction', sa.Float(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('place_id', 'capture_date', 'index_name')
+    )
+
+    # Stats of the pixels already stored; their cloud cover was not recorded
+    op.execute("""
+        INSERT INTO place_index_stats (place_id, capture_date, index_name, mean, median, p10, p90, valid_pixels)
+        SELECT h.place_id, h.capture_date, v.index_name,
+               avg(v.value),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.1) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY v.value),
+               count(v.value)
+        FROM harmonized_landsat_sentinel_data AS h
+        CROSS JOIN LATERAL (VALUES ('ndvi', h.ndvi), ('evi', h.evi), ('ndwi', h.ndwi), ('nbr', h.nbr),
+                                   ('savi', h.savi)) AS v(index_name, value)
+        WHERE h.place_id IS NOT NULL AND h.capture_date IS NOT NULL
+        GROUP BY h.place_id, h.capture_date, v.index_name
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('place_index_stats')
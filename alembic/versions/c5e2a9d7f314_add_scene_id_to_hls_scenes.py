@@ -0,0 +1,39 @@
+"""Add scene_id to hls_scenes so a date can hold several scenes
+
+Revision ID: c5e2a9d7f314
+Revises: b2d81f4a6c93
+Create Date: 2026-10-18 21:32:08.604115
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e2a9d7f314'
+down_revision: Union[str, None] = 'b2d81f4a6c93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Scenes stored so far were the only one of their date; their COGs keep the
+    # <place_id>/<date>.tif key recorded in storage_key
+    op.add_column('hls_scenes', sa.Column('scene_id', sa.String(), server_default='mosaic', nullable=False))
+    op.alter_column('hls_scenes', 'scene_id', server_default=None)
+    op.drop_index('uq_hls_scenes_place_date', table_name='hls_scenes')
+    op.create_index('uq_hls_scenes_place_date_scene', 'hls_scenes', ['place_id', 'capture_date', 'scene_id'],
+                    unique=True)
+
+
+def downgrade() -> None:
+    # Only the latest scene of each date is kept
+    op.execute("""
+        DELETE FROM hls_scenes AS s USING hls_scenes AS newer
+        WHERE newer.place_id = s.place_id AND newer.capture_date = s.capture_date AND newer.id > s.id
+    """)
+    op.drop_index('uq_hls_scenes_place_date_scene', table_name='hls_scenes')
+    op.create_index('uq_hls_scenes_place_date', 'hls_scenes', ['place_id', 'capture_date'], unique=True)
+    op.drop_column('hls_scenes', 'scene_id')
@@ -0,0 +1,44 @@
+"""Add EVI, NDWI, NBR and SAVI columns and backfill spectral indices
+
+Revision ID: c71a08d4e6f2
+Revises: 9b3e5f71c2d8
+Create Date: 2026-10-18 10:41:12.902331
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c71a08d4e6f2'
+down_revision: Union[str, None] = '9b3e5f71c2d8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('harmonized_landsat_sentinel_data', sa.Column('evi', sa.Float(), nullable=True))
+    op.add_column('harmonized_landsat_sentinel_data', sa.Column('ndwi', sa.Float(), nullable=True))
+    op.add_column('harmonized_landsat_sentinel_data', sa.Column('nbr', sa.Float(), nullable=True))
+    op.add_column('harmonized_landsat_sentinel_data', sa.Column('savi', sa.Float(), nullable=True))
+
+    # Rows stored so far never had their NDVI computed. Same formulas as
+    # app.external_apis.appears.indices, over reflectances scaled by 0.0001.
+    op.execute("""
+        UPDATE harmonized_landsat_sentinel_data
+        SET ndvi = (b05_nir - b04_red) / NULLIF(b05_nir + b04_red, 0),
+            evi = 2.5 * (b05_nir - b04_red) * 0.0001
+                  / NULLIF((b05_nir + 6 * b04_red - 7.5 * b02_blue) * 0.0001 + 1, 0),
+            ndwi = (b03_green - b05_nir) / NULLIF(b03_green + b05_nir, 0),
+            nbr = (b05_nir - b12_swir2) / NULLIF(b05_nir + b12_swir2, 0),
+            savi = 1.5 * (b05_nir - b04_red) * 0.0001 / NULLIF((b05_nir + b04_red) * 0.0001 + 0.5, 0)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('harmonized_landsat_sentinel_data', 'savi')
+    op.drop_column('harmonized_landsat_sentinel_data', 'nbr')
+    op.drop_column('harmonized_landsat_sentinel_data', 'ndwi')
+    op.drop_column('harmonized_landsat_sentinel_data', 'evi')
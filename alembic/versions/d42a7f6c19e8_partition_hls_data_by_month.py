@@ -0,0 +1,113 @@
+"""Partition harmonized_landsat_sentinel_data by month of capture_date
+
+Revision ID: d42a7f6c19e8
+Revises: b6d1e8a0f3c5
+Create Date: 2026-10-18 16:48:27.305114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import geoalchemy2
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd42a7f6c19e8'
+down_revision: Union[str, None] = 'b6d1e8a0f3c5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLE = 'harmonized_landsat_sentinel_data'
+OLD_TABLE = 'harmonized_landsat_sentinel_data_unpartitioned'
+SEQUENCE = 'harmonized_landsat_sentinel_data_id_seq'
+COLUMNS = (
+    "id, place_id, capture_date, location, pixel_key, b01_coastal_aerosol, b02_blue, b03_green, b04_red, "
+    "b05_nir, b06_swir1, b07_swir2, b08_nir_broad, b8a_nir_narrow, b09_water_vapor, b10_cirrus, b11_swir1, "
+    "b12_swir2, ndvi, evi, ndwi, nbr, savi, additional_data"
+)
+
+
+def hls_columns(id_column: sa.Column) -> list:
+    return [
+        id_column,
+        sa.Column('place_id', sa.Integer(), nullable=True),
+        sa.Column('capture_date', sa.DateTime(), nullable=False),
+        sa.Column('location', geoalchemy2.types.Geography(geometry_type='POINT', srid=4326,
+                                                          spatial_index=False), nullable=True),
+        sa.Column('pixel_key', sa.BigInteger(), nullable=False),
+        *[sa.Column(band, sa.Float(), nullable=True) for band in (
+            'b01_coastal_aerosol', 'b02_blue', 'b03_green', 'b04_red', 'b05_nir', 'b06_swir1', 'b07_swir2',
+            'b08_nir_broad', 'b8a_nir_narrow', 'b09_water_vapor', 'b10_cirrus', 'b11_swir1', 'b12_swir2',
+            'ndvi', 'evi', 'ndwi', 'nbr', 'savi')],
+        sa.Column('additional_data', postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+    ]
+
+
+def create_hls_indexes() -> None:
+    op.create_index('uq_hls_place_date_pixel', TABLE, ['place_id', 'capture_date', 'pixel_key'], unique=True)
+    op.create_index('idx_harmonized_landsat_sentinel_data_location', TABLE, ['location'],
+                    postgresql_using='gist')
+
+
+def upgrade() -> None:
+    # Set the old heap aside; its indexes are dropped so the names can be reused
+    op.rename_table(TABLE, OLD_TABLE)
+    op.execute(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {OLD_TABLE}_pkey")
+    op.execute("DROP INDEX IF EXISTS uq_hls_place_date_pixel")
+    op.execute(f"DROP INDEX IF EXISTS ix_{TABLE}_capture_date")
+    op.execute(f"DROP INDEX IF EXISTS idx_{TABLE}_location")
+
+    # The partition key has to be part of the primary key; id keeps its sequence
+    op.create_table(TABLE,
+        *hls_columns(sa.Column('id', sa.Integer(), nullable=False,
+                               server_default=sa.text(f"nextval('{SEQUENCE}'::regclass)"))),
+        sa.PrimaryKeyConstraint('id', 'capture_date'),
+        postgresql_partition_by='RANGE (capture_date)'
+    )
+    # Indexes of a partitioned table are created on every partition, current and future
+    create_hls_indexes()
+
+    # One partition per month with stored pixels; ingest creates the following ones
+    op.execute(f"""
+        DO $$
+        DECLARE month timestamp;
+        BEGIN
+            FOR month IN
+                SELECT generate_series((SELECT date_trunc('month', min(capture_date)) FROM {OLD_TABLE}),
+                                       (SELECT date_trunc('month', max(capture_date)) FROM {OLD_TABLE}),
+                                       interval '1 month')
+            LOOP
+                EXECUTE format('CREATE TABLE %I PARTITION OF {TABLE} FOR VALUES FROM (%L) TO (%L)',
+                               '{TABLE}_p' || to_char(month, 'YYYYMM'), month, month + interval '1 month');
+            END LOOP;
+        END $$;
+    """)
+
+    # Pixels without a capture date cannot be placed in a partition and were never read
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE} WHERE capture_date IS NOT NULL")
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    op.drop_table(OLD_TABLE)
+
+
+def downgrade() -> None:
+    op.rename_table(TABLE, OLD_TABLE)
+    op.execute(f"ALTER TABLE {OLD_TABLE} RENAME CONSTRAINT {TABLE}_pkey TO {OLD_TABLE}_pkey")
+    op.drop_index('uq_hls_place_date_pixel', table_name=OLD_TABLE)
+    op.drop_index('idx_harmonized_landsat_sentinel_data_location', table_name=OLD_TABLE)
+
+    op.create_table(TABLE,
+        *hls_columns(sa.Column('id', sa.Integer(), nullable=False,
+                               server_default=sa.text(f"nextval('{SEQUENCE}'::regclass)"))),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.alter_column(TABLE, 'capture_date', existing_type=sa.DateTime(), nullable=True)
+    create_hls_indexes()
+    op.create_index(op.f('ix_harmonized_landsat_sentinel_data_capture_date'), TABLE, ['capture_date'])
+
+    op.execute(f"INSERT INTO {TABLE} ({COLUMNS}) SELECT {COLUMNS} FROM {OLD_TABLE}")
+    op.execute(f"ALTER SEQUENCE {SEQUENCE} OWNED BY {TABLE}.id")
+    # Drops the partitions with it
+    op.drop_table(OLD_TABLE)
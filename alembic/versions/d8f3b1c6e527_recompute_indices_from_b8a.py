@@ -0,0 +1,73 @@
+"""Recompute spectral indices from b8a_nir_narrow and rebuild their stats
+
+Revision ID: d8f3b1c6e527
+Revises: c5e2a9d7f314
+Create Date: 2026-10-18 21:48:51.207364
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8f3b1c6e527'
+down_revision: Union[str, None] = 'c5e2a9d7f314'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDICES = ('ndvi', 'evi', 'ndwi', 'nbr', 'savi')
+
+
+def recompute_indices(nir: str) -> None:
+    """Recomputes every stored index with `nir` as the NIR column, then the place_index_stats of those dates.
+
+    Same formulas as app.external_apis.appears.indices, over reflectances scaled by
+    0.0001; an index is NULL where one of its bands is. Rows that had an index or
+    have the NIR band are touched, and the stats are rebuilt for their places and
+    dates, keeping the stored cloud fractions.
+    """
+
+    computed = " OR ".join(f"{name} IS NOT NULL" for name in (*INDICES, nir))
+    op.execute(f"""
+        CREATE TEMP TABLE recomputed_dates AS
+        SELECT DISTINCT place_id, capture_date FROM harmonized_landsat_sentinel_data WHERE {computed}
+    """)
+    op.execute(f"""
+        UPDATE harmonized_landsat_sentinel_data
+        SET ndvi = ({nir} - b04_red) / NULLIF({nir} + b04_red, 0),
+            evi = 2.5 * ({nir} - b04_red) * 0.0001
+                  / NULLIF(({nir} + 6 * b04_red - 7.5 * b02_blue) * 0.0001 + 1, 0),
+            ndwi = (b03_green - {nir}) / NULLIF(b03_green + {nir}, 0),
+            nbr = ({nir} - b12_swir2) / NULLIF({nir} + b12_swir2, 0),
+            savi = 1.5 * ({nir} - b04_red) * 0.0001 / NULLIF(({nir} + b04_red) * 0.0001 + 0.5, 0)
+        WHERE {computed}
+    """)
+    index_values = ", ".join(f"('{name}', h.{name})" for name in INDICES)
+    op.execute(f"""
+        INSERT INTO place_index_stats (place_id, capture_date, index_name, mean, median, p10, p90, valid_pixels)
+        SELECT d.place_id, d.capture_date, v.index_name,
+               avg(v.value),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.1) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY v.value),
+               count(v.value)
+        FROM recomputed_dates AS d
+        JOIN harmonized_landsat_sentinel_data AS h ON h.place_id = d.place_id AND h.capture_date = d.capture_date
+        CROSS JOIN LATERAL (VALUES {index_values}) AS v(index_name, value)
+        GROUP BY d.place_id, d.capture_date, v.index_name
+        ON CONFLICT (place_id, capture_date, index_name) DO UPDATE
+        SET mean = EXCLUDED.mean, median = EXCLUDED.median, p10 = EXCLUDED.p10, p90 = EXCLUDED.p90,
+            valid_pixels = EXCLUDED.valid_pixels, updated_at = now()
+    """)
+    op.execute("DROP TABLE recomputed_dates")
+
+
+def upgrade() -> None:
+    # Indices stored so far read NIR from b05_nir, a red edge band in HLSS30
+    recompute_indices('b8a_nir_narrow')
+
+
+def downgrade() -> None:
+    recompute_indices('b05_nir')
@@ -0,0 +1,47 @@
+"""Add wildfire detection unique key and firms_sync_state table
+
+Revision ID: e3a94c1f7b20
+Revises: c71a08d4e6f2
+Create Date: 2026-10-18 12:41:07.302915
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a94c1f7b20'
+down_revision: Union[str, None] = 'c71a08d4e6f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Every refresh appended the whole window again, keep the first copy of each detection
+    op.execute("""
+        DELETE FROM wildfire_data AS w
+        USING wildfire_data AS older
+        WHERE w.satellite = older.satellite
+          AND w.acq_date = older.acq_date
+          AND w.acq_time = older.acq_time
+          AND w.latitude = older.latitude
+          AND w.longitude = older.longitude
+          AND w.id > older.id
+    """)
+    op.create_index('uq_wildfire_detection', 'wildfire_data',
+                    ['satellite', 'acq_date', 'acq_time', 'latitude', 'longitude'], unique=True)
+
+    op.create_table('firms_sync_state',
+        sa.Column('source', sa.String(), nullable=False),
+        sa.Column('country', sa.String(), nullable=False),
+        sa.Column('last_acq_date', sa.Date(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('source', 'country')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('firms_sync_state')
+    op.drop_index('uq_wildfire_detection', table_name='wildfire_data')
@@ -0,0 +1,40 @@
+"""Add product to hls_scenes so same-day HLSS30 and HLSL30 scenes are kept apart
+
+Revision ID: e4a7c2f9b806
+Revises: d8f3b1c6e527
+Create Date: 2026-10-18 22:03:17.845290
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e4a7c2f9b806'
+down_revision: Union[str, None] = 'd8f3b1c6e527'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only HLSS30 was ingested before; the COGs keep the key recorded in storage_key
+    op.add_column('hls_scenes', sa.Column('product', sa.String(), server_default='HLSS30', nullable=False))
+    op.alter_column('hls_scenes', 'product', server_default=None)
+    op.drop_index('uq_hls_scenes_place_date_scene', table_name='hls_scenes')
+    op.create_index('uq_hls_scenes_place_date_scene', 'hls_scenes',
+                    ['place_id', 'capture_date', 'product', 'scene_id'], unique=True)
+
+
+def downgrade() -> None:
+    # Only the latest product of each scene is kept
+    op.execute("""
+        DELETE FROM hls_scenes AS s USING hls_scenes AS newer
+        WHERE newer.place_id = s.place_id AND newer.capture_date = s.capture_date
+          AND newer.scene_id = s.scene_id AND newer.id > s.id
+    """)
+    op.drop_index('uq_hls_scenes_place_date_scene', table_name='hls_scenes')
+    op.create_index('uq_hls_scenes_place_date_scene', 'hls_scenes', ['place_id', 'capture_date', 'scene_id'],
+                    unique=True)
+    op.drop_column('hls_scenes', 'product')
@@ -0,0 +1,46 @@
+"""Add place_fire_events table
+
+Revision ID: f19b6a4c83e7
+Revises: a58f0e3d2b96
+Create Date: 2026-10-18 14:47:19.226508
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f19b6a4c83e7'
+down_revision: Union[str, None] = 'a58f0e3d2b96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('place_fire_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('place_id', sa.Integer(), nullable=False),
+        sa.Column('wildfire_id', sa.Integer(), nullable=False),
+        sa.Column('acq_date', sa.DateTime(), nullable=False),
+        sa.Column('distance_m', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['place_id'], ['places.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['wildfire_id'], ['wildfire_data.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('uq_place_fire_events_place_wildfire', 'place_fire_events', ['place_id', 'wildfire_id'],
+                    unique=True)
+    op.create_index('ix_place_fire_events_place_acq_date', 'place_fire_events', ['place_id', 'acq_date'],
+                    unique=False)
+    # The spatial join probes places by location
+    op.create_index('idx_places_location', 'places', ['location'], unique=False, postgresql_using='gist',
+                    if_not_exists=True)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_places_location', table_name='places', if_exists=True)
+    op.drop_index('ix_place_fire_events_place_acq_date', table_name='place_fire_events')
+    op.drop_index('uq_place_fire_events_place_wildfire', table_name='place_fire_events')
+    op.drop_table('place_fire_events')
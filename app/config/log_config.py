@@ -1,4 +1,5 @@
 import logging
+from app.config.settings import settings
 # Configura logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(level=settings.log_level.upper(), format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)  # Crea una instancia de logger para usar en todo el módulo
\ No newline at end of file
@@ -0,0 +1,30 @@
+# app/config/settings.py
+from pydantic import BaseSettings
+
+class Settings(BaseSettings):
+    """Application settings, read from the environment or the .env file (names are case insensitive)."""
+
+    log_level: str = "INFO"  # DEBUG also logs per file and per tile details
+
+    database_url: str = "postgresql+asyncpg://franciscofurey@localhost/climatech"
+    db_echo: bool = False  # Logs every SQL statement, only for debugging
+
+    # Pool of the request engine
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 10  # seconds waiting for a free connection before failing
+    db_pool_recycle: int = 1800  # seconds before a connection is replaced
+    db_statement_timeout_ms: int = 15000
+    db_prepared_statement_cache_size: int = 500
+    db_slow_query_ms: int = 1000  # queries slower than this are logged as warnings
+
+    # Separate engine for ingest jobs, so bulk writes never take request connections
+    ingest_pool_size: int = 4
+    ingest_max_overflow: int = 0
+    ingest_statement_timeout_ms: int = 0  # no limit
+
+    class Config:
+        env_file = ".env"
+        env_file_encoding = "utf-8"
+
+settings = Settings()
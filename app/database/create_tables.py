@@ -2,12 +2,16 @@
 import asyncio
 import psycopg2
 import psycopg2.errors
-from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from app.models import HarmonizedLandsatSentinelData, Place, Base
+from app.config.settings import settings
+from app.database.database import build_engine
 
-DATABASE_SERVER_URL = "postgresql://franciscofurey@localhost/"
-DATABASE_NAME = "climatech"
+# Same database as the application, through psycopg2 for the server level commands
+DATABASE_URL = make_url(settings.database_url)
+DATABASE_SERVER_URL = DATABASE_URL.set(drivername="postgresql", database="").render_as_string(hide_password=False)
+DATABASE_NAME = DATABASE_URL.database
 
 def create_database():
     # Conexión directa al servidor PostgreSQL sin especificar base de datos
@@ -41,7 +45,8 @@ def create_database():
 
 async def create_tables():
     # Conexión a la base de datos específica utilizando async SQLAlchemy
-    engine = create_async_engine(f"postgresql+asyncpg://franciscofurey@localhost/{DATABASE_NAME}", echo=True)
+    engine = build_engine(pool_size=1, max_overflow=0, statement_timeout_ms=settings.ingest_statement_timeout_ms,
+                          application_name="climatech-create-tables")
     async with engine.begin() as conn:
         # Crea todas las tablas definidas en Base
         await conn.run_sync(Base.metadata.create_all)
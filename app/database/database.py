@@ -1,10 +1,43 @@
 # app/database.py
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncEngine, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-DATABASE_URL = "postgresql+asyncpg://franciscofurey@localhost/climatech"
+from app.config.settings import settings
+from app.database.metrics import EngineMetrics
+
+DATABASE_URL = settings.database_url
+
+def build_engine(pool_size: int,
+                 max_overflow: int,
+                 statement_timeout_ms: int,
+                 application_name: str
+                 ) -> AsyncEngine:
+    return create_async_engine(
+        DATABASE_URL,
+        echo=settings.db_echo,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=True,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_prepared_statement_cache_size,
+            "server_settings": {
+                "application_name": application_name,
+                "statement_timeout": str(statement_timeout_ms),
+            },
+        },
+    )
+
+engine = build_engine(settings.db_pool_size, settings.db_max_overflow, settings.db_statement_timeout_ms,
+                      application_name="climatech")
+ingest_engine = build_engine(settings.ingest_pool_size, settings.ingest_max_overflow,
+                             settings.ingest_statement_timeout_ms, application_name="climatech-ingest")
+engine_metrics = {
+    "requests": EngineMetrics(engine, settings.db_max_overflow),
+    "ingest": EngineMetrics(ingest_engine, settings.ingest_max_overflow),
+}
 
-engine = create_async_engine(DATABASE_URL, echo=True)
 async_session = sessionmaker(
     autocommit=False,
     autoflush=False,
@@ -12,6 +45,20 @@ async_session = sessionmaker(
     class_=AsyncSession
 )
 
+# Sessions for background jobs: COPY, upserts and rollups
+ingest_session = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    bind=ingest_engine,
+    class_=AsyncSession
+)
+
 async def get_db():
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+async def get_asyncpg_connection(db: AsyncSession):
+    """Returns the asyncpg connection behind a session, for COPY and other driver-level calls."""
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    return raw_connection.driver_connection
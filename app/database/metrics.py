@@ -0,0 +1,58 @@
+# app/database/metrics.py
+import time
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config.log_config import logger
+from app.config.settings import settings
+
+class EngineMetrics:
+    """Pool occupancy and query timings of an engine, collected through SQLAlchemy events.
+
+    Statements sent straight through the asyncpg connection (COPY) are not timed.
+    """
+
+    def __init__(self, engine: AsyncEngine, max_overflow: int):
+        self.engine = engine
+        self.max_overflow = max_overflow
+        self.queries = 0
+        self.query_seconds = 0.0
+        self.max_query_seconds = 0.0
+        self.slow_queries = 0
+        self.checkouts = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(sync_engine.pool, "checkout", self._checkout)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['query_started_at'].pop()
+        self.queries += 1
+        self.query_seconds += elapsed
+        self.max_query_seconds = max(self.max_query_seconds, elapsed)
+        if elapsed * 1000 >= settings.db_slow_query_ms:
+            self.slow_queries += 1
+            logger.warning(f"Slow query ({elapsed * 1000:.0f} ms): {' '.join(statement.split())[:300]}")
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+
+    def snapshot(self) -> dict:
+        pool = self.engine.sync_engine.pool
+        capacity = pool.size() + self.max_overflow
+        return {
+            "pool_size": pool.size(),
+            "max_overflow": self.max_overflow,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(0, pool.overflow()),  # negative until the pool has opened all its connections
+            "utilization": round(pool.checkedout() / capacity, 3) if capacity else 0.0,
+            "checkouts": self.checkouts,
+            "queries": self.queries,
+            "query_seconds_total": round(self.query_seconds, 3),
+            "query_seconds_max": round(self.max_query_seconds, 3),
+            "slow_queries": self.slow_queries,
+        }
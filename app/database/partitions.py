@@ -0,0 +1,134 @@
+# app/database/partitions.py
+import os
+import re
+import gzip
+import asyncio
+import argparse
+from datetime import date
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.database.database import ingest_session, ingest_engine, get_asyncpg_connection
+from app.models import HarmonizedLandsatSentinelData
+
+# harmonized_landsat_sentinel_data is range partitioned by month of capture_date
+PARTITIONED_TABLE = HarmonizedLandsatSentinelData.__tablename__
+PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_p(\d{{4}})(\d{{2}})$")
+
+def month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+def add_months(value: date, months: int) -> date:
+    month_index = value.year * 12 + value.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_p{month:%Y%m}"
+
+def retention_cutoff(keep_months: int, today: date = None) -> date:
+    """First month kept when keeping `keep_months` months, the current one included."""
+    return add_months(month_start(today or date.today()), 1 - keep_months)
+
+async def ensure_monthly_partition(db: AsyncSession, capture_date: date) -> str:
+    """Creates the partition holding `capture_date` if it does not exist yet.
+
+    Creating a partition locks the parent table, so it is committed on its own
+    before the scene is written instead of being held for the whole COPY. Concurrent
+    ingests of a new month queue on an advisory lock of the partition, the first
+    creates it and the others find it.
+    """
+
+    month = month_start(capture_date)
+    name = partition_name(month)
+    exists_query = text("SELECT to_regclass(:name)")
+    if (await db.execute(exists_query, {"name": name})).scalar() is not None:
+        return name
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+    if (await db.execute(exists_query, {"name": name})).scalar() is None:
+        await db.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARTITIONED_TABLE} "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+        ))
+        logger.info(f"Created partition {name}")
+    # Releases the lock
+    await db.commit()
+    return name
+
+async def list_monthly_partitions(db: AsyncSession) -> list:
+    """Returns (month, name) of the partitions attached to the pixel table, oldest first."""
+
+    result = await db.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class AS parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class AS child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.relname = :table
+    """), {"table": PARTITIONED_TABLE})
+    partitions = []
+    for name in result.scalars():
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(partitions)
+
+async def archive_partition(db: AsyncSession, name: str, archive_dir: str) -> str:
+    """Writes a detached partition to a gzipped CSV file with a header row."""
+
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{name}.csv.gz")
+    connection = await get_asyncpg_connection(db)
+    with gzip.open(path, 'wb') as output:
+        await connection.copy_from_table(name, output=output, format='csv', header=True)
+    logger.info(f"Archived partition {name} to {path}")
+    return path
+
+async def apply_retention(db: AsyncSession,
+                          keep_months: int,
+                          archive_dir: str = None,
+                          drop: bool = False,
+                          today: date = None
+                          ) -> dict:
+    """Detaches the monthly partitions older than `keep_months`.
+
+    Detached partitions stay in the database as plain tables, so they can be
+    reattached; with `drop` they are removed, after being written to `archive_dir`
+    when given. place_index_stats is not touched: the index time series of a place
+    outlives its pixels.
+    """
+
+    cutoff = retention_cutoff(keep_months, today)
+    expired = [(month, name) for month, name in await list_monthly_partitions(db) if month < cutoff]
+    archived = []
+    for month, name in expired:
+        await db.execute(text(f"ALTER TABLE {PARTITIONED_TABLE} DETACH PARTITION {name}"))
+        await db.commit()
+        if archive_dir:
+            archived.append(await archive_partition(db, name, archive_dir))
+        if drop:
+            await db.execute(text(f"DROP TABLE {name}"))
+            await db.commit()
+        logger.info(f"Partition {name} of {month:%Y-%m} {'dropped' if drop else 'detached'}")
+
+    return {"message": "Retention applied", "cutoff": cutoff.isoformat(),
+            "partitions": [name for _, name in expired], "archived": archived, "dropped": drop}
+
+async def main(keep_months: int, archive_dir: str, drop: bool, dry_run: bool):
+    async with ingest_session() as db:
+        if dry_run:
+            cutoff = retention_cutoff(keep_months)
+            for month, name in await list_monthly_partitions(db):
+                print(f"{name}\t{'expired' if month < cutoff else 'kept'}")
+        else:
+            print(await apply_retention(db, keep_months, archive_dir, drop))
+    await ingest_engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retention of the monthly pixel partitions.")
+    parser.add_argument("--keep-months", type=int, required=True,
+                        help="Months of pixels to keep, counting the current one")
+    parser.add_argument("--archive-dir", help="Write expired partitions here as .csv.gz before dropping them")
+    parser.add_argument("--drop", action="store_true", help="Drop expired partitions instead of only detaching them")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the partitions and whether they expire")
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.keep_months, arguments.archive_dir, arguments.drop, arguments.dry_run))
@@ -0,0 +1,21 @@
+# app/endpoints/health.py
+from fastapi import APIRouter
+from fastapi.responses import Response
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+
+from app.database.database import engine_metrics
+
+router = APIRouter()
+metrics_router = APIRouter()
+
+@metrics_router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Prometheus scrape endpoint: request latency, ingest stages, external API calls and DB pools."""
+
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+@router.get("/database")
+async def get_database_health():
+    """Pool occupancy and query timings of the request and ingest engines."""
+
+    return {name: metrics.snapshot() for name, metrics in engine_metrics.items()}
@@ -1,20 +1,22 @@
 # app/endpoints/ndvi.py
-import os
+import json
 import asyncio
+import numpy as np
 from sqlalchemy.future import select
-from sqlalchemy import func, distinct
-from geoalchemy2.shape import to_shape
-from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import func
+from datetime import date, datetime, timedelta
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 
-from app.database.database import get_db
+from app.database.database import get_db, get_asyncpg_connection
+from app.endpoints.responses import compressed_response
 from app.config.log_config import logger
-from app.models import HarmonizedLandsatSentinelData
-from app.external_apis.appears.auth import get_appears_token
-from app.external_apis.appears.harmonized_landsat_sentinel_data import fetch_and_store_hls_data, \
-    check_task_status, list_task_files, download_and_process_file
+from app.jobs.appears_jobs import get_or_create_ndvi_job
+from app.models import HarmonizedLandsatSentinelData, Place, AppearsJob, PlaceIndexStats, HlsScene
+from app.external_apis.appears.indices import SPECTRAL_INDICES
+from app.storage.cog_store import cog_store
 
 router = APIRouter()
 
@@ -23,13 +25,14 @@ async def get_ndvi(place_id: int, db: AsyncSession = Depends(get_db)):
     current_time = datetime.now()
     one_month_ago = current_time - timedelta(days=30)
 
+    # place_index_stats has a row per ingested date whichever storage backend holds the pixels
     most_recent_record = await db.execute(
-        select(HarmonizedLandsatSentinelData)
+        select(PlaceIndexStats.capture_date)
         .where(
-            HarmonizedLandsatSentinelData.place_id == place_id,
-            HarmonizedLandsatSentinelData.capture_date > one_month_ago
+            PlaceIndexStats.place_id == place_id,
+            PlaceIndexStats.capture_date > one_month_ago
         )
-        .order_by(HarmonizedLandsatSentinelData.capture_date.desc())
+        .limit(1)
     )
     most_recent_record = most_recent_record.scalars().first()
 
@@ -39,40 +42,88 @@ async def get_ndvi(place_id: int, db: AsyncSession = Depends(get_db)):
             "message": "Recent NDVI data available"
         })
 
-    token = get_appears_token(username=os.getenv("APPEARS_USER"), password=os.getenv("APPEARS_PASS"))
-    response = await fetch_and_store_hls_data(place_id=place_id, db=db, token=token)
-    if response.get("error"):
-        logger.error(f"Error starting data recovery: {response['error']}")
-        raise HTTPException(status_code=400, detail=response["error"])
-
-    task_id = response.get("task_id")
-    while not await check_task_status(task_id=task_id, token=token):
-        await asyncio.sleep(60)
-
-    files = await list_task_files(task_id=task_id, token=token)
-    for file_info in files:
-        await download_and_process_file(
-            task_id=task_id,
-            file_id=file_info['file_id'],
-            file_name=file_info['file_name'],
-            place_id=place_id,
-            db=db,
-            token=token
-        )
+    place = await db.get(Place, place_id)
+    if not place:
+        raise HTTPException(status_code=404, detail="Place not found")
+
+    # A new job and an active one joined are both still running, either way the request is accepted
+    job, _ = await get_or_create_ndvi_job(place_id=place_id, db=db)
+    return JSONResponse(status_code=202, content=job_to_dict(job))
+
+@router.get("/jobs/{job_id}")
+async def get_ndvi_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(AppearsJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_to_dict(job)
 
-    return JSONResponse(content={
-        "message": "NDVI data processed and updated successfully"
-    })
+def job_to_dict(job: AppearsJob) -> dict:
+    return {
+        "job_id": job.id,
+        "place_id": job.place_id,
+        "status": job.status,
+        "start_date": job.start_date.isoformat(),
+        "end_date": job.end_date.isoformat(),
+        "error": job.error,
+        "result": job.result
+    }
 
 @router.get("/dates/{place_id}")
 async def get_ndvi_dates(place_id: int, db: AsyncSession = Depends(get_db)):
-    dates_query = select(distinct(HarmonizedLandsatSentinelData.capture_date)).where(HarmonizedLandsatSentinelData.place_id == place_id)
+    dates_query = (
+        select(PlaceIndexStats.capture_date)
+        .where(PlaceIndexStats.place_id == place_id, PlaceIndexStats.index_name == 'ndvi',
+               PlaceIndexStats.valid_pixels > 0)
+        .order_by(PlaceIndexStats.capture_date)
+    )
     result = await db.execute(dates_query)
     dates = [record[0] for record in result.fetchall()]
     return {"dates": dates}
 
+@router.get("/timeseries/{place_id}")
+async def get_index_timeseries(place_id: int,
+                               index: str = "ndvi",
+                               start_date: Optional[date] = None,
+                               end_date: Optional[date] = None,
+                               db: AsyncSession = Depends(get_db)):
+    """Per date summary of a spectral index over a place, read from place_index_stats."""
+
+    if index not in SPECTRAL_INDICES:
+        raise HTTPException(status_code=400, detail=f"Unknown index {index}. Use one of {', '.join(SPECTRAL_INDICES)}.")
+
+    filters = [PlaceIndexStats.place_id == place_id, PlaceIndexStats.index_name == index]
+    if start_date:
+        filters.append(PlaceIndexStats.capture_date >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        filters.append(PlaceIndexStats.capture_date < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    result = await db.execute(select(PlaceIndexStats).where(*filters).order_by(PlaceIndexStats.capture_date))
+    return {
+        "place_id": place_id,
+        "index": index,
+        "series": [{
+            "date": stats.capture_date.date().isoformat(),
+            "mean": stats.mean,
+            "median": stats.median,
+            "p10": stats.p10,
+            "p90": stats.p90,
+            "valid_pixels": stats.valid_pixels,
+            "cloud_fraction": stats.cloud_fraction
+        } for stats in result.scalars().all()]
+    }
+
 @router.get("/heatmap/{place_id}")
-async def get_ndvi_heatmap(place_id: int, date: str = None, db: AsyncSession = Depends(get_db)):
+async def get_ndvi_heatmap(request: Request,
+                           place_id: int,
+                           date: str = None,
+                           format: str = Query("json", regex="^(json|f32)$"),
+                           max_size: Optional[int] = Query(None, ge=16, le=4096),
+                           db: AsyncSession = Depends(get_db)):
+    """NDVI of every pixel of a place, as JSON or as packed float32 columns (format=f32).
+
+    Dates stored as COGs are read from the store; `max_size` then caps the raster
+    side read, served from the COG overviews. Dates stored as rows are read whole.
+    Without a date, a place whose dates went to both backends gets all of them.
+    """
     logger.info(f"Received request for place_id: {place_id} with date: {date}")
     if date:
         try:
@@ -84,27 +135,72 @@ async def get_ndvi_heatmap(place_id: int, date: str = None, db: AsyncSession = D
         except ValueError as e:
             logger.error(f"Error parsing date: {date}, Error: {str(e)}")
             raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DDTHH:MM:SS or YYYY-MM-DDTHH:MM:SS.sss.")
-        condition = (HarmonizedLandsatSentinelData.capture_date == date_obj)
     else:
-        condition = None
+        date_obj = None
+
+    scene_filters = [HlsScene.place_id == place_id]
+    if date_obj:
+        scene_filters.append(HlsScene.capture_date == date_obj)
+    scene_keys = {}
+    for scene in (await db.execute(
+        select(HlsScene.capture_date, HlsScene.storage_key).where(*scene_filters)
+        .order_by(HlsScene.capture_date, HlsScene.id)
+    )).all():
+        scene_keys.setdefault(scene.capture_date, []).append(scene.storage_key)
 
     try:
-        ndvi_data_query = select(HarmonizedLandsatSentinelData).where(HarmonizedLandsatSentinelData.place_id == place_id, condition)
-        result = await db.execute(ndvi_data_query)
-        ndvi_records = result.scalars().all()
-        logger.info(f"NDVI records fetched: {len(ndvi_records)}")
+        # Each date is read from the backend holding it: its COGs when it has scenes, its rows otherwise
+        columns = []
+        if scene_keys:
+            # The scenes (tiles) of each date are merged, dates are concatenated
+            points = await asyncio.gather(*[
+                asyncio.to_thread(cog_store.read_scene_points, keys, ['ndvi'], None, max_size)
+                for keys in scene_keys.values()
+            ])
+            columns.extend(np.vstack([date_longitudes, date_latitudes, date_values['ndvi']])
+                           for date_longitudes, date_latitudes, date_values in points)
+        if not (date_obj and scene_keys):
+            connection = await get_asyncpg_connection(db)
+            query = f"""
+                SELECT ST_X(location::geometry), ST_Y(location::geometry), ndvi
+                FROM {HarmonizedLandsatSentinelData.__tablename__}
+                WHERE place_id = $1 AND ndvi IS NOT NULL
+            """
+            # A plain equality on capture_date lets the planner prune to a single monthly partition
+            if date_obj:
+                records = await connection.fetch(query + " AND capture_date = $2", place_id, date_obj)
+            elif scene_keys:
+                records = await connection.fetch(query + " AND capture_date <> ALL($2::timestamp[])",
+                                                 place_id, list(scene_keys))
+            else:
+                records = await connection.fetch(query, place_id)
+            columns.append(np.array(records, dtype=np.float64).reshape(-1, 3).T)
+        longitudes, latitudes, values = np.hstack(columns)
+        logger.info(f"NDVI records fetched: {values.size}")
     except Exception as e:
         logger.error(f"Failed to fetch NDVI data: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch data")
 
-    if not ndvi_records:
+    if not values.size:
         logger.warning("No NDVI data found for this place on the selected date")
         raise HTTPException(status_code=404, detail="No NDVI data found")
 
-    heatmap_data = [
-        {"latitude": to_shape(record.location).y, "longitude": to_shape(record.location).x, "ndvi": record.ndvi}
-        for record in ndvi_records
-    ]
+    if format == "json":
+        heatmap_data = [{"latitude": latitude, "longitude": longitude, "ndvi": ndvi}
+                        for longitude, latitude, ndvi in zip(longitudes.tolist(), latitudes.tolist(), values.tolist())]
+        logger.info(f"Returning {len(heatmap_data)} records in the heatmap data")
+        return compressed_response(request, json.dumps({"data": heatmap_data}).encode(), "application/json")
 
-    logger.info(f"Returning {len(heatmap_data)} records in the heatmap data")
-    return {"data": heatmap_data}
+    # Packed format: three little-endian float32 columns (longitude, latitude, ndvi) back to back
+    columns = np.vstack([longitudes, latitudes, values])
+    unique_longitudes = np.unique(longitudes)
+    steps = np.diff(unique_longitudes)
+    pixel_size = float(steps[steps > 1e-7].min()) if (steps > 1e-7).any() else 0.0
+    headers = {
+        "X-Point-Count": str(values.size),
+        "X-Bounds": f"{longitudes.min()},{latitudes.min()},{longitudes.max()},{latitudes.max()}",
+        "X-Pixel-Size": str(pixel_size),
+        "Access-Control-Expose-Headers": "X-Point-Count, X-Bounds, X-Pixel-Size"
+    }
+    logger.info(f"Returning {values.size} records in the packed heatmap data")
+    return compressed_response(request, columns.astype('<f4').tobytes(), "application/octet-stream", headers)
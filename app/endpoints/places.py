@@ -1,5 +1,6 @@
 # app/endpoints/places.py
 import json
+from datetime import date, datetime, timedelta
 from sqlalchemy import func
 from pydantic import BaseModel
 from typing import List, Optional
@@ -8,11 +9,15 @@ from sqlalchemy.future import select
 from geoalchemy2.shape import from_shape
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
-from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Form, UploadFile, File, Query
 
 from app.models.place import Place
+from app.models import WildFireData, PlaceFireEvent
 from app.database.database import get_db
 from app.config.log_config import logger
+from app.storage.cog_store import cog_store
+from app.external_apis.firms.wildfires import FIRMS_MAX_DAYS
+from app.external_apis.firms.place_fire_events import match_place_to_detections
 
 router = APIRouter()
 
@@ -43,10 +48,13 @@ async def add_place(name: str = Form(...),
     db.add(new_place)
     try:
         await db.commit()
-        return {"message": "Place added successfully", "status": "success"}
     except IntegrityError:
         await db.rollback()
         raise HTTPException(status_code=400, detail="Place already exists")
+    await db.refresh(new_place)
+    # Detections synced before the place existed are matched once, later ones by the FIRMS sync
+    await match_place_to_detections(db, place_id=new_place.id, since=date.today() - timedelta(days=FIRMS_MAX_DAYS))
+    return {"message": "Place added successfully", "status": "success"}
 
 @router.delete("/delete_place/{place_id}")
 async def delete_place(place_id: int, db: AsyncSession = Depends(get_db)):
@@ -60,9 +68,46 @@ async def delete_place(place_id: int, db: AsyncSession = Depends(get_db)):
             logger.info(f"Attempting to delete place with ID: {place.id}")
             await session.delete(place)
             await session.commit()
-            logger.info(f"Place with ID: {place.id} deleted successfully.")
+            # hls_scenes rows went with the place, their COGs are removed from the store
+            cog_store.delete_place(place_id)
+            logger.info(f"Place with ID: {place_id} deleted successfully.")
             return {"message": "Place deleted successfully"}
         except SQLAlchemyError as e:
             await session.rollback()
             logger.error(f"Failed to delete place with ID {place_id}: {str(e)}")
             raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/{place_id}/fires")
+async def get_place_fires(place_id: int,
+                          start_date: Optional[date] = None,
+                          limit: int = Query(500, ge=1, le=5000),
+                          db: AsyncSession = Depends(get_db)):
+    """Wildfire detections inside or near a place, newest first, read from place_fire_events."""
+
+    place = await db.get(Place, place_id)
+    if not place:
+        raise HTTPException(status_code=404, detail="Place not found")
+
+    start_date = start_date or date.today() - timedelta(days=FIRMS_MAX_DAYS)
+    result = await db.execute(
+        select(PlaceFireEvent.wildfire_id, PlaceFireEvent.distance_m, WildFireData.latitude,
+               WildFireData.longitude, WildFireData.acq_date, WildFireData.acq_time, WildFireData.satellite,
+               WildFireData.confidence, WildFireData.frp)
+        .join(WildFireData, WildFireData.id == PlaceFireEvent.wildfire_id)
+        .where(PlaceFireEvent.place_id == place_id,
+               PlaceFireEvent.acq_date >= datetime.combine(start_date, datetime.min.time()))
+        .order_by(PlaceFireEvent.acq_date.desc(), PlaceFireEvent.distance_m)
+        .limit(limit)
+    )
+    return [{
+        "wildfire_id": event.wildfire_id,
+        "distance_m": event.distance_m,
+        "latitude": event.latitude,
+        "longitude": event.longitude,
+        "acq_date": event.acq_date.isoformat(),
+        "acq_time": event.acq_time,
+        "satellite": event.satellite,
+        "confidence": event.confidence,
+        "frp": event.frp
+    } for event in result.all()]
@@ -0,0 +1,28 @@
+# app/endpoints/responses.py
+import gzip
+from fastapi import Request, Response
+
+try:
+    import brotli
+except ImportError:  # Optional, gzip is used when brotli is not installed
+    brotli = None
+
+MIN_COMPRESS_SIZE = 1024  # bytes
+
+def compressed_response(request: Request,
+                        body: bytes,
+                        media_type: str,
+                        headers: dict = None
+                        ) -> Response:
+    """Builds a response compressed with the best encoding the client accepts (br, then gzip)."""
+
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    accepted = {encoding.split(';')[0].strip() for encoding in request.headers.get("accept-encoding", "").split(',')}
+    if len(body) >= MIN_COMPRESS_SIZE:
+        if brotli is not None and "br" in accepted:
+            body = brotli.compress(body, quality=4)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in accepted:
+            body = gzip.compress(body, compresslevel=5)
+            headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
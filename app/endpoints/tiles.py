@@ -0,0 +1,75 @@
+# app/endpoints/tiles.py
+import asyncio
+import numpy as np
+from datetime import datetime
+from sqlalchemy.future import select
+from fastapi.responses import Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, Depends, HTTPException, Request
+
+from app.config.log_config import logger
+from app.tiles.tile_cache import tile_cache
+from app.storage.cog_store import cog_store
+from app.models import HarmonizedLandsatSentinelData, HlsScene
+from app.database.database import get_db, get_asyncpg_connection
+from app.tiles.render import LAYER_RANGES, TILE_SIZE, render_tile, tile_query_bounds
+
+router = APIRouter()
+
+# Browsers revalidate every tile, a new ingest changes the ETag of the tiles it touches
+TILE_HEADERS = {"Cache-Control": "no-cache"}
+COG_READ_MAX_SIZE = 2 * TILE_SIZE  # Larger windows are read from the COG overviews
+
+@router.get("/{layer}/{place_id}/{date}/{z}/{x}/{y}.png")
+async def get_tile(layer: str, place_id: int, date: str, z: int, x: int, y: int, request: Request,
+                   db: AsyncSession = Depends(get_db)):
+    """Renders an XYZ tile of a spectral index (ndvi, evi, ...) or band column for a place and date.
+
+    Tiles carry an ETag of their version in the tile cache, which changes when a new ingest
+    invalidates them; a request whose If-None-Match still matches gets a 304.
+    """
+
+    if layer not in LAYER_RANGES:
+        raise HTTPException(status_code=404, detail=f"Unknown layer {layer}")
+    try:
+        capture_date = datetime.strptime(date, '%Y-%m-%d')
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
+
+    key = (place_id, capture_date.date().isoformat(), layer, z, x, y)
+    cached = tile_cache.get(key)
+    if cached is not None:
+        tile, version = cached
+    else:
+        west, south, east, north = tile_query_bounds(z, x, y)
+        scenes = (await db.execute(
+            select(HlsScene.storage_key, HlsScene.bands)
+            .where(HlsScene.place_id == place_id, HlsScene.capture_date == capture_date)
+            .order_by(HlsScene.id)
+        )).all()
+        if scenes:
+            # Every scene (tile) of the date holding the layer, merged
+            keys = [scene.storage_key for scene in scenes if layer in scene.bands]
+            longitudes, latitudes, values = await asyncio.to_thread(
+                cog_store.read_scene_points, keys, [layer], (west, south, east, north), COG_READ_MAX_SIZE
+            ) if keys else (np.empty(0), np.empty(0), {layer: np.empty(0)})
+            columns = np.vstack([longitudes, latitudes, values[layer]])
+        else:
+            connection = await get_asyncpg_connection(db)
+            records = await connection.fetch(f"""
+                SELECT ST_X(location::geometry) AS longitude, ST_Y(location::geometry) AS latitude, {layer} AS value
+                FROM {HarmonizedLandsatSentinelData.__tablename__}
+                WHERE place_id = $1 AND capture_date = $2 AND {layer} IS NOT NULL
+                  AND ST_X(location::geometry) BETWEEN $3 AND $4
+                  AND ST_Y(location::geometry) BETWEEN $5 AND $6
+            """, place_id, capture_date, west, east, south, north)
+            columns = np.array(records, dtype=np.float64).reshape(-1, 3).T
+        # Rendering is CPU bound, keep it off the event loop
+        tile = await asyncio.to_thread(render_tile, columns[0], columns[1], columns[2], layer, z, x, y)
+        version = tile_cache.put(key, tile)
+        logger.debug(f"Rendered tile {key} from {len(columns[2])} pixels")
+
+    headers = {**TILE_HEADERS, "ETag": f'"{version}"'}
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=tile, media_type="image/png", headers=headers)
@@ -1,80 +1,157 @@
 # app/endpoints/wild_fires.py
-import requests
-from datetime import datetime
+import math
+import base64
+from typing import List, Optional
 from sqlalchemy.future import select
+from geoalchemy2 import Geography
+from sqlalchemy import func, and_, or_, cast
+from datetime import date, datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 
-from app.models import WildFireData
+from app.models import WildFireData, WildfireDailyCell
 from app.config.log_config import logger
 from app.database.database import get_db
-import os
+from app.external_apis.firms.wildfires import CONFIDENCE_LEVEL, CONFIDENCE_LEVELS
+from app.external_apis.firms.rollups import CLUSTER_GRID_SIZES, grid_level_for_zoom
 
 router = APIRouter()
 
+DEFAULT_WINDOW_DAYS = 3
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 5000
+
+def encode_cursor(acq_date: datetime, detection_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{acq_date.isoformat()}|{detection_id}".encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        acq_date, detection_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(acq_date), int(detection_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def parse_bbox(bbox: str) -> tuple:
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(','))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid bbox. Use west,south,east,north.")
+    return west, south, east, north
+
 @router.get("/wildfires")
-async def get_wildfires(satellite: str, days: int, db: AsyncSession = Depends(get_db)):
-    logger.info(f"Fetching wildfire data for satellite {satellite} over the past {days} days.")
-    
-    MAP_KEY = os.getenv("FIRMS_MAP_KEY")
-    url = f'https://firms.modaps.eosdis.nasa.gov/api/country/csv/{MAP_KEY}/{satellite}/ARG/{days}'
-    logger.info(f"Fetching data from FIRMS API: {url}")
-    
-    response = requests.get(url)
-    if response.status_code != 200:
-        logger.error(f"Failed to fetch data: {response.status_code} {response.text}")
-        raise HTTPException(status_code=400, detail="Error fetching wildfire data")
-
-    logger.info("Data fetched successfully from external API.")
-    data = response.text.splitlines()
-    logger.info(f"Total number of lines received (including header): {len(data)}")
-    logger.info("First 5 lines of data:")
-    for line in data[:5]:
-        logger.info(line)
-
-    if len(data) > 1:
-        # Asumiendo que la primera línea es el encabezado
-        header = data[0].split(',')
-        wildfires = [
-            WildFireData(
-                latitude=float(row.split(',')[header.index('latitude')]),
-                longitude=float(row.split(',')[header.index('longitude')]),
-                brightness=float(row.split(',')[header.index('brightness')]),
-                scan=float(row.split(',')[header.index('scan')]),
-                track=float(row.split(',')[header.index('track')]),
-                acq_date=datetime.strptime(row.split(',')[header.index('acq_date')], '%Y-%m-%d'),
-                acq_time=row.split(',')[header.index('acq_time')],
-                satellite=row.split(',')[header.index('satellite')],
-                confidence=row.split(',')[header.index('confidence')],
-                version=row.split(',')[header.index('version')],
-                bright_t31=float(row.split(',')[header.index('bright_t31')]),
-                frp=float(row.split(',')[header.index('frp')]),
-                daynight=row.split(',')[header.index('daynight')],
-                location=f'POINT({row.split(',')[header.index('longitude')]} {row.split(',')[header.index('latitude')]})'
-            ) for row in data[1:]  # Skip the header
+async def get_wildfires(bbox: Optional[str] = None,
+                        start_date: Optional[date] = None,
+                        end_date: Optional[date] = None,
+                        satellite: Optional[List[str]] = Query(None),
+                        min_confidence: Optional[str] = Query(None, regex="^(low|nominal|high)$"),
+                        cursor: Optional[str] = None,
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        db: AsyncSession = Depends(get_db)):
+    """Stored wildfire detections, newest first, one page at a time.
+
+    Detections are synced from FIRMS in the background; this only reads wildfire_data
+    through the acq_date and GIST location indexes. Pass the returned `next_cursor`
+    to get the following page.
+    """
+
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_WINDOW_DAYS)
+    filters = [
+        WildFireData.acq_date >= datetime.combine(start_date, datetime.min.time()),
+        WildFireData.acq_date < datetime.combine(end_date + timedelta(days=1), datetime.min.time()),
+    ]
+    if bbox:
+        west, south, east, north = parse_bbox(bbox)
+        envelope = cast(func.ST_MakeEnvelope(west, south, east, north, 4326), Geography(srid=4326))
+        filters.append(func.ST_Intersects(WildFireData.location, envelope))
+    if satellite:
+        filters.append(WildFireData.satellite.in_(satellite))
+    if min_confidence:
+        filters.append(CONFIDENCE_LEVEL >= CONFIDENCE_LEVELS[min_confidence])
+    if cursor:
+        cursor_date, cursor_id = decode_cursor(cursor)
+        filters.append(or_(
+            WildFireData.acq_date < cursor_date,
+            and_(WildFireData.acq_date == cursor_date, WildFireData.id < cursor_id)
+        ))
+
+    result = await db.execute(
+        select(WildFireData.id, WildFireData.latitude, WildFireData.longitude, WildFireData.brightness,
+               WildFireData.frp, WildFireData.acq_date, WildFireData.acq_time, WildFireData.satellite,
+               WildFireData.confidence, WildFireData.daynight)
+        .where(*filters)
+        .order_by(WildFireData.acq_date.desc(), WildFireData.id.desc())
+        .limit(limit)
+    )
+    rows = result.all()
+    logger.info(f"Retrieved {len(rows)} wildfire detections from the database.")
+
+    detections = [{
+        "id": row.id,
+        "latitude": row.latitude,
+        "longitude": row.longitude,
+        "brightness": row.brightness,
+        "frp": row.frp,
+        "acq_date": row.acq_date.isoformat(),
+        "acq_time": row.acq_time,
+        "satellite": row.satellite,
+        "confidence": row.confidence,
+        "daynight": row.daynight
+    } for row in rows]
+    next_cursor = encode_cursor(rows[-1].acq_date, rows[-1].id) if len(rows) == limit else None
+    return {"detections": detections, "next_cursor": next_cursor}
+
+@router.get("/wildfires/clusters")
+async def get_wildfire_clusters(zoom: int = Query(..., ge=0, le=22),
+                                bbox: Optional[str] = None,
+                                start_date: Optional[date] = None,
+                                end_date: Optional[date] = None,
+                                satellite: Optional[List[str]] = Query(None),
+                                db: AsyncSession = Depends(get_db)):
+    """Wildfire detections binned on a grid sized for the zoom level.
+
+    Cells are merged from the daily rollups, so the cost and payload follow the
+    number of cells in view, not the number of detections in the window.
+    """
+
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=DEFAULT_WINDOW_DAYS)
+    level = grid_level_for_zoom(zoom)
+    size = CLUSTER_GRID_SIZES[level]
+    filters = [
+        WildfireDailyCell.grid_level == level,
+        WildfireDailyCell.acq_date.between(start_date, end_date),
+    ]
+    if bbox:
+        west, south, east, north = parse_bbox(bbox)
+        filters += [
+            WildfireDailyCell.cell_x.between(math.floor(west / size), math.floor(east / size)),
+            WildfireDailyCell.cell_y.between(math.floor(south / size), math.floor(north / size)),
         ]
+    if satellite:
+        filters.append(WildfireDailyCell.satellite.in_(satellite))
+
+    count = func.sum(WildfireDailyCell.count)
+    result = await db.execute(
+        select(count.label('count'),
+               (func.sum(WildfireDailyCell.sum_latitude) / count).label('latitude'),
+               (func.sum(WildfireDailyCell.sum_longitude) / count).label('longitude'),
+               func.max(WildfireDailyCell.max_frp).label('max_frp'),
+               func.max(WildfireDailyCell.max_confidence).label('max_confidence'))
+        .where(*filters)
+        .group_by(WildfireDailyCell.cell_x, WildfireDailyCell.cell_y)
+    )
+    cells = result.all()
+    logger.info(f"Retrieved {len(cells)} wildfire cells of {size} degrees for zoom {zoom}.")
 
-        async with db.begin():
-            db.add_all(wildfires)
-            await db.commit()
-    
-    logger.info("Wildfire data committed to the database.")
-    
-    # Retrieving data from database to send back to client
-    result = await db.execute(select(WildFireData))
-    wildfires_data = result.scalars().all()
-    logger.info(f"Retrieved {len(wildfires_data)} records from the database.")
-    
-    response_data = [{
-        "id": wildfire.id,
-        "latitude": wildfire.latitude,
-        "longitude": wildfire.longitude,
-        "brightness": wildfire.brightness,
-        "acq_date": wildfire.acq_date.isoformat(),
-        "acq_time": wildfire.acq_time,
-        "satellite": wildfire.satellite,
-        "confidence": wildfire.confidence
-    } for wildfire in wildfires_data]
-
-    logger.info("Sending data back to the client.")
-    return response_data
\ No newline at end of file
+    confidence_names = {level: name for name, level in CONFIDENCE_LEVELS.items()}
+    return {
+        "cell_size": size,
+        "cells": [{
+            "latitude": cell.latitude,
+            "longitude": cell.longitude,
+            "count": int(cell.count),
+            "max_frp": cell.max_frp,
+            "max_confidence": confidence_names.get(cell.max_confidence)
+        } for cell in cells]
+    }
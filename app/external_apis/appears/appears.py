@@ -1,7 +1,5 @@
-import requests
+from app.external_apis.clients import appears_client
 
-def get_product_info(token: str, product_id: str) -> dict:
-    headers = {'Authorization': f'Bearer {token}'}
-    url = f"https://appeears.earthdatacloud.nasa.gov/api/product/{product_id}"
-    response = requests.get(url, headers=headers)
-    return response.json()
\ No newline at end of file
+async def get_product_info(product_id: str) -> dict:
+    status, product = await appears_client.product_info(product_id)
+    return product
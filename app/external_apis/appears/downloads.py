@@ -0,0 +1,86 @@
+# app/external_apis/appears/downloads.py
+import os
+import asyncio
+import aiohttp
+import tempfile
+
+from app.config.log_config import logger
+from app.metrics.prometheus import BYTES_DOWNLOADED
+from app.external_apis.clients import AppEEARSClient, appears_client
+
+DOWNLOAD_CONCURRENCY = int(os.getenv("APPEARS_DOWNLOAD_CONCURRENCY", "8"))
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024  # 1 MiB
+DOWNLOAD_ATTEMPTS = 3
+SCRATCH_DIR = os.getenv("APPEARS_SCRATCH_DIR", os.path.join(tempfile.gettempdir(), "climatech"))
+
+class BundleDownloader:
+    """Downloads AppEEARS bundle files through the client's long-lived, pooled HTTP session.
+
+    At most `concurrency` files are transferred at the same time. Files are streamed
+    to `<scratch_dir>/<task_id>/<file_name>.part` and renamed once complete; an
+    interrupted transfer resumes from the partial file with a Range request.
+    """
+
+    def __init__(self,
+                 client: AppEEARSClient = appears_client,
+                 scratch_dir: str = SCRATCH_DIR,
+                 concurrency: int = DOWNLOAD_CONCURRENCY,
+                 chunk_size: int = DOWNLOAD_CHUNK_SIZE
+                 ):
+        self.client = client
+        self.scratch_dir = scratch_dir
+        self.concurrency = concurrency
+        self.chunk_size = chunk_size
+        self._semaphore = None
+
+    def task_dir(self, task_id: str) -> str:
+        path = os.path.join(self.scratch_dir, task_id)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    async def download(self,
+                       task_id: str,
+                       file_id: str,
+                       file_name: str
+                       ):
+        """Downloads a bundle file and returns its local path, or None if it failed."""
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        file_path = os.path.join(self.task_dir(task_id), os.path.basename(file_name))
+        if os.path.exists(file_path):
+            return file_path
+
+        part_path = f"{file_path}.part"
+        url = f"{self.client.base_url}/bundle/{task_id}/{file_id}"
+        # Bundle files can take minutes, the client's total timeout does not apply to them
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=120)
+
+        async with self._semaphore:
+            for attempt in range(1, DOWNLOAD_ATTEMPTS + 1):
+                headers = {"Authorization": f"Bearer {await self.client.get_token()}"}
+                offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+                if offset:
+                    headers["Range"] = f"bytes={offset}-"
+                try:
+                    async with self.client.session.get(url, headers=headers, timeout=timeout) as response:
+                        if response.status not in (200, 206):
+                            error_msg = await response.text()
+                            logger.error(f"Error downloading the file {file_name}: HTTP {response.status} {error_msg}")
+                            return None
+                        # A 200 means the server ignored the Range header, start over
+                        with open(part_path, 'ab' if response.status == 206 else 'wb') as f:
+                            async for chunk in response.content.iter_chunked(self.chunk_size):
+                                f.write(chunk)
+                                BYTES_DOWNLOADED.labels(self.client.name).inc(len(chunk))
+                    os.replace(part_path, file_path)
+                    logger.debug(f"File {file_name} successfully downloaded to {file_path}")
+                    return file_path
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    logger.warning(f"Download of {file_name} interrupted (attempt {attempt}/{DOWNLOAD_ATTEMPTS}): {e}")
+                    await asyncio.sleep(2 ** attempt)
+
+        logger.error(f"Giving up on downloading the file {file_name}")
+        return None
+
+bundle_downloader = BundleDownloader()
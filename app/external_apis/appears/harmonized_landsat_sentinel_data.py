@@ -1,26 +1,40 @@
 # app/external_apis/appears/harmonized_landsat_sentinel_data.py
-import re
 import os
+import time
 import json
-import aiohttp
-import requests
-import rasterio
+import shutil
+import asyncio
+import numpy as np
 from datetime import datetime
 from sqlalchemy.sql import func
 from sqlalchemy.future import select
 from shapely.geometry import mapping
 from geoalchemy2.shape import to_shape
-from datetime import datetime, timedelta
-from geoalchemy2.elements import WKTElement
+from datetime import date, datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
 
 from app.config.log_config import logger
-from app.external_apis.appears.utils_appears import BAND_NAME_MAP
-from app.models import Place, HarmonizedLandsatSentinelData
+from app.tiles.tile_cache import tile_cache
+from app.storage.cog_store import cog_store, cog_backend_enabled
+from app.metrics.prometheus import stage_timer, ROWS_WRITTEN, PIXELS_DROPPED, CLIP_RATIO, SCENES_SCREENED, BYTES_SKIPPED
+from app.database.database import get_asyncpg_connection
+from app.database.partitions import ensure_monthly_partition
+from app.external_apis.appears.utils_appears import FMASK_MIN_CLEAR_FRACTION
+from app.external_apis.appears.indices import SPECTRAL_INDICES, summarize_index, upsert_place_index_stats
+from app.external_apis.clients import appears_client
+from app.external_apis.appears.downloads import bundle_downloader
+from app.external_apis.appears.layer_profiles import HLS_PRODUCTS, layer_profile, appears_product_id
+from app.external_apis.appears.hls_scenes import APPEARS_MOSAIC_SCENE_ID, group_files_by_scene, assemble_scene, \
+    screen_fmask
+from app.models import Place, HarmonizedLandsatSentinelData, HlsScene
+
+INGEST_QUEUE_SIZE = 4  # Scenes downloaded and waiting to be parsed and written
 
 async def fetch_and_store_hls_data(place_id: int, 
-                                   db: AsyncSession, 
-                                   token
+                                   db: AsyncSession,
+                                   start_date: date,
+                                   end_date: date
                                    ) -> dict:
     logger.info(f"Fetching place information for place_id: {place_id}")
     statement = select(Place).where(Place.id == place_id)
@@ -31,27 +45,39 @@ async def fetch_and_store_hls_data(place_id: int,
         logger.error(f"No place found with place_id: {place_id}")
         return {"error": "Place not found"}
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=7)  # One weeks earlier
+    return await submit_hls_task(places=[(place.id, place.location)], start_date=start_date, end_date=end_date)
+
+async def submit_hls_task(places: list,
+                          start_date: date,
+                          end_date: date
+                          ) -> dict:
+    """Submits one AppEEARS area task covering every place in `places`, a list of (place_id, location).
+
+    Each place is one feature of the FeatureCollection. AppEEARS numbers the features
+    from 1 in the output file names (aid0001, aid0002, ...), in the order given here,
+    which is how download_and_process_task_files routes the files back to their place.
+    """
+
     task_name = f"HarmonizedLandsatSentinelData-{end_date.strftime('%Y%m%d')}"
+    if len(places) > 1:
+        task_name += f"-{len(places)}places"
 
-    logger.info(f"Submitting task for place_id {place_id} with task_name {task_name}")
+    logger.info(f"Submitting task {task_name} for places {[place_id for place_id, _ in places]}")
     logger.info(f"Start date: {start_date.strftime('%m-%d-%Y')}, End date: {end_date.strftime('%m-%d-%Y')}")
 
-    # Convert GeoAlchemy geometry to Shapely and create a FeatureCollection
-    shapely_geom = to_shape(place.location)
+    # Convert GeoAlchemy geometries to Shapely and create a FeatureCollection, one feature per place
     geo_json = {
         "type": "FeatureCollection",
         "features": [
             {
                 "type": "Feature",
-                "geometry": mapping(shapely_geom),
-                "properties": {}
-            }
+                "geometry": mapping(to_shape(location)),
+                "properties": {"place_id": place_id}
+            } for place_id, location in places
         ],
         "fileName": "User-Drawn-Polygon"  # Be sure to adjust this value if necessary.
     }
-    logger.info(f"GeoJSON for place location: {json.dumps(geo_json)}")
+    logger.debug(f"GeoJSON for place locations: {json.dumps(geo_json)}")
 
     task_params = {
         "task_type": "area",
@@ -61,11 +87,10 @@ async def fetch_and_store_hls_data(place_id: int,
             "dates": [
                 {"startDate": start_date.strftime("%m-%d-%Y"), "endDate": end_date.strftime("%m-%d-%Y")}
             ],
+            # Only the layers of the ingested indices, for every product (see layer_profile)
             "layers": [
-                {"product": "HLSS30.020", "layer": layer} for layer in [
-                    "B01", "B02", "B03", "B04", "B05", "B06", "B07", "B08", "B09", "B10", "B11", "B12", "B8A", 
-                    "Fmask", "SAA", "SZA", "VAA", "VZA"
-                ]
+                {"product": appears_product_id(product), "layer": layer}
+                for product in HLS_PRODUCTS for layer in layer_profile(product)
             ],
             "output": {
                 "format": {"type": "geotiff"},
@@ -75,215 +100,349 @@ async def fetch_and_store_hls_data(place_id: int,
         }
     }
 
-    logger.info(f"Task parameters: {json.dumps(task_params, indent=2)}")
+    logger.debug(f"Task parameters: {json.dumps(task_params)}")
 
-    response = requests.post(
-        "https://appeears.earthdatacloud.nasa.gov/api/task",
-        headers={"Authorization": f"Bearer {token}"},
-        json=task_params
-    )
+    with stage_timer("appears", "submit"):
+        status, task_response = await appears_client.submit_task(task_params)
 
-    if response.status_code == 202:
-        task_response = response.json()
+    if status == 202:
         task_id = task_response.get('task_id', None)
         if task_id:
             logger.info(f"Task submitted successfully with task_id: {task_id}")
             return {"message": "HLS data retrieval initiated successfully", "task_id": task_id}
         else:
             logger.warning("Task submitted but no task ID returned")
-            return {"error": "Task submitted but no task ID returned", "status_code": response.status_code}
+            return {"error": "Task submitted but no task ID returned", "status_code": status}
     else:
-        logger.error(f"Failed to submit task: HTTP {response.status_code}")
-        return {"error": "Failed to submit task", "status_code": response.status_code}
+        logger.error(f"Failed to submit task: HTTP {status}")
+        return {"error": "Failed to submit task", "status_code": status}
 
-async def check_task_status(task_id: str, 
-                            token: str
-                            ) -> bool:
+async def check_task_status(task_id: str) -> bool:
     """ Checks the status of the task and returns True if it is complete. """
 
-    status_url = f"https://appeears.earthdatacloud.nasa.gov/api/task/{task_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(status_url, headers=headers)
-    if response.status_code == 200:
-        task_info = response.json()
+    status, task_info = await appears_client.task_status(task_id)
+    if status == 200:
         task_status = task_info['status']
         logger.info(f"Task status {task_id}: {task_status}")
         return task_status == 'done'
     else:
-        logger.error(f"Error checking task status {task_id}: HTTP {response.status_code}")
+        logger.error(f"Error checking task status {task_id}: HTTP {status}")
     return False
 
-async def list_task_files(task_id: str, 
-                          token: str
-                          ) -> list:
+async def list_task_files(task_id: str) -> list:
     """ Lists the available files of a completed task. """
 
-    url = f"https://appeears.earthdatacloud.nasa.gov/api/bundle/{task_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        files = response.json()['files']
+    status, bundle = await appears_client.list_bundle_files(task_id)
+    if status == 200:
+        files = bundle['files']
         logger.info(f"Files found for the task {task_id}: {len(files)} listed files")
         return files
     else:
-        logger.warning(f"Could not list the files for the task {task_id}: HTTP {response.status_code}")
+        logger.warning(f"Could not list the files for the task {task_id}: HTTP {status}")
         return []
 
-async def download_and_process_file(
-                                    task_id: str, 
-                                    file_id: str, 
-                                    file_name: str, 
-                                    place_id: int, 
-                                    db: AsyncSession,
-                                    token: str
-                                    ):
-    """Download and process a GeoTIFF file using AppEEARS API."""
-
-    # Verify if the file is a GeoTIFF file
-    if not file_name.endswith('.tif'):
-        logger.info(f"Skipping non-TIF file: {file_name}")
-        return {"message": "Skipped non-TIF file"}
-
-    url = f"https://appeears.earthdatacloud.nasa.gov/api/bundle/{task_id}/{file_id}"
-    headers = {"Authorization": f"Bearer {token}"}
-    file_path = f"temp_{file_name}"
-
-    # Download file using AppEEARS API
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                # Make sure that the folder where the file will be saved exists.
-                os.makedirs(os.path.dirname(file_path), exist_ok=True)
-                with open(file_path, 'wb') as f:
-                    while True:
-                        chunk = await response.content.read(1024)
-                        if not chunk:
-                            break
-                        f.write(chunk)
-                logger.info(f"File {file_name} successfully downloaded to {file_path}")
-            else:
-                error_msg = await response.text()
-                logger.error(f"Error downloading the file: {error_msg}")
-                return {"error": f"Error downloading file: {error_msg}"}
-
-    # Extracts information and coordinates
-    data_points = extract_info_and_coordinates_from_tif(file_name, file_path)
-    if not data_points:
-        os.remove(file_path)
+async def download_and_process_task_files(task_id: str, 
+                                          files: list, 
+                                          places: dict, 
+                                          db: AsyncSession
+                                          ) -> dict:
+    """Downloads the GeoTIFF files of a task and stores one wide row per pixel, scene by scene.
+
+    `places` maps the AppEEARS feature id (the aid of the file names) to its place_id,
+    so a task covering several places stores every scene under the right one. Scenes
+    are downloaded concurrently through the shared bundle downloader and handed to the
+    parser/DB writer through a bounded queue, so parsing and writing a scene overlaps
+    with the downloads of the next ones.
+    """
+
+    scenes = group_files_by_scene(files)
+    unknown_features = {key[1] for key in scenes} - set(places)
+    if unknown_features:
+        logger.warning(f"Task {task_id} has files of unknown features {sorted(unknown_features)}, skipping them")
+        scenes = {key: scene_files for key, scene_files in scenes.items() if key[1] in places}
+    logger.info(f"Task {task_id} has {len(scenes)} scenes of {len(places)} places in {len(files)} files")
+
+    # Pixels outside the place polygon are dropped before writing, see assemble_scene
+    result = await db.execute(select(Place.id, Place.location).where(Place.id.in_(list(places.values()))))
+    geometries = {place_id: to_shape(location) for place_id, location in result.all()}
+
+    queue = asyncio.Queue(maxsize=INGEST_QUEUE_SIZE)
+    # Bounds the scenes sitting on disk: downloading, queued or being processed
+    scene_slots = asyncio.Semaphore(INGEST_QUEUE_SIZE + bundle_downloader.concurrency)
+
+    async def download_files(scene_files: dict) -> dict:
+        with stage_timer("appears", "download"):
+            paths = await asyncio.gather(*[
+                bundle_downloader.download(
+                    task_id=task_id,
+                    file_id=file_info['file_id'],
+                    file_name=file_info['file_name']
+                ) for file_info in scene_files.values()
+            ])
+        return {layer: path for layer, path in zip(scene_files, paths) if path}
+
+    async def download_scene(scene_key, scene_files: dict):
+        await scene_slots.acquire()
+        layer_paths = {}
+        if 'fmask' in scene_files:
+            # Fmask first: a scene too cloudy over the place is dropped before its bands are downloaded
+            layer_paths = await download_files({'fmask': scene_files['fmask']})
+            if 'fmask' in layer_paths:
+                place_id = places[scene_key[1]]
+                with stage_timer("appears", "screen"):
+                    screening = await asyncio.to_thread(screen_fmask, layer_paths['fmask'], place_id,
+                                                        geometries.get(place_id))
+                if screening['clear_fraction'] < FMASK_MIN_CLEAR_FRACTION:
+                    skipped_files = [file_info for layer, file_info in scene_files.items() if layer != 'fmask']
+                    SCENES_SCREENED.labels("appears", "skipped").inc()
+                    BYTES_SKIPPED.labels("appears").inc(sum(file_info.get('file_size') or 0
+                                                            for file_info in skipped_files))
+                    logger.info(f"Skipping {scene_key[2]} scene {scene_key[0]} of place {place_id}: "
+                                f"{screening['clear_fraction']:.0%} clear, {len(skipped_files)} files not downloaded")
+                    os.remove(layer_paths['fmask'])
+                    scene_slots.release()
+                    # The cloud cover of the skipped scene still counts for its date
+                    results[place_id].append({"message": "Scene skipped by the Fmask screening", "rows": 0,
+                                              "date": scene_key[0].isoformat(), "skipped": True,
+                                              "observed_pixels": screening['observed_pixels'],
+                                              "cloudy_pixels": screening['cloudy_pixels']})
+                    return
+                SCENES_SCREENED.labels("appears", "kept").inc()
+        layer_paths.update(await download_files({layer: file_info for layer, file_info in scene_files.items()
+                                                 if layer not in layer_paths}))
+        await queue.put((scene_key, layer_paths))
+
+    async def download_all_scenes():
+        try:
+            await asyncio.gather(*[download_scene(key, scene_files) for key, scene_files in sorted(scenes.items())])
+        finally:
+            await queue.put(None)
+
+    results = {place_id: [] for place_id in places.values()}
+    producer = asyncio.create_task(download_all_scenes())
+    try:
+        while (item := await queue.get()) is not None:
+            (capture_date, aid, product, scene_id), layer_paths = item
+            try:
+                place_id = places[aid]
+                results[place_id].append(await process_scene(
+                    layer_paths, capture_date, place_id, db, geometry=geometries.get(place_id), product=product,
+                    scene_id=scene_id
+                ))
+            finally:
+                for file_path in layer_paths.values():
+                    os.remove(file_path)
+                scene_slots.release()
+        await producer
+    finally:
+        producer.cancel()
+        shutil.rmtree(bundle_downloader.task_dir(task_id), ignore_errors=True)
+
+    summaries = {place_id: summarize_scene_results(place_results) for place_id, place_results in results.items()}
+    return {"message": "All files processed successfully",
+            "scenes": sum(summary["scenes"] for summary in summaries.values()),
+            "rows": sum(summary["rows"] for summary in summaries.values()),
+            "places": summaries}
+
+def summarize_scene_results(results: list) -> dict:
+    """Scenes, rows, dates and per date cloud fraction of the processed scenes of one place.
+
+    Scenes skipped by the Fmask screening count as scenes, and their cloud cover as
+    that of their date, without rows.
+    """
+
+    rows = sum(result.get("rows", 0) for result in results)
+    dates = sorted({result["date"] for result in results if result.get("date")})
+    # A date can have several scenes (tiles), its cloud fraction covers all of them
+    cloud_fractions = {}
+    for capture_date in dates:
+        scene_results = [result for result in results if result.get("date") == capture_date]
+        observed = sum(result["observed_pixels"] for result in scene_results)
+        cloudy = sum(result["cloudy_pixels"] for result in scene_results)
+        cloud_fractions[capture_date] = cloudy / observed if observed else None
+    return {"message": "All files processed successfully", "scenes": len(results),
+            "skipped_scenes": sum(1 for result in results if result.get("skipped")), "rows": rows, "dates": dates,
+            "cloud_fractions": cloud_fractions}
+
+async def process_scene(layer_paths: dict, 
+                        capture_date, 
+                        place_id: int, 
+                        db: AsyncSession,
+                        geometry = None,
+                        product: str = None,
+                        scene_id: str = APPEARS_MOSAIC_SCENE_ID
+                        ) -> dict:
+    """Assembles the downloaded layers of a scene, clipped to the place `geometry`, and writes its pixels once.
+
+    `product` and `scene_id` tell apart the scenes of a date (products, tiles or
+    granules) stored as COGs.
+    """
+
+    # Raster decoding is blocking, keep it off the event loop so downloads keep flowing
+    with stage_timer("appears", "parse"):
+        scene = await asyncio.to_thread(assemble_scene, layer_paths, capture_date, place_id, geometry)
+    if scene is None:
         return {"error": "Failed to extract data"}
+    raster_pixels = scene['height'] * scene['width']
+    CLIP_RATIO.labels("appears").observe(scene['outside_pixels'] / raster_pixels)
+    PIXELS_DROPPED.labels("appears", "outside").inc(scene['outside_pixels'])
+    PIXELS_DROPPED.labels("appears", "nodata").inc(scene['nodata_pixels'])
+    PIXELS_DROPPED.labels("appears", "cloud").inc(scene['cloudy_pixels'])
+    logger.debug(f"Scene {capture_date} of place {place_id}: {scene['outside_pixels']} pixels outside the place, "
+                 f"{scene['nodata_pixels']} without data and {scene['cloudy_pixels']} cloudy of {raster_pixels}")
+    if scene['pixels'] == 0:
+        # Fully masked, nothing to store but its cloud cover still counts
+        return {"message": "No clear pixels in the scene", "rows": 0, "date": capture_date.isoformat(),
+                "observed_pixels": scene['observed_pixels'], "cloudy_pixels": scene['cloudy_pixels']}
+    with stage_timer("appears", "db_write"):
+        if cog_backend_enabled():
+            result = await store_scene_as_cog(place_id=place_id, scene=scene, db=db, product=product,
+                                              scene_id=scene_id)
+        else:
+            result = await bulk_store_scene_in_db(place_id=place_id, scene=scene, db=db)
+    return {**result, "observed_pixels": scene['observed_pixels'], "cloudy_pixels": scene['cloudy_pixels']}
 
-    for point in data_points:
-        result = await store_or_update_data_in_db(
-            place_id=place_id,
-            band=point['band'],
-            value=point['value'],
-            capture_date=point['date'],
-            latitude=point['latitude'],
-            longitude=point['longitude'],
-            db=db
-        )
-    os.remove(file_path)
-    return result
-
-async def store_or_update_data_in_db(place_id: int, 
-                                     band: str, 
-                                     value: float, 
-                                     capture_date: datetime, 
-                                     latitude: float, 
-                                     longitude: float, 
-                                     db: AsyncSession
-                                     ):
-    
-    point = WKTElement(f'POINT({longitude} {latitude})', srid=4326)
-    logger.info(f"Buscando datos existentes para el lugar {place_id} con coordenadas {point} y fecha {capture_date}")
-    statement = select(HarmonizedLandsatSentinelData).where(
-        HarmonizedLandsatSentinelData.place_id == place_id,
-        HarmonizedLandsatSentinelData.capture_date == capture_date,
-        func.ST_DWithin(HarmonizedLandsatSentinelData.location, point, 1)  # 1 meter tolerance
+async def bulk_store_scene_in_db(place_id: int, 
+                                 scene: dict, 
+                                 db: AsyncSession
+                                 ) -> dict:
+    """Stores all the pixels of a scene with a single COPY and one set-based merge.
+
+    The pixels are copied into a temporary staging table and then upserted into
+    harmonized_landsat_sentinel_data on the (place_id, capture_date, pixel_key) unique
+    index: pixels already stored are overwritten, the rest are inserted. Every band
+    column and the additional_data of a pixel are written in the same row. The monthly
+    partition of the scene is created first when missing.
+    """
+
+    table = HarmonizedLandsatSentinelData.__tablename__
+    band_columns = list(scene['columns'])
+    extra_columns = list(scene['additional_data'])
+    staging_columns = ['pixel_key', 'longitude', 'latitude'] + band_columns + extra_columns
+
+    started_at = time.perf_counter()
+    capture_date = datetime.combine(scene['date'], datetime.min.time())
+    records = zip(
+        scene['pixel_key'].tolist(),
+        scene['longitude'].tolist(),
+        scene['latitude'].tolist(),
+        *[scene['columns'][column].astype(np.float64).tolist() for column in band_columns],
+        *[scene['additional_data'][column].astype(np.float64).tolist() for column in extra_columns]
     )
-    result = await db.execute(statement)
-    record = result.scalars().first()
 
-    column_name = BAND_NAME_MAP.get(band.lower())  # Use the map to get the correct column name
+    # NaN marks a missing value in the staging table, it is stored as NULL
+    band_values = [f"NULLIF(s.{column}, 'NaN')" for column in band_columns]
+    additional_data = "jsonb_strip_nulls(jsonb_build_object({}))".format(
+        ", ".join(f"'{column}', NULLIF(s.{column}, 'NaN')" for column in extra_columns)
+    ) if extra_columns else "NULL"
 
-    if record:
-        setattr(record, column_name, value)  # Update using the mapped column name
-    else:
-        new_record_kwargs = {
-            'place_id': place_id,
-            'capture_date': capture_date,
-            'location': point,
-            column_name: value
-        }
-        new_record = HarmonizedLandsatSentinelData(**new_record_kwargs)
-        db.add(new_record)
+    await ensure_monthly_partition(db, scene['date'])
+    connection = await get_asyncpg_connection(db)
+    await connection.execute(
+        "CREATE TEMP TABLE hls_pixel_staging ("
+        + ", ".join(["pixel_key bigint"] + [f"{column} double precision" for column in staging_columns[1:]])
+        + ") ON COMMIT DROP"
+    )
+    await connection.copy_records_to_table('hls_pixel_staging', records=records, columns=staging_columns)
+    await connection.execute(f"""
+        INSERT INTO {table} (place_id, capture_date, pixel_key, location, {", ".join(band_columns)}, additional_data)
+        SELECT DISTINCT ON (s.pixel_key)
+               $1, $2, s.pixel_key, ST_SetSRID(ST_MakePoint(s.longitude, s.latitude), 4326)::geography,
+               {", ".join(band_values)}, {additional_data}
+        FROM hls_pixel_staging AS s
+        ON CONFLICT (place_id, capture_date, pixel_key) DO UPDATE
+        SET {", ".join(f"{column} = EXCLUDED.{column}" for column in band_columns)},
+            additional_data = EXCLUDED.additional_data
+    """, place_id, capture_date)
+    await db.commit()
+    tile_cache.invalidate(place_id, scene['date'])
+
+    elapsed = time.perf_counter() - started_at
+    rows = scene['pixels']
+    ROWS_WRITTEN.labels(table).inc(rows)
+    rows_per_second = rows / elapsed if elapsed > 0 else float(rows)
+    logger.info(f"Stored {rows} pixels with {len(band_columns)} bands of scene {scene['date']} for place {place_id} "
+                f"in {elapsed:.2f}s ({rows_per_second:,.0f} rows/s)")
+    return {"message": "Data processed successfully", "rows": rows, "rows_per_second": rows_per_second,
+            "date": scene['date'].isoformat()}
+
+async def store_scene_as_cog(place_id: int,
+                             scene: dict,
+                             db: AsyncSession,
+                             product: str,
+                             scene_id: str
+                             ) -> dict:
+    """Writes a scene as one COG in the store and records it in hls_scenes.
 
+    Only the metadata and footprint of the scene go to Postgres. A scene of the same
+    place, date, product and scene id replaces the previous COG and its hls_scenes row;
+    other scenes of the date are kept next to it.
+    """
+
+    started_at = time.perf_counter()
+    key = cog_store.key(place_id, scene['date'], product, scene_id)
+    written = await asyncio.to_thread(cog_store.write_scene, key, scene)
+
+    west, south, east, north = written['bounds']
+    values = {
+        "storage_key": key,
+        "footprint": f"SRID=4326;POLYGON(({west} {south}, {east} {south}, {east} {north}, {west} {north}, {west} {south}))",
+        "bands": written['bands'],
+        "width": written['width'],
+        "height": written['height'],
+        "valid_pixels": scene['pixels'],
+        "size_bytes": written['size_bytes'],
+    }
+    statement = insert(HlsScene).values(
+        place_id=place_id, capture_date=datetime.combine(scene['date'], datetime.min.time()), product=product,
+        scene_id=scene_id, **values
+    ).on_conflict_do_update(index_elements=['place_id', 'capture_date', 'product', 'scene_id'],
+                            set_={**values, "updated_at": func.now()})
+    await db.execute(statement)
     await db.commit()
-    logger.info("Data successfully processed and stored")
-    return {"message": "Data processed successfully"}
+    tile_cache.invalidate(place_id, scene['date'])
 
-def extract_info_and_coordinates_from_tif(filename: str, 
-                                          file_path: str
-                                          ):
-    """Extracts the band, date and coordinates of each pixel from a GeoTIFF file."""
-    
-    logger.info(f"Extracting band and date information from the file {filename}")
-    
-    # Extracts band and date information from the filename
-    match = re.search(r'B(\d+)_doy(\d{7})_', filename)
-    if not match:
-        logger.warning(f"Could not extract information from the file {filename}")
-        return None
-
-    band = f'b{int(match.group(1)):02}'  # Convert '1' to '01', '2' to '02', etc.
-    doy = int(match.group(2)[-3:])  # Extracts the day of the year and converts to integer
-    year = int(match.group(2)[:4])  # Extract the year
-    date = datetime.strptime(f'{year}{doy}', '%Y%j').date()  # Convert to date
-
-    data_points = []
-    
-    # Open the GeoTIFF file to read data and coordinates
-    with rasterio.open(file_path) as src:
-        # Gets the values of the first band
-        band_data = src.read(1)
-        
-        for row in range(src.height):
-            for col in range(src.width):
-                value = band_data[row, col]
-                # Gets the coordinates of the pixel
-                longitude, latitude = src.xy(row, col)
-                
-                # Stores the band, date, coordinates and value in a list
-                data_points.append({
-                    'band': band,
-                    'date': date,
-                    'latitude': latitude,
-                    'longitude': longitude,
-                    'value': value
-                })
-                
-    logger.info(f"Extracted information and coordinates for the file {filename}")
-    return data_points
-
-async def calculate_ndvi_for_place(db: AsyncSession, 
-                                   place_id: int
-                                   ):
-    """Calculate NDVI for all recent records of a place."""
-    
-    recent_records = await db.execute(
-        select(HarmonizedLandsatSentinelData)
-        .where(HarmonizedLandsatSentinelData.place_id == place_id)
-        .order_by(HarmonizedLandsatSentinelData.capture_date.desc())
+    elapsed = time.perf_counter() - started_at
+    ROWS_WRITTEN.labels(HlsScene.__tablename__).inc()
+    logger.info(f"Stored {scene['pixels']} pixels of scene {scene['date']} for place {place_id} as COG {key} "
+                f"({written['size_bytes']:,} bytes) in {elapsed:.2f}s")
+    return {"message": "Data processed successfully", "rows": scene['pixels'], "size_bytes": written['size_bytes'],
+            "date": scene['date'].isoformat()}
+
+async def refresh_place_index_stats_from_cogs(db: AsyncSession,
+                                              place_id: int,
+                                              capture_dates: list,
+                                              cloud_fractions: dict = None
+                                              ) -> int:
+    """place_index_stats of the given dates for scenes stored as COGs, computed from their index bands.
+
+    Like refresh_place_index_stats, dates without a stored scene get rows with no
+    valid pixel so their cloud cover is kept. The scenes of a date are merged first.
+    """
+
+    cloud_fractions = cloud_fractions or {}
+    capture_dates = [datetime.combine(capture_date, datetime.min.time()) for capture_date in capture_dates]
+    result = await db.execute(
+        select(HlsScene.capture_date, HlsScene.storage_key)
+        .where(HlsScene.place_id == place_id, HlsScene.capture_date.in_(capture_dates))
+        .order_by(HlsScene.id)
     )
-    records = recent_records.scalars().all()
-
-    for record in records:
-        if record.b05_nir and record.b04_red:  # Ensure both NIR and Red bands are present
-            nir = record.b05_nir
-            red = record.b04_red
-            if (nir + red) != 0:
-                ndvi = (nir - red) / (nir + red)
-                record.ndvi = ndvi  # Set the NDVI value
-
-    await db.commit()  # Commit changes after updating all records
-    logger.info(f"NDVI calculated and updated for records of place ID {place_id}.")
+    scene_keys = {}
+    for row in result.all():
+        scene_keys.setdefault(row.capture_date, []).append(row.storage_key)
+
+    stats = []
+    for capture_date in capture_dates:
+        arrays = {}
+        if capture_date in scene_keys:
+            # An index is missing from a COG when the scene lacked one of its bands, it reads as NaN
+            _, _, arrays = await asyncio.to_thread(cog_store.read_scene_points, scene_keys[capture_date],
+                                                   list(SPECTRAL_INDICES))
+        for name in SPECTRAL_INDICES:
+            values = arrays.get(name, np.empty(0, dtype=np.float32))
+            stats.append({"capture_date": capture_date, "index_name": name,
+                          "cloud_fraction": cloud_fractions.get(capture_date.date().isoformat()),
+                          **summarize_index(values)})
+    if not stats:
+        return 0
+    return await upsert_place_index_stats(db, place_id, stats)
@@ -0,0 +1,241 @@
+# app/external_apis/appears/hls_scenes.py
+import os
+import re
+import rasterio
+import threading
+import numpy as np
+from affine import Affine
+from datetime import datetime
+from collections import OrderedDict
+from rasterio.features import geometry_mask
+
+from app.config.log_config import logger
+from app.external_apis.appears.indices import compute_indices
+from app.external_apis.appears.utils_appears import BAND_NAME_MAP, ADDITIONAL_DATA_LAYERS, \
+    FMASK_NODATA, decode_fmask, fmask_masked_pixels, harmonized_layer
+
+# e.g. HLSS30.020_B8A_doy2024180_aid0001_20N.tif or HLSL30.020_Fmask_doy2024180_aid0001.tif
+HLS_FILE_PATTERN = re.compile(r'(?P<product>HLS[SL]30)\.\d+_(?P<layer>[A-Za-z0-9]+)_doy(?P<doy>\d{7})_aid(?P<aid>\d{4})'
+                              r'(?:_(?P<zone>\d{1,2}[NS]))?')
+# AppEEARS mosaics the tiles of a date into one file per feature, split by UTM zone (the
+# _20N suffix) when the feature spans several; files without a zone are the whole mosaic
+APPEARS_MOSAIC_SCENE_ID = "mosaic"
+
+PIXEL_KEY_RESOLUTION = 1e-5  # degrees
+PIXEL_KEY_LON_CELLS = 36_000_001  # Number of longitude cells between -180 and 180
+CLIP_MASK_CACHE_SIZE = int(os.getenv("CLIP_MASK_CACHE_SIZE", "256"))  # (place, raster grid) masks kept
+
+def pixel_centre_coordinates(transform: Affine, 
+                             height: int, 
+                             width: int
+                             ) -> tuple:
+    """Computes the longitude and latitude of every pixel centre from the affine transform."""
+
+    cols = np.arange(width, dtype=np.float64) + 0.5
+    rows = np.arange(height, dtype=np.float64)[:, np.newaxis] + 0.5
+    longitudes = transform.a * cols + transform.b * rows + transform.c
+    latitudes = transform.d * cols + transform.e * rows + transform.f
+    return longitudes, latitudes
+
+def pixel_keys(longitudes: np.ndarray, 
+               latitudes: np.ndarray
+               ) -> np.ndarray:
+    """Returns the integer grid key of each pixel centre.
+
+    Coordinates are quantized to PIXEL_KEY_RESOLUTION degrees (~1 m), so the same HLS
+    pixel gets the same key across tasks. The backfill of the add_pixel_key migration
+    uses the same formula in SQL.
+    """
+
+    lon_index = np.round((longitudes + 180.0) / PIXEL_KEY_RESOLUTION).astype(np.int64)
+    lat_index = np.round((latitudes + 90.0) / PIXEL_KEY_RESOLUTION).astype(np.int64)
+    return lat_index * PIXEL_KEY_LON_CELLS + lon_index
+
+class ClipMaskCache:
+    """LRU of the place polygon masks, keyed by place and raster grid.
+
+    Every scene of a place over the same AppEEARS grid reuses one mask, so the polygon
+    is only rasterized again when the grid changes. Scenes are parsed in worker
+    threads, hence the lock.
+    """
+
+    def __init__(self, max_size: int = CLIP_MASK_CACHE_SIZE):
+        self.max_size = max_size
+        self._masks = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self,
+            place_id: int,
+            geometry,
+            transform: Affine,
+            height: int,
+            width: int
+            ) -> np.ndarray:
+        """Boolean mask of the pixels whose centre falls inside the place polygon."""
+
+        key = (place_id, tuple(transform)[:6], height, width)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                return mask
+        mask = geometry_mask([geometry], out_shape=(height, width), transform=transform, invert=True)
+        mask.flags.writeable = False
+        with self._lock:
+            self._masks[key] = mask
+            while len(self._masks) > self.max_size:
+                self._masks.popitem(last=False)
+        return mask
+
+clip_mask_cache = ClipMaskCache()
+
+def parse_hls_file_name(file_name: str):
+    """Extracts the product, layer, acquisition date, feature id and scene id from an AppEEARS file name.
+
+    The layer is the harmonized one (see HLS_PRODUCT_LAYERS), so HLSL30_B05 is 'b8a';
+    None for product layers without a column. The scene id tells apart the files of
+    one date covering different UTM zones.
+    """
+
+    match = HLS_FILE_PATTERN.search(file_name)
+    if not match or not file_name.endswith('.tif'):
+        return None
+    return {
+        'product': match.group('product'),
+        'layer': harmonized_layer(match.group('product'), match.group('layer')),
+        'date': datetime.strptime(match.group('doy'), '%Y%j').date(),
+        'aid': int(match.group('aid')),
+        'scene_id': match.group('zone') or APPEARS_MOSAIC_SCENE_ID
+    }
+
+def group_files_by_scene(files: list) -> dict:
+    """Groups the GeoTIFF files of a bundle by (acquisition date, feature id, product, scene id).
+
+    Each value maps the harmonized layer name to the AppEEARS file info. HLSS30 and
+    HLSL30 scenes of the same day stay apart, their grids need not match, and so do
+    the scenes of different UTM zones.
+    """
+
+    scenes = {}
+    for file_info in files:
+        parsed = parse_hls_file_name(file_info['file_name'])
+        if not parsed:
+            continue
+        if parsed['layer'] not in BAND_NAME_MAP and parsed['layer'] not in ADDITIONAL_DATA_LAYERS:
+            logger.debug(f"Ignoring unknown layer in {file_info['file_name']}")
+            continue
+        scene_key = (parsed['date'], parsed['aid'], parsed['product'], parsed['scene_id'])
+        scenes.setdefault(scene_key, {})[parsed['layer']] = file_info
+    return scenes
+
+def screen_fmask(path: str,
+                 place_id: int = None,
+                 geometry = None
+                 ) -> dict:
+    """Decodes the Fmask layer of a scene on its own, to judge the scene before its bands are downloaded.
+
+    Counts are taken over the place polygon when `geometry` is given. The clear fraction
+    is the share of observed pixels not masked by FMASK_MASKED_FLAGS, 0 when nothing
+    was observed.
+    """
+
+    with rasterio.open(path) as src:
+        fmask = src.read(1)
+        transform, height, width = src.transform, src.height, src.width
+    observed = fmask != FMASK_NODATA
+    if geometry is not None:
+        observed &= clip_mask_cache.get(place_id, geometry, transform, height, width)
+    masked = observed & fmask_masked_pixels(fmask)
+    observed_pixels, masked_pixels = int(observed.sum()), int(masked.sum())
+    flags = decode_fmask(fmask[observed])
+    return {
+        "observed_pixels": observed_pixels,
+        "cloudy_pixels": masked_pixels,
+        "clear_fraction": (observed_pixels - masked_pixels) / observed_pixels if observed_pixels else 0.0,
+        "flag_pixels": {flag: int(values.sum()) for flag, values in flags.items() if values.dtype == bool},
+    }
+
+def assemble_scene(layer_paths: dict,
+                   capture_date,
+                   place_id: int = None,
+                   geometry = None
+                   ) -> dict:
+    """Reads every layer of a scene into one pixel-aligned stack and returns it as columns.
+
+    The result holds one entry per valid pixel: its coordinates, every spectral band
+    column (NaN where that band has no data), the spectral indices computed from them
+    and the Fmask/angle layers that go into additional_data. Pixels without any spectral value or flagged by Fmask are dropped.
+    When the place `geometry` is given, pixels of the bounding rectangle outside it are
+    dropped first, so cloud cover is measured over the place only.
+    """
+
+    grid = None
+    crs = None
+    layers = {}
+    for layer, path in layer_paths.items():
+        with rasterio.open(path) as src:
+            if grid is None:
+                grid = (src.transform, src.height, src.width)
+                crs = src.crs
+            elif (src.transform, src.height, src.width) != grid:
+                logger.error(f"Layer {layer} of scene {capture_date} is not aligned with the other layers, skipping it")
+                continue
+            data = src.read(1).astype(np.float32)
+            if src.nodata is not None:
+                data[data == src.nodata] = np.nan
+            layers[layer] = data
+
+    spectral = [layer for layer in layers if layer in BAND_NAME_MAP]
+    if not spectral:
+        logger.warning(f"Scene {capture_date} has no spectral layers")
+        return None
+
+    transform, height, width = grid
+    stack = np.stack([layers[layer] for layer in spectral])
+    valid = ~np.all(np.isnan(stack), axis=0)
+    inside_pixels = valid.size
+    if geometry is not None:
+        inside = clip_mask_cache.get(place_id, geometry, transform, height, width)
+        inside_pixels = int(inside.sum())
+        valid &= inside
+    observed_pixels, cloudy_pixels = int(valid.sum()), 0
+    if 'fmask' in layers:
+        fmask = np.nan_to_num(layers['fmask'], nan=FMASK_NODATA).astype(np.uint8)
+        valid &= fmask != FMASK_NODATA
+        observed_pixels = int(valid.sum())
+        cloudy = valid & fmask_masked_pixels(fmask)
+        cloudy_pixels = int(cloudy.sum())
+        valid &= ~cloudy
+
+    longitudes, latitudes = pixel_centre_coordinates(transform, height, width)
+    rows, cols = np.nonzero(valid)
+    columns = {BAND_NAME_MAP[layer]: stack[index][rows, cols] for index, layer in enumerate(spectral)}
+    columns.update(compute_indices(columns))
+
+    scene = {
+        'date': capture_date,
+        'longitude': longitudes[rows, cols],
+        'latitude': latitudes[rows, cols],
+        'pixel_key': pixel_keys(longitudes[rows, cols], latitudes[rows, cols]),
+        'columns': columns,
+        'additional_data': {
+            ADDITIONAL_DATA_LAYERS[layer]: layers[layer][rows, cols]
+            for layer in layers if layer in ADDITIONAL_DATA_LAYERS
+        },
+        'pixels': int(rows.size),
+        # Raster grid of the scene and position of each pixel in it, to write it back as a raster
+        'transform': transform,
+        'crs': crs,
+        'height': height,
+        'width': width,
+        'rows': rows,
+        'cols': cols,
+        # Pixels with data, and those of them masked by Fmask (cloud, cloud shadow, ... see FMASK_MASKED_FLAGS)
+        'observed_pixels': observed_pixels,
+        'cloudy_pixels': cloudy_pixels,
+        # Pixels of the rectangle outside the place polygon, and those inside it without data
+        'outside_pixels': valid.size - inside_pixels,
+        'nodata_pixels': inside_pixels - observed_pixels,
+    }
+    logger.info(f"Assembled scene {capture_date} with {len(layers)} layers and {rows.size} of {valid.size} valid pixels")
+    return scene
@@ -0,0 +1,187 @@
+# app/external_apis/appears/indices.py
+import json
+import numpy as np
+from datetime import datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.tiles.tile_cache import tile_cache
+from app.models import HarmonizedLandsatSentinelData, PlaceIndexStats
+
+HLS_REFLECTANCE_SCALE = 0.0001  # Stored reflectances are scaled integers
+
+# Each index names the band columns it reads and gives its formula over surface
+# reflectance, once with NumPy operators and once as SQL. The formulas are written
+# against the role names (red, nir, ...), which are bound to columns in `bands`. NIR is
+# b8a_nir_narrow, which also holds the HLSL30 NIR (see HLS_PRODUCT_LAYERS).
+SPECTRAL_INDICES = {
+    'ndvi': {
+        'bands': {'nir': 'b8a_nir_narrow', 'red': 'b04_red'},
+        'numpy': lambda b: (b['nir'] - b['red']) / (b['nir'] + b['red']),
+        'sql': "({nir} - {red}) / NULLIF({nir} + {red}, 0)",
+    },
+    'evi': {
+        'bands': {'nir': 'b8a_nir_narrow', 'red': 'b04_red', 'blue': 'b02_blue'},
+        'numpy': lambda b: 2.5 * (b['nir'] - b['red']) / (b['nir'] + 6 * b['red'] - 7.5 * b['blue'] + 1),
+        'sql': "2.5 * ({nir} - {red}) / NULLIF({nir} + 6 * {red} - 7.5 * {blue} + 1, 0)",
+    },
+    'ndwi': {
+        'bands': {'green': 'b03_green', 'nir': 'b8a_nir_narrow'},
+        'numpy': lambda b: (b['green'] - b['nir']) / (b['green'] + b['nir']),
+        'sql': "({green} - {nir}) / NULLIF({green} + {nir}, 0)",
+    },
+    'nbr': {
+        'bands': {'nir': 'b8a_nir_narrow', 'swir2': 'b12_swir2'},
+        'numpy': lambda b: (b['nir'] - b['swir2']) / (b['nir'] + b['swir2']),
+        'sql': "({nir} - {swir2}) / NULLIF({nir} + {swir2}, 0)",
+    },
+    'savi': {
+        'bands': {'nir': 'b8a_nir_narrow', 'red': 'b04_red'},
+        'numpy': lambda b: 1.5 * (b['nir'] - b['red']) / (b['nir'] + b['red'] + 0.5),
+        'sql': "1.5 * ({nir} - {red}) / NULLIF({nir} + {red} + 0.5, 0)",
+    },
+}
+
+def compute_indices(columns: dict) -> dict:
+    """Computes every registered index from in-memory band columns (NaN where missing).
+
+    Indices whose bands are not all present are skipped; pixels where an index is
+    undefined (missing band, zero denominator) get NaN.
+    """
+
+    indices = {}
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for name, index in SPECTRAL_INDICES.items():
+            if not all(column in columns for column in index['bands'].values()):
+                continue
+            bands = {role: columns[column].astype(np.float64) * HLS_REFLECTANCE_SCALE
+                     for role, column in index['bands'].items()}
+            values = index['numpy'](bands)
+            values[~np.isfinite(values)] = np.nan
+            indices[name] = values.astype(np.float32)
+    return indices
+
+def index_sql_expression(name: str) -> str:
+    """Returns the SQL expression of an index over the harmonized_landsat_sentinel_data columns."""
+
+    index = SPECTRAL_INDICES[name]
+    return index['sql'].format(**{
+        role: f"({column} * {HLS_REFLECTANCE_SCALE})" for role, column in index['bands'].items()
+    })
+
+def index_missing_sql(name: str) -> str:
+    """SQL condition of rows where an index can be computed but is not stored yet."""
+
+    bands = " AND ".join(f"{column} IS NOT NULL" for column in SPECTRAL_INDICES[name]['bands'].values())
+    return f"({name} IS NULL AND {bands})"
+
+def _as_datetimes(capture_dates: list) -> list:
+    return [
+        capture_date if isinstance(capture_date, datetime) else datetime.combine(capture_date, datetime.min.time())
+        for capture_date in capture_dates
+    ]
+
+async def calculate_indices_for_place(db: AsyncSession,
+                                      place_id: int,
+                                      capture_dates: list = None
+                                      ) -> int:
+    """Calculates the spectral indices of a place in one set-based UPDATE.
+
+    Only rows with an index still missing and its bands present are touched,
+    optionally restricted to the given capture dates (an empty list touches nothing),
+    and indices computed on earlier runs are kept.
+    """
+
+    if capture_dates is not None and not capture_dates:
+        return 0
+
+    table = HarmonizedLandsatSentinelData.__tablename__
+    assignments = ", ".join(f"{name} = COALESCE({name}, {index_sql_expression(name)})" for name in SPECTRAL_INDICES)
+    missing = " OR ".join(index_missing_sql(name) for name in SPECTRAL_INDICES)
+    statement = f"UPDATE {table} SET {assignments} WHERE place_id = :place_id AND ({missing})"
+    params = {"place_id": place_id}
+    if capture_dates is not None:
+        statement += " AND capture_date = ANY(:capture_dates)"
+        params["capture_dates"] = _as_datetimes(capture_dates)
+
+    result = await db.execute(text(statement), params)
+    await db.commit()
+    for capture_date in capture_dates or []:
+        tile_cache.invalidate(place_id, capture_date.date() if isinstance(capture_date, datetime) else capture_date)
+    logger.info(f"Spectral indices calculated for {result.rowcount} records of place ID {place_id}.")
+    return result.rowcount
+
+async def refresh_place_index_stats(db: AsyncSession,
+                                    place_id: int,
+                                    capture_dates: list,
+                                    cloud_fractions: dict = None
+                                    ) -> int:
+    """Recomputes the place_index_stats rows of a place for the given capture dates.
+
+    Every index is summarized in one pass over the pixels of those dates. Dates with
+    no clear pixel still get rows (valid_pixels 0), so their cloud cover is kept.
+    `cloud_fractions` maps ISO dates to the masked share of the observed pixels.
+    """
+
+    stats_table = PlaceIndexStats.__tablename__
+    pixels_table = HarmonizedLandsatSentinelData.__tablename__
+    index_values = ", ".join(f"('{name}', h.{name})" for name in SPECTRAL_INDICES)
+    result = await db.execute(text(f"""
+        INSERT INTO {stats_table} (place_id, capture_date, index_name, mean, median, p10, p90, valid_pixels,
+                                   cloud_fraction)
+        SELECT :place_id, d.capture_date, v.index_name,
+               avg(v.value),
+               percentile_cont(0.5) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.1) WITHIN GROUP (ORDER BY v.value),
+               percentile_cont(0.9) WITHIN GROUP (ORDER BY v.value),
+               count(v.value),
+               (CAST(:cloud_fractions AS jsonb) ->> to_char(d.capture_date, 'YYYY-MM-DD'))::float
+        FROM unnest(CAST(:capture_dates AS timestamp[])) AS d(capture_date)
+        LEFT JOIN {pixels_table} AS h ON h.place_id = :place_id AND h.capture_date = d.capture_date
+        CROSS JOIN LATERAL (VALUES {index_values}) AS v(index_name, value)
+        GROUP BY d.capture_date, v.index_name
+        ON CONFLICT (place_id, capture_date, index_name) DO UPDATE
+        SET mean = EXCLUDED.mean, median = EXCLUDED.median, p10 = EXCLUDED.p10, p90 = EXCLUDED.p90,
+            valid_pixels = EXCLUDED.valid_pixels,
+            cloud_fraction = COALESCE(EXCLUDED.cloud_fraction, {stats_table}.cloud_fraction),
+            updated_at = now()
+    """), {"place_id": place_id, "capture_dates": _as_datetimes(capture_dates),
+           "cloud_fractions": json.dumps(cloud_fractions or {})})
+    await db.commit()
+    logger.info(f"Index stats refreshed for {len(capture_dates)} dates of place ID {place_id}.")
+    return result.rowcount
+
+def summarize_index(values: np.ndarray) -> dict:
+    """Mean, median, p10, p90 and count of the defined values, as refresh_place_index_stats computes them in SQL."""
+
+    values = values[np.isfinite(values)].astype(np.float64)
+    if not values.size:
+        return {"mean": None, "median": None, "p10": None, "p90": None, "valid_pixels": 0}
+    p10, median, p90 = np.percentile(values, [10, 50, 90])
+    return {"mean": float(values.mean()), "median": float(median), "p10": float(p10), "p90": float(p90),
+            "valid_pixels": int(values.size)}
+
+async def upsert_place_index_stats(db: AsyncSession,
+                                   place_id: int,
+                                   stats: list
+                                   ) -> int:
+    """Writes place_index_stats rows computed outside the database, e.g. from COGs.
+
+    Each item holds capture_date, index_name, cloud_fraction and the keys of summarize_index.
+    """
+
+    stats_table = PlaceIndexStats.__tablename__
+    await db.execute(text(f"""
+        INSERT INTO {stats_table} (place_id, capture_date, index_name, mean, median, p10, p90, valid_pixels,
+                                   cloud_fraction)
+        VALUES (:place_id, :capture_date, :index_name, :mean, :median, :p10, :p90, :valid_pixels, :cloud_fraction)
+        ON CONFLICT (place_id, capture_date, index_name) DO UPDATE
+        SET mean = EXCLUDED.mean, median = EXCLUDED.median, p10 = EXCLUDED.p10, p90 = EXCLUDED.p90,
+            valid_pixels = EXCLUDED.valid_pixels,
+            cloud_fraction = COALESCE(EXCLUDED.cloud_fraction, {stats_table}.cloud_fraction),
+            updated_at = now()
+    """), [{"place_id": place_id, **row} for row in stats])
+    await db.commit()
+    logger.info(f"Index stats stored for {len({row['capture_date'] for row in stats})} dates of place ID {place_id}.")
+    return len(stats)
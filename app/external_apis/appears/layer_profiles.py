@@ -0,0 +1,51 @@
+# app/external_apis/appears/layer_profiles.py
+import os
+
+from app.external_apis.appears.indices import SPECTRAL_INDICES
+from app.external_apis.appears.utils_appears import BAND_NAME_MAP, HLS_PRODUCT_LAYERS, HLS_VERSION
+
+# HLS products ingested, their scenes are merged into one time series per place
+HLS_PRODUCTS = [product.strip() for product in os.getenv("HLS_PRODUCTS", "HLSS30,HLSL30").split(",") if product.strip()]
+# Indices computed at ingest; only the bands they read are requested, e.g. "ndvi" only needs red, NIR and Fmask
+HLS_INGEST_INDICES = [index.strip() for index in
+                      os.getenv("HLS_INGEST_INDICES", ",".join(SPECTRAL_INDICES)).split(",") if index.strip()]
+# Layers requested on top of the profile, e.g. "SAA,SZA,VAA,VZA" to keep the angles in additional_data
+HLS_EXTRA_LAYERS = [layer.strip() for layer in os.getenv("HLS_EXTRA_LAYERS", "").split(",") if layer.strip()]
+
+def check_names(setting: str, names: list, valid_names):
+    """Raises a ValueError listing the accepted names when a setting holds an unknown one, so a typo fails at startup."""
+
+    unknown = [name for name in names if name not in valid_names]
+    if unknown:
+        raise ValueError(f"Unknown names in {setting}: {', '.join(unknown)}. Valid names: {', '.join(valid_names)}")
+
+check_names("HLS_PRODUCTS", HLS_PRODUCTS, HLS_PRODUCT_LAYERS)
+check_names("HLS_INGEST_INDICES", HLS_INGEST_INDICES, SPECTRAL_INDICES)
+
+def product_index_layers(product: str) -> dict:
+    """Index -> product layers holding its bands, from the band columns of SPECTRAL_INDICES."""
+
+    column_layers = {BAND_NAME_MAP[harmonized]: layer for layer, harmonized in HLS_PRODUCT_LAYERS[product].items()
+                     if harmonized in BAND_NAME_MAP}
+    return {name: sorted(column_layers[column] for column in index['bands'].values())
+            for name, index in SPECTRAL_INDICES.items()}
+
+# Product -> index -> layers, e.g. LAYER_PROFILES['HLSL30']['ndvi'] == ['B04', 'B05']
+LAYER_PROFILES = {product: product_index_layers(product) for product in HLS_PRODUCT_LAYERS}
+
+def layer_profile(product: str,
+                  indices: list = HLS_INGEST_INDICES,
+                  extra_layers: list = HLS_EXTRA_LAYERS
+                  ) -> list:
+    """Minimal layers of a product for the given indices: Fmask first, then their bands and any extra layers."""
+
+    layers = {layer for index in indices for layer in LAYER_PROFILES[product][index]}
+    layers.update(layer for layer in extra_layers if layer in HLS_PRODUCT_LAYERS[product])
+    return ['Fmask', *sorted(layers - {'Fmask'})]
+
+def appears_product_id(product: str) -> str:
+    major, minor = HLS_VERSION.split('.')
+    return f"{product}.{int(major):02d}{minor}"
+
+def stac_collection(product: str) -> str:
+    return f"{product}_{HLS_VERSION}"
@@ -1,4 +1,9 @@
 # app/external_apis/appears/utils_appears.py
+import os
+import numpy as np
+
+# Harmonized layer -> band column. Layers are named after the HLSS30 bands; b05-b07 only hold
+# Sentinel-2 red edge pixels stored before the product layer map below, no product maps to them now
 BAND_NAME_MAP = {
     'b01': 'b01_coastal_aerosol',
     'b02': 'b02_blue',
@@ -12,10 +17,73 @@ BAND_NAME_MAP = {
     'b09': 'b09_water_vapor',
     'b10': 'b10_cirrus',
     'b11': 'b11_swir1',
-    'b12': 'b12_swir2',
-    'fmask': 'fmask_quality_bits',
+    'b12': 'b12_swir2'
+}
+
+# Quality and angle layers have no column of their own, they are stored in additional_data
+ADDITIONAL_DATA_LAYERS = {
+    'fmask': 'fmask',
     'saa': 'saa_sun_azimuth',
     'sza': 'sza_sun_zenith',
     'vaa': 'vaa_view_azimuth',
     'vza': 'vza_view_zenith'
-}
\ No newline at end of file
+}
+
+# Layers of each HLS product -> harmonized layer they are stored as. HLS adjusts the Landsat bands
+# to the Sentinel-2 bandpasses, so the HLSL30 NIR (B05) and SWIR (B06, B07) go with the HLSS30 B8A,
+# B11 and B12, and both products make one time series. Red edge (HLSS30 B05-B07) and thermal
+# (HLSL30 B10, B11) bands have no column.
+HLS_QUALITY_LAYERS = {'Fmask': 'fmask', 'SAA': 'saa', 'SZA': 'sza', 'VAA': 'vaa', 'VZA': 'vza'}
+HLS_PRODUCT_LAYERS = {
+    'HLSS30': {
+        'B01': 'b01', 'B02': 'b02', 'B03': 'b03', 'B04': 'b04', 'B08': 'b08', 'B8A': 'b8a', 'B09': 'b09',
+        'B10': 'b10', 'B11': 'b11', 'B12': 'b12', **HLS_QUALITY_LAYERS
+    },
+    'HLSL30': {
+        'B01': 'b01', 'B02': 'b02', 'B03': 'b03', 'B04': 'b04', 'B05': 'b8a', 'B06': 'b11', 'B07': 'b12',
+        'B09': 'b10', **HLS_QUALITY_LAYERS
+    },
+}
+HLS_VERSION = '2.0'  # "HLSS30.020" in AppEEARS, "HLSS30_2.0" in CMR-STAC
+
+def harmonized_layer(product: str, layer: str):
+    """Harmonized layer of a product layer (case insensitive), None for layers without a column."""
+
+    product_layers = {name.lower(): harmonized for name, harmonized in HLS_PRODUCT_LAYERS.get(product, {}).items()}
+    return product_layers.get(layer.lower())
+
+# Fmask bits (HLS v2.0): 0 = cirrus (reserved), 1 = cloud, 2 = adjacent to cloud/shadow, 3 = cloud shadow,
+# 4 = snow/ice, 5 = water, 6-7 = aerosol level (0 climatology, 1 low, 2 moderate, 3 high)
+FMASK_FLAG_BITS = {
+    'cloud': 1,
+    'adjacent_cloud': 2,
+    'cloud_shadow': 3,
+    'snow_ice': 4,
+    'water': 5
+}
+FMASK_AEROSOL_SHIFT = 6
+FMASK_HIGH_AEROSOL = 3
+FMASK_NODATA = 255
+
+# Flags that make a pixel unusable, from FMASK_FLAG_BITS plus 'high_aerosol'
+FMASK_MASKED_FLAGS = [flag.strip() for flag in
+                      os.getenv("FMASK_MASKED_FLAGS", "cloud,adjacent_cloud,cloud_shadow").split(",") if flag.strip()]
+FMASK_MASKED_BITS = sum(1 << FMASK_FLAG_BITS[flag] for flag in FMASK_MASKED_FLAGS if flag in FMASK_FLAG_BITS)
+# Scenes with a smaller share of clear pixels over the place are skipped before their bands are downloaded
+FMASK_MIN_CLEAR_FRACTION = float(os.getenv("FMASK_MIN_CLEAR_FRACTION", "0.2"))
+
+def decode_fmask(fmask: np.ndarray) -> dict:
+    """Boolean arrays of every Fmask flag, plus the 2 bit aerosol level, with vectorized bit operations."""
+
+    flags = {flag: (fmask >> bit) & 1 == 1 for flag, bit in FMASK_FLAG_BITS.items()}
+    flags['aerosol_level'] = (fmask >> FMASK_AEROSOL_SHIFT) & 0b11
+    flags['high_aerosol'] = flags['aerosol_level'] == FMASK_HIGH_AEROSOL
+    return flags
+
+def fmask_masked_pixels(fmask: np.ndarray) -> np.ndarray:
+    """Pixels flagged with any of FMASK_MASKED_FLAGS; nodata is left to the caller."""
+
+    masked = (fmask & FMASK_MASKED_BITS) != 0
+    if 'high_aerosol' in FMASK_MASKED_FLAGS:
+        masked |= (fmask >> FMASK_AEROSOL_SHIFT) & 0b11 == FMASK_HIGH_AEROSOL
+    return masked
@@ -0,0 +1,205 @@
+# app/external_apis/clients.py
+import os
+import time
+import random
+import asyncio
+import aiohttp
+from datetime import datetime, timedelta, timezone
+
+from app.config.log_config import logger
+from app.metrics.prometheus import EXTERNAL_API_SECONDS
+
+APPEARS_API_URL = os.getenv("APPEARS_API_URL", "https://appeears.earthdatacloud.nasa.gov/api")
+FIRMS_API_URL = os.getenv("FIRMS_API_URL", "https://firms.modaps.eosdis.nasa.gov/api")
+CMR_STAC_URL = os.getenv("CMR_STAC_URL", "https://cmr.earthdata.nasa.gov/stac/LPCLOUD")
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class APIError(Exception):
+    """Raised when an external API keeps failing after all the retries."""
+
+    def __init__(self, message: str, status: int = None):
+        super().__init__(message)
+        self.status = status
+
+class AsyncAPIClient:
+    """Base client with one pooled aiohttp session, timeouts and retries with backoff.
+
+    Requests answered with 429 or 5xx, and connection errors, are retried up to
+    `max_retries` times with exponential backoff and jitter, honouring Retry-After.
+    Any other status is returned to the caller as is. Every attempt is timed in
+    climatech_external_api_seconds under the client `name`.
+    """
+
+    name = "api"
+
+    def __init__(self,
+                 base_url: str,
+                 pool_size: int = 16,
+                 timeout: float = 60,
+                 max_retries: int = 4,
+                 backoff: float = 1.0
+                 ):
+        self.base_url = base_url.rstrip('/')
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._session = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # The session has to be created inside the running event loop
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            timeout = aiohttp.ClientTimeout(total=self.timeout, sock_connect=30)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _retry_delay(self, attempt: int, retry_after: str = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+        return self.backoff * 2 ** (attempt - 1) + random.uniform(0, self.backoff)
+
+    def _observe(self, method: str, status, started_at: float):
+        EXTERNAL_API_SECONDS.labels(self.name, method, status).observe(time.perf_counter() - started_at)
+
+    async def request(self,
+                      method: str,
+                      path: str,
+                      response_type: str = 'json',
+                      **kwargs
+                      ) -> tuple:
+        """Sends a request and returns (status, body), body parsed as JSON or text."""
+
+        url = path if path.startswith('http') else f"{self.base_url}/{path.lstrip('/')}"
+        for attempt in range(1, self.max_retries + 2):
+            started_at = time.perf_counter()
+            try:
+                async with self.session.request(method, url, **kwargs) as response:
+                    if response.status in RETRY_STATUSES and attempt <= self.max_retries:
+                        self._observe(method, response.status, started_at)
+                        delay = self._retry_delay(attempt, response.headers.get('Retry-After'))
+                        logger.warning(f"{method} {url} returned HTTP {response.status}, retrying in {delay:.1f}s")
+                        await asyncio.sleep(delay)
+                        continue
+                    if response_type == 'json' and response.content_type == 'application/json':
+                        body = await response.json()
+                    else:
+                        body = await response.text()
+                    self._observe(method, response.status, started_at)
+                    return response.status, body
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._observe(method, "error", started_at)
+                if attempt > self.max_retries:
+                    raise APIError(f"{method} {url} failed after {attempt} attempts: {e}") from e
+                delay = self._retry_delay(attempt)
+                logger.warning(f"{method} {url} failed ({e!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+class AppEEARSClient(AsyncAPIClient):
+    """AppEEARS API client that logs in once and reuses the token until it expires."""
+
+    name = "appears"
+    TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+    def __init__(self, base_url: str = APPEARS_API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+        self._token = None
+        self._token_expires_at = None
+        self._login_lock = None
+
+    def _credentials(self) -> aiohttp.BasicAuth:
+        username, password = os.getenv("APPEARS_USER"), os.getenv("APPEARS_PASS")
+        if not username or not password:
+            raise APIError("APPEARS_USER and APPEARS_PASS must be set")
+        return aiohttp.BasicAuth(username, password)
+
+    async def get_token(self) -> str:
+        """Returns a valid bearer token, logging in only when the cached one is about to expire."""
+
+        if self._login_lock is None:
+            self._login_lock = asyncio.Lock()
+        async with self._login_lock:
+            now = datetime.now(timezone.utc)
+            if self._token and self._token_expires_at - self.TOKEN_REFRESH_MARGIN > now:
+                return self._token
+
+            status, body = await self.request("POST", "login", auth=self._credentials(), headers={"Content-Length": "0"})
+            if status != 200:
+                logger.error(f"AppEEARS authentication failed: HTTP {status}")
+                raise APIError("Authentication failed", status=status)
+
+            self._token = body['token']
+            expiration = body.get('expiration')
+            self._token_expires_at = datetime.fromisoformat(expiration.replace('Z', '+00:00')) if expiration \
+                else now + timedelta(hours=1)
+            logger.info(f"Logged in to AppEEARS, token valid until {self._token_expires_at.isoformat()}")
+            return self._token
+
+    async def authorized_request(self, method: str, path: str, **kwargs) -> tuple:
+        extra_headers = kwargs.pop('headers', {})
+        headers = {**extra_headers, "Authorization": f"Bearer {await self.get_token()}"}
+        status, body = await self.request(method, path, headers=headers, **kwargs)
+        if status == 401:
+            # The token was revoked or expired early, log in again once
+            self._token = None
+            headers = {**extra_headers, "Authorization": f"Bearer {await self.get_token()}"}
+            status, body = await self.request(method, path, headers=headers, **kwargs)
+        return status, body
+
+    async def submit_task(self, task_params: dict) -> tuple:
+        return await self.authorized_request("POST", "task", json=task_params)
+
+    async def task_status(self, task_id: str) -> tuple:
+        return await self.authorized_request("GET", f"task/{task_id}")
+
+    async def all_task_statuses(self) -> tuple:
+        """Status of every task of the account in a single call."""
+        return await self.authorized_request("GET", "status")
+
+    async def list_bundle_files(self, task_id: str) -> tuple:
+        return await self.authorized_request("GET", f"bundle/{task_id}")
+
+    async def product_info(self, product_id: str) -> tuple:
+        return await self.request("GET", f"product/{product_id}")
+
+    async def s3_credentials(self) -> tuple:
+        return await self.request("POST", "s3credentials", auth=self._credentials(), headers={"Content-Length": "0"})
+
+class FIRMSClient(AsyncAPIClient):
+    """NASA FIRMS API client."""
+
+    name = "firms"
+
+    def __init__(self, base_url: str = FIRMS_API_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    async def country_csv(self, satellite: str, country: str, days: int) -> tuple:
+        map_key = os.getenv("FIRMS_MAP_KEY")
+        return await self.request("GET", f"country/csv/{map_key}/{satellite}/{country}/{days}", response_type='text')
+
+class CMRSTACClient(AsyncAPIClient):
+    """NASA CMR-STAC client, to search HLS granules without going through AppEEARS."""
+
+    name = "cmr_stac"
+
+    def __init__(self, base_url: str = CMR_STAC_URL, **kwargs):
+        super().__init__(base_url, **kwargs)
+
+    async def search(self, body: dict) -> tuple:
+        return await self.request("POST", "search", json=body)
+
+    async def next_page(self, link: dict) -> tuple:
+        """Follows the `next` link of a search page, POSTing its body when it has one."""
+        if link.get('method', 'GET').upper() == 'POST':
+            return await self.request("POST", link['href'], json=link.get('body', {}))
+        return await self.request("GET", link['href'])
+
+appears_client = AppEEARSClient()
+firms_client = FIRMSClient(timeout=300)
+cmr_stac_client = CMRSTACClient()
@@ -0,0 +1,55 @@
+# app/external_apis/firms/place_fire_events.py
+import os
+from datetime import date, datetime
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.metrics.prometheus import ROWS_WRITTEN
+from app.models import Place, WildFireData, PlaceFireEvent
+
+PLACE_FIRE_BUFFER_METERS = float(os.getenv("PLACE_FIRE_BUFFER_METERS", "5000"))
+
+async def match_detections_to_places(db: AsyncSession,
+                                     first_id: int,
+                                     last_id: int,
+                                     buffer_meters: float = PLACE_FIRE_BUFFER_METERS
+                                     ) -> int:
+    """Records which of the detections with ids in [first_id, last_id] fall near a place.
+
+    Only the new detections are joined, through the GIST index on places.location,
+    so the cost follows new detections times nearby places.
+    """
+
+    result = await db.execute(text(f"""
+        INSERT INTO {PlaceFireEvent.__tablename__} (place_id, wildfire_id, acq_date, distance_m)
+        SELECT p.id, w.id, w.acq_date, ST_Distance(p.location, w.location)
+        FROM {WildFireData.__tablename__} AS w
+        JOIN {Place.__tablename__} AS p ON ST_DWithin(p.location, w.location, :buffer_meters)
+        WHERE w.id BETWEEN :first_id AND :last_id
+        ON CONFLICT (place_id, wildfire_id) DO NOTHING
+    """), {"first_id": first_id, "last_id": last_id, "buffer_meters": buffer_meters})
+    await db.commit()
+    ROWS_WRITTEN.labels(PlaceFireEvent.__tablename__).inc(result.rowcount)
+    logger.info(f"Matched {result.rowcount} place fire events for detections {first_id}-{last_id}")
+    return result.rowcount
+
+async def match_place_to_detections(db: AsyncSession,
+                                    place_id: int,
+                                    since: date,
+                                    buffer_meters: float = PLACE_FIRE_BUFFER_METERS
+                                    ) -> int:
+    """Records the detections since a date near a newly added place."""
+
+    result = await db.execute(text(f"""
+        INSERT INTO {PlaceFireEvent.__tablename__} (place_id, wildfire_id, acq_date, distance_m)
+        SELECT p.id, w.id, w.acq_date, ST_Distance(p.location, w.location)
+        FROM {Place.__tablename__} AS p
+        JOIN {WildFireData.__tablename__} AS w ON ST_DWithin(p.location, w.location, :buffer_meters)
+        WHERE p.id = :place_id AND w.acq_date >= :since
+        ON CONFLICT (place_id, wildfire_id) DO NOTHING
+    """), {"place_id": place_id, "since": datetime.combine(since, datetime.min.time()),
+           "buffer_meters": buffer_meters})
+    await db.commit()
+    logger.info(f"Matched {result.rowcount} past fire events for place {place_id}")
+    return result.rowcount
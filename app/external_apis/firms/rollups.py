@@ -0,0 +1,54 @@
+# app/external_apis/firms/rollups.py
+from datetime import date, datetime
+from sqlalchemy import Date, Integer, SmallInteger, func, cast, literal, literal_column, delete
+from sqlalchemy.future import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.metrics.prometheus import ROWS_WRITTEN
+from app.models import WildFireData, WildfireDailyCell
+from app.external_apis.firms.wildfires import CONFIDENCE_LEVEL
+
+# Cell size in degrees of each grid level; a level covers two zoom levels, starting at zoom 3,
+# so a cell stays roughly 30-60 px wide on screen
+CLUSTER_GRID_SIZES = [2.0, 0.5, 0.125, 0.03125]
+CLUSTER_FIRST_ZOOM = 3
+
+def grid_level_for_zoom(zoom: int) -> int:
+    return max(0, min(len(CLUSTER_GRID_SIZES) - 1, (zoom - CLUSTER_FIRST_ZOOM) // 2))
+
+async def refresh_daily_cells(db: AsyncSession, since: date) -> int:
+    """Rebuilds the grid rollups of every day from `since` on, for all grid levels.
+
+    Only the days touched by the last sync are recomputed, so the cost follows the
+    new detections rather than the size of wildfire_data.
+    """
+
+    since_datetime = datetime.combine(since, datetime.min.time())
+    await db.execute(delete(WildfireDailyCell).where(WildfireDailyCell.acq_date >= since))
+
+    rows = 0
+    for level, size in enumerate(CLUSTER_GRID_SIZES):
+        # Inlined, so the grouped expressions are identical to the selected ones
+        cell_size = literal_column(repr(size))
+        cell_x = cast(func.floor(WildFireData.longitude / cell_size), Integer)
+        cell_y = cast(func.floor(WildFireData.latitude / cell_size), Integer)
+        acq_date = cast(WildFireData.acq_date, Date)
+        cells = (
+            select(literal(level, SmallInteger), acq_date, WildFireData.satellite, cell_x, cell_y,
+                   func.count(), func.max(WildFireData.frp), cast(func.max(CONFIDENCE_LEVEL), SmallInteger),
+                   func.sum(WildFireData.latitude), func.sum(WildFireData.longitude))
+            .where(WildFireData.acq_date >= since_datetime, WildFireData.satellite.isnot(None))
+            .group_by(acq_date, WildFireData.satellite, cell_x, cell_y)
+        )
+        result = await db.execute(insert(WildfireDailyCell).from_select(
+            ['grid_level', 'acq_date', 'satellite', 'cell_x', 'cell_y', 'count', 'max_frp', 'max_confidence',
+             'sum_latitude', 'sum_longitude'],
+            cells
+        ))
+        rows += result.rowcount
+    await db.commit()
+    ROWS_WRITTEN.labels(WildfireDailyCell.__tablename__).inc(rows)
+    logger.info(f"Rebuilt {rows} wildfire grid cells since {since}")
+    return rows
@@ -0,0 +1,165 @@
+# app/external_apis/firms/wildfires.py
+import io
+import time
+import numpy as np
+import pandas as pd
+from typing import Iterator
+from datetime import date
+from sqlalchemy import Integer, func, case, cast
+from sqlalchemy.future import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+
+from app.config.log_config import logger
+from app.external_apis.clients import firms_client
+from app.metrics.prometheus import stage_timer, INGEST_STAGE_SECONDS, ROWS_WRITTEN
+from app.models import WildFireData, FirmsSyncState
+from app.database.database import get_asyncpg_connection
+
+FIRMS_CHUNK_SIZE = 50_000  # CSV rows parsed and copied at a time
+FIRMS_MAX_DAYS = 10  # Longest window the FIRMS area and country APIs accept
+
+# VIIRS reports the I-4 and I-5 brightness temperatures, stored in the MODIS columns
+FIRMS_COLUMN_ALIASES = {'bright_ti4': 'brightness', 'bright_ti5': 'bright_t31'}
+FIRMS_FLOAT_COLUMNS = ['latitude', 'longitude', 'brightness', 'scan', 'track', 'bright_t31', 'frp']
+FIRMS_TEXT_COLUMNS = ['acq_time', 'satellite', 'confidence', 'version', 'daynight']
+FIRMS_COLUMNS = FIRMS_FLOAT_COLUMNS + ['acq_date'] + FIRMS_TEXT_COLUMNS
+
+# MODIS reports confidence as 0-100, VIIRS as low/nominal/high
+CONFIDENCE_LEVELS = {'low': 1, 'nominal': 2, 'high': 3}
+CONFIDENCE_LEVEL = case(
+    (WildFireData.confidence.in_(['h', 'high']), 3),
+    (WildFireData.confidence.in_(['n', 'nominal']), 2),
+    (WildFireData.confidence.in_(['l', 'low']), 1),
+    (WildFireData.confidence.op('~')('^[0-9]+$'), case(
+        (cast(WildFireData.confidence, Integer) >= 80, 3),
+        (cast(WildFireData.confidence, Integer) >= 30, 2),
+        else_=1
+    )),
+    else_=0
+)
+
+def iter_firms_chunks(csv_text: str, chunk_size: int = FIRMS_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Parses a FIRMS CSV (MODIS or VIIRS) in chunks of typed columns.
+
+    Column positions are resolved once from the header; columns missing from the
+    product come back empty. Text columns are read as strings so values such as
+    acq_time '0042' or version '2.0NRT' are kept as sent.
+    """
+
+    reader = pd.read_csv(io.StringIO(csv_text), chunksize=chunk_size,
+                         dtype={column: str for column in FIRMS_TEXT_COLUMNS})
+    for chunk in reader:
+        chunk = chunk.rename(columns=FIRMS_COLUMN_ALIASES).reindex(columns=FIRMS_COLUMNS)
+        chunk[FIRMS_FLOAT_COLUMNS] = chunk[FIRMS_FLOAT_COLUMNS].astype(np.float64)
+        chunk['acq_date'] = pd.to_datetime(chunk['acq_date'], format='%Y-%m-%d')
+        yield chunk
+
+def firms_records(chunk: pd.DataFrame) -> Iterator[tuple]:
+    """Rows of a parsed chunk as plain Python tuples, in FIRMS_COLUMNS order, ready for COPY."""
+
+    columns = [chunk[column].tolist() for column in FIRMS_FLOAT_COLUMNS]
+    # Missing dates and texts are sent as None
+    columns += [chunk[column].astype(object).where(chunk[column].notna(), None).tolist()
+                for column in FIRMS_COLUMNS[len(FIRMS_FLOAT_COLUMNS):]]
+    return zip(*columns)
+
+async def store_firms_csv(csv_text: str,
+                          db: AsyncSession,
+                          chunk_size: int = FIRMS_CHUNK_SIZE
+                          ) -> dict:
+    """Parses a FIRMS CSV chunk by chunk into a staging table and inserts it in one statement.
+
+    Each parsed chunk is streamed to a temporary table with COPY, then a single
+    INSERT ... SELECT builds the locations and writes the detections to wildfire_data.
+    Detections already stored are skipped on the uq_wildfire_detection key, so
+    overlapping windows can be synced again safely.
+    """
+
+    table = WildFireData.__tablename__
+    started_at = time.perf_counter()
+    connection = await get_asyncpg_connection(db)
+    await connection.execute(
+        "CREATE TEMP TABLE firms_staging ("
+        + ", ".join([f"{column} double precision" for column in FIRMS_FLOAT_COLUMNS]
+                    + ["acq_date timestamp"]
+                    + [f"{column} text" for column in FIRMS_TEXT_COLUMNS])
+        + ") ON COMMIT DROP"
+    )
+
+    rows = 0
+    parse_time = 0.0
+    parse_started_at = time.perf_counter()
+    for chunk in iter_firms_chunks(csv_text, chunk_size):
+        parse_time += time.perf_counter() - parse_started_at
+        await connection.copy_records_to_table('firms_staging', records=firms_records(chunk), columns=FIRMS_COLUMNS)
+        rows += len(chunk)
+        parse_started_at = time.perf_counter()
+
+    # NaN marks a missing number in the staging table, it is stored as NULL
+    values = [f"NULLIF({column}, 'NaN')" for column in FIRMS_FLOAT_COLUMNS] + FIRMS_COLUMNS[len(FIRMS_FLOAT_COLUMNS):]
+    first_acq_date, last_acq_date = await connection.fetchrow("SELECT min(acq_date), max(acq_date) FROM firms_staging")
+    # The id range of the new detections lets later stages process only those
+    inserted, first_id, last_id = await connection.fetchrow(f"""
+        WITH inserted AS (
+            INSERT INTO {table} ({", ".join(FIRMS_COLUMNS)}, location)
+            SELECT {", ".join(values)}, ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography
+            FROM firms_staging
+            WHERE NULLIF(latitude, 'NaN') IS NOT NULL AND NULLIF(longitude, 'NaN') IS NOT NULL
+              AND satellite IS NOT NULL AND acq_date IS NOT NULL AND acq_time IS NOT NULL
+            ON CONFLICT (satellite, acq_date, acq_time, latitude, longitude) DO NOTHING
+            RETURNING id
+        )
+        SELECT count(*), min(id), max(id) FROM inserted
+    """)
+    await db.commit()
+
+    elapsed = time.perf_counter() - started_at
+    INGEST_STAGE_SECONDS.labels("firms", "parse").observe(parse_time)
+    INGEST_STAGE_SECONDS.labels("firms", "db_write").observe(elapsed - parse_time)
+    ROWS_WRITTEN.labels(table).inc(inserted)
+    logger.info(f"Stored {inserted} of {rows} FIRMS detections in {elapsed:.2f}s "
+                f"(parse {rows / parse_time if parse_time > 0 else rows:,.0f} rows/s, "
+                f"total {rows / elapsed if elapsed > 0 else rows:,.0f} rows/s)")
+    return {"message": "Wildfire data stored successfully", "rows": rows, "inserted": inserted,
+            "first_id": first_id, "last_id": last_id,
+            "first_acq_date": first_acq_date.date() if first_acq_date else None,
+            "last_acq_date": last_acq_date.date() if last_acq_date else None}
+
+async def sync_firms(source: str,
+                     country: str,
+                     db: AsyncSession,
+                     days: int = FIRMS_MAX_DAYS
+                     ) -> dict:
+    """Fetches and stores the FIRMS detections of a source and country newer than its watermark.
+
+    The window starts on the last acquisition date already received (detections of
+    that day may still have been arriving) and is never longer than `days`. The
+    watermark only moves forward.
+    """
+
+    watermark = (await db.execute(
+        select(FirmsSyncState.last_acq_date)
+        .where(FirmsSyncState.source == source, FirmsSyncState.country == country)
+    )).scalar()
+    if watermark:
+        days = max(1, min(days, (date.today() - watermark).days + 1))
+    days = min(days, FIRMS_MAX_DAYS)
+
+    logger.info(f"Syncing FIRMS {source} detections for {country} over the past {days} days.")
+    with stage_timer("firms", "fetch"):
+        status, body = await firms_client.country_csv(satellite=source, country=country, days=days)
+    if status != 200:
+        logger.error(f"Failed to fetch FIRMS data for {source} {country}: {status} {body}")
+        return {"error": f"FIRMS returned HTTP {status}", "status_code": status}
+
+    result = await store_firms_csv(body, db)
+    last_acq_date = max(filter(None, [watermark, result["last_acq_date"]]), default=None)
+    await db.execute(
+        insert(FirmsSyncState)
+        .values(source=source, country=country, last_acq_date=last_acq_date)
+        .on_conflict_do_update(index_elements=['source', 'country'],
+                               set_={"last_acq_date": last_acq_date, "synced_at": func.now()})
+    )
+    await db.commit()
+    return {**result, "days": days, "last_acq_date": last_acq_date}
@@ -0,0 +1,286 @@
+# app/external_apis/hls_s3/cog_reader.py
+import os
+import math
+import asyncio
+import threading
+import rasterio
+import numpy as np
+from affine import Affine
+from collections import OrderedDict
+from urllib.parse import urlparse
+from datetime import datetime, timedelta, timezone
+from rasterio.io import MemoryFile
+from rasterio.session import AWSSession
+from rasterio.enums import Resampling
+from rasterio.windows import Window, from_bounds
+from rasterio.warp import transform_bounds, calculate_default_transform, reproject
+
+from app.config.log_config import logger
+from app.external_apis.clients import APIError
+from app.external_apis.appears.auth import get_aws_credentials
+from app.metrics.prometheus import TILE_CACHE_REQUESTS
+
+# Empty reads from AWS S3; a URL like http://127.0.0.1:9000 points at an S3 compatible store (MinIO, moto)
+HLS_S3_ENDPOINT = os.getenv("HLS_S3_ENDPOINT", "")
+# LP DAAC buckets live in us-west-2, direct reads only work from there
+HLS_S3_REGION = os.getenv("HLS_S3_REGION", "us-west-2")
+HLS_TILE_CACHE_SIZE = int(os.getenv("HLS_TILE_CACHE_SIZE", "1024"))  # COG blocks, 128 KiB each for int16 bands
+
+# Only the header and the blocks of the window are fetched, with range requests. GDAL's
+# own cache of /vsis3 files is off: TileCache keeps the blocks, and GDAL would keep the
+# state of a read refused with expired credentials, failing the retry with new ones.
+GDAL_OPTIONS = {
+    "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+    "CPL_VSIL_CURL_ALLOWED_EXTENSIONS": ".tif",
+    "GDAL_INGESTED_BYTES_AT_OPEN": "32768",
+    "GDAL_HTTP_MERGE_CONSECUTIVE_RANGES": "YES",
+    "GDAL_HTTP_MULTIPLEX": "YES",
+    "GDAL_HTTP_MAX_RETRY": "3",
+    "GDAL_HTTP_RETRY_DELAY": "1",
+    "CPL_VSIL_CURL_NON_CACHED": "/vsis3/",
+}
+
+class S3Credentials:
+    """Temporary S3 credentials from get_aws_credentials, refreshed shortly before they expire."""
+
+    REFRESH_MARGIN = timedelta(minutes=5)
+
+    def __init__(self):
+        self._credentials = None
+        self._expires_at = None
+        self._lock = None
+
+    async def get(self) -> dict:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            now = datetime.now(timezone.utc)
+            if self._credentials and self._expires_at - self.REFRESH_MARGIN > now:
+                return self._credentials
+
+            credentials = await get_aws_credentials()
+            if credentials.get("error"):
+                raise APIError(credentials["error"])
+            expiration = credentials.get('expiration')
+            expires_at = datetime.fromisoformat(expiration.replace('Z', '+00:00')) if expiration \
+                else now + timedelta(hours=1)
+            self._credentials = credentials
+            self._expires_at = expires_at if expires_at.tzinfo else expires_at.replace(tzinfo=timezone.utc)
+            logger.info(f"Obtained S3 credentials valid until {self._expires_at.isoformat()}")
+            return self._credentials
+
+    def invalidate(self):
+        """Drops the cached credentials, for reads refused before their expiration."""
+        self._credentials = None
+
+class TileCache:
+    """LRU of decoded COG blocks keyed by (href, block row, block col), with the header of each file.
+
+    A file whose header and blocks are all cached is read without any request, so
+    overlapping places and repeated reads of a granule only fetch new blocks.
+    Reads run in worker threads, hence the lock.
+    """
+
+    def __init__(self, max_size: int = HLS_TILE_CACHE_SIZE):
+        self.max_size = max_size
+        self._blocks = OrderedDict()
+        self._headers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, entries: OrderedDict, key):
+        with self._lock:
+            value = entries.get(key)
+            if value is not None:
+                entries.move_to_end(key)
+            return value
+
+    def _put(self, entries: OrderedDict, key, value):
+        with self._lock:
+            entries[key] = value
+            entries.move_to_end(key)
+            while len(entries) > self.max_size:
+                entries.popitem(last=False)
+
+    def header(self, href: str) -> dict:
+        return self._get(self._headers, href)
+
+    def put_header(self, href: str, header: dict):
+        self._put(self._headers, href, header)
+
+    def block(self, href: str, row: int, col: int) -> np.ndarray:
+        block = self._get(self._blocks, (href, row, col))
+        TILE_CACHE_REQUESTS.labels("hit" if block is not None else "miss").inc()
+        return block
+
+    def put_block(self, href: str, row: int, col: int, block: np.ndarray):
+        block.flags.writeable = False
+        self._put(self._blocks, (href, row, col), block)
+
+class HlsCogReader:
+    """Windowed reads of HLS Cloud-Optimized GeoTIFFs straight from S3 through GDAL's /vsis3.
+
+    Only the blocks covering the requested window are fetched, and kept in a TileCache.
+    Windows are warped from the granule's UTM grid to a geographic grid, like the
+    AppEEARS output, so the scenes go through the same parsing as AppEEARS files.
+    The read methods are blocking, run them in a thread.
+    """
+
+    def __init__(self,
+                 endpoint: str = HLS_S3_ENDPOINT,
+                 region: str = HLS_S3_REGION,
+                 cache: TileCache = None
+                 ):
+        self.endpoint = endpoint
+        self.region = region
+        self.cache = cache or TileCache()
+
+    def gdal_env(self, credentials: dict) -> rasterio.Env:
+        """GDAL environment signing the S3 requests with the temporary credentials."""
+
+        endpoint_url, options = None, dict(GDAL_OPTIONS)
+        if self.endpoint:
+            url = urlparse(self.endpoint)
+            endpoint_url = url.netloc + url.path.rstrip('/')
+            options.update({"AWS_HTTPS": "YES" if url.scheme == "https" else "NO", "AWS_VIRTUAL_HOSTING": "FALSE"})
+        session = AWSSession(
+            aws_access_key_id=credentials['accessKeyId'],
+            aws_secret_access_key=credentials['secretAccessKey'],
+            aws_session_token=credentials['sessionToken'],
+            region_name=self.region,
+            endpoint_url=endpoint_url
+        )
+        return rasterio.Env(session=session, **options)
+
+    @staticmethod
+    def gdal_path(href: str) -> str:
+        url = urlparse(href)
+        return f"/vsis3/{url.netloc}{url.path}"
+
+    def _open(self, href: str):
+        src = rasterio.open(self.gdal_path(href))
+        self.cache.put_header(href, {
+            'crs': src.crs,
+            'transform': src.transform,
+            'height': src.height,
+            'width': src.width,
+            'block_shape': src.block_shapes[0],
+            'nodata': src.nodata,
+            'dtype': src.dtypes[0],
+        })
+        return src
+
+    def read_window(self, href: str, bounds: tuple) -> dict:
+        """Pixels of the first band within lon/lat `bounds` (west, south, east, north), on the file's grid.
+
+        The window is assembled from whole blocks, cached ones first; the missing ones
+        are fetched in a single read of their bounding window. Returns None when the
+        bounds are outside the file.
+        """
+
+        src = None
+        try:
+            header = self.cache.header(href)
+            if header is None:
+                src = self._open(href)
+                header = self.cache.header(href)
+            window = from_bounds(*transform_bounds('EPSG:4326', header['crs'], *bounds),
+                                 transform=header['transform'])
+            row_start, col_start = max(math.floor(window.row_off), 0), max(math.floor(window.col_off), 0)
+            row_stop = min(math.ceil(window.row_off + window.height), header['height'])
+            col_stop = min(math.ceil(window.col_off + window.width), header['width'])
+            if row_stop <= row_start or col_stop <= col_start:
+                return None
+
+            block_height, block_width = header['block_shape']
+            block_rows = range(row_start // block_height, (row_stop - 1) // block_height + 1)
+            block_cols = range(col_start // block_width, (col_stop - 1) // block_width + 1)
+            blocks = {(row, col): self.cache.block(href, row, col) for row in block_rows for col in block_cols}
+            missing = [key for key, block in blocks.items() if block is None]
+            if missing:
+                rows, cols = [row for row, _ in missing], [col for _, col in missing]
+                top, left = min(rows) * block_height, min(cols) * block_width
+                bottom = min((max(rows) + 1) * block_height, header['height'])
+                right = min((max(cols) + 1) * block_width, header['width'])
+                src = src or rasterio.open(self.gdal_path(href))
+                data = src.read(1, window=Window(left, top, right - left, bottom - top))
+                for row in range(min(rows), max(rows) + 1):
+                    for col in range(min(cols), max(cols) + 1):
+                        block = data[row * block_height - top:(row + 1) * block_height - top,
+                                     col * block_width - left:(col + 1) * block_width - left].copy()
+                        self.cache.put_block(href, row, col, block)
+                        if (row, col) in blocks:
+                            blocks[(row, col)] = block
+        finally:
+            if src is not None:
+                src.close()
+
+        mosaic_top, mosaic_left = block_rows[0] * block_height, block_cols[0] * block_width
+        mosaic = np.empty((row_stop - mosaic_top, col_stop - mosaic_left), dtype=header['dtype'])
+        for (row, col), block in blocks.items():
+            top, left = row * block_height - mosaic_top, col * block_width - mosaic_left
+            block = block[:mosaic.shape[0] - top, :mosaic.shape[1] - left]
+            mosaic[top:top + block.shape[0], left:left + block.shape[1]] = block
+        return {
+            'data': mosaic[row_start - mosaic_top:, col_start - mosaic_left:],
+            'transform': header['transform'] * Affine.translation(col_start, row_start),
+            'crs': header['crs'],
+            'nodata': header['nodata'],
+        }
+
+    def read_layers(self,
+                    hrefs: dict,
+                    bounds: tuple,
+                    credentials: dict,
+                    grid: tuple = None
+                    ) -> tuple:
+        """Reads the `bounds` window of each layer of a granule and warps it onto one geographic grid.
+
+        Returns ({layer: MemoryFile}, grid), grid being (transform, height, width). Pass
+        the grid back to read more layers of the same granule aligned with the first ones.
+        Layers outside the bounds are left out.
+        """
+
+        files = {}
+        with self.gdal_env(credentials):
+            for layer, href in hrefs.items():
+                window = self.read_window(href, bounds)
+                if window is None:
+                    continue
+                height, width = window['data'].shape
+                if grid is None:
+                    west, north = window['transform'] * (0, 0)
+                    east, south = window['transform'] * (width, height)
+                    transform, out_width, out_height = calculate_default_transform(
+                        window['crs'], 'EPSG:4326', width, height, west, south, east, north
+                    )
+                    grid = (transform, out_height, out_width)
+                transform, out_height, out_width = grid
+                nodata = window['nodata']
+                data = np.full((out_height, out_width), nodata if nodata is not None else 0, dtype=window['data'].dtype)
+                reproject(window['data'], data, src_transform=window['transform'], src_crs=window['crs'],
+                          src_nodata=nodata, dst_transform=transform, dst_crs='EPSG:4326', dst_nodata=nodata,
+                          resampling=Resampling.nearest)
+                files[layer] = memory_layer(data, transform, nodata)
+        logger.debug(f"Read {len(files)} of {len(hrefs)} layers over {bounds}")
+        return files, grid
+
+def memory_layer(data: np.ndarray, transform: Affine, nodata) -> MemoryFile:
+    """Single band GeoTIFF in memory; rasterio.open(memory_file.name) reads it like a downloaded file."""
+
+    memory_file = MemoryFile()
+    profile = {
+        'driver': 'GTiff',
+        'height': data.shape[0],
+        'width': data.shape[1],
+        'count': 1,
+        'dtype': data.dtype.name,
+        'crs': 'EPSG:4326',
+        'transform': transform,
+        'nodata': nodata,
+    }
+    with memory_file.open(**profile) as dataset:
+        dataset.write(data, 1)
+    return memory_file
+
+s3_credentials = S3Credentials()
+hls_cog_reader = HlsCogReader()
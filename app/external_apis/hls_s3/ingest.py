@@ -0,0 +1,115 @@
+# app/external_apis/hls_s3/ingest.py
+import os
+import asyncio
+from datetime import date
+from shapely.geometry import mapping
+from geoalchemy2.shape import to_shape
+from rasterio.errors import RasterioIOError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.metrics.prometheus import stage_timer, SCENES_SCREENED
+from app.external_apis.appears.hls_scenes import screen_fmask
+from app.external_apis.appears.utils_appears import FMASK_MIN_CLEAR_FRACTION
+from app.external_apis.appears.harmonized_landsat_sentinel_data import process_scene, summarize_scene_results
+from app.external_apis.hls_s3.stac import search_hls_granules
+from app.external_apis.hls_s3.cog_reader import HlsCogReader, hls_cog_reader, s3_credentials
+
+# "appears" runs every place through AppEEARS tasks, "s3" reads the granules straight from LP DAAC's bucket
+HLS_SOURCE = os.getenv("HLS_SOURCE", "appears")
+HLS_S3_READ_CONCURRENCY = int(os.getenv("HLS_S3_READ_CONCURRENCY", "4"))  # Granules read at the same time
+
+def s3_source_enabled() -> bool:
+    return HLS_SOURCE == "s3"
+
+async def read_layers(reader: HlsCogReader, hrefs: dict, bounds: tuple, grid: tuple = None) -> tuple:
+    """HlsCogReader.read_layers off the event loop, retrying once with fresh credentials when a read is refused."""
+
+    try:
+        return await asyncio.to_thread(reader.read_layers, hrefs, bounds, await s3_credentials.get(), grid)
+    except RasterioIOError as e:
+        logger.warning(f"S3 read failed ({e}), retrying with new credentials")
+        s3_credentials.invalidate()
+        return await asyncio.to_thread(reader.read_layers, hrefs, bounds, await s3_credentials.get(), grid)
+
+async def read_granule(granule: dict,
+                       place_id: int,
+                       geometry,
+                       reader: HlsCogReader = hls_cog_reader
+                       ) -> tuple:
+    """Reads the window of the place from every layer of a granule, Fmask first.
+
+    Returns (files, skipped_result): the MemoryFile of each layer, or the result of
+    a scene skipped by the Fmask screening, whose other layers are never read.
+    """
+
+    bounds = geometry.bounds
+    hrefs = dict(granule['assets'])
+    files, grid = {}, None
+    if 'fmask' in hrefs:
+        with stage_timer("hls_s3", "read"):
+            files, grid = await read_layers(reader, {'fmask': hrefs.pop('fmask')}, bounds)
+        if not files:
+            return {}, None
+        with stage_timer("hls_s3", "screen"):
+            screening = await asyncio.to_thread(screen_fmask, files['fmask'].name, place_id, geometry)
+        if screening['clear_fraction'] < FMASK_MIN_CLEAR_FRACTION:
+            SCENES_SCREENED.labels("hls_s3", "skipped").inc()
+            logger.info(f"Skipping granule {granule['id']} of place {place_id}: {screening['clear_fraction']:.0%} clear")
+            files['fmask'].close()
+            return {}, {"message": "Scene skipped by the Fmask screening", "rows": 0,
+                        "date": granule['date'].isoformat(), "skipped": True,
+                        "observed_pixels": screening['observed_pixels'],
+                        "cloudy_pixels": screening['cloudy_pixels']}
+        SCENES_SCREENED.labels("hls_s3", "kept").inc()
+    with stage_timer("hls_s3", "read"):
+        band_files, _ = await read_layers(reader, hrefs, bounds, grid)
+    return {**files, **band_files}, None
+
+async def fetch_and_store_hls_data_direct(places: list,
+                                          start_date: date,
+                                          end_date: date,
+                                          db: AsyncSession,
+                                          reader: HlsCogReader = hls_cog_reader
+                                          ) -> dict:
+    """Finds the HLS granules of each place with CMR-STAC and stores the window of the place, granule by granule.
+
+    `places` is a list of (place_id, location). Granules are read concurrently and
+    written one at a time through process_scene, like the scenes of an AppEEARS task.
+    The result has the same shape as download_and_process_task_files.
+    """
+
+    read_slots = asyncio.Semaphore(HLS_S3_READ_CONCURRENCY)
+    write_lock = asyncio.Lock()
+    results = {place_id: [] for place_id, _ in places}
+
+    async def ingest_granule(granule: dict, place_id: int, geometry):
+        async with read_slots:
+            files, skipped = await read_granule(granule, place_id, geometry, reader)
+        if skipped:
+            results[place_id].append(skipped)
+            return
+        if not files:
+            return
+        try:
+            async with write_lock:
+                results[place_id].append(await process_scene(
+                    {layer: memory_file.name for layer, memory_file in files.items()},
+                    granule['date'], place_id, db, geometry=geometry, product=granule['product'],
+                    scene_id=granule['id']
+                ))
+        finally:
+            for memory_file in files.values():
+                memory_file.close()
+
+    for place_id, location in places:
+        geometry = to_shape(location)
+        with stage_timer("hls_s3", "search"):
+            granules = await search_hls_granules(mapping(geometry), start_date, end_date)
+        await asyncio.gather(*[ingest_granule(granule, place_id, geometry) for granule in granules])
+
+    summaries = {place_id: summarize_scene_results(place_results) for place_id, place_results in results.items()}
+    return {"message": "All granules processed successfully",
+            "scenes": sum(summary["scenes"] for summary in summaries.values()),
+            "rows": sum(summary["rows"] for summary in summaries.values()),
+            "places": summaries}
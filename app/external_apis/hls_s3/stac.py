@@ -0,0 +1,71 @@
+# app/external_apis/hls_s3/stac.py
+import os
+from datetime import date, datetime
+from urllib.parse import urlparse
+
+from app.config.log_config import logger
+from app.external_apis.clients import cmr_stac_client, APIError
+from app.external_apis.appears.layer_profiles import HLS_PRODUCTS, layer_profile, stac_collection
+from app.external_apis.appears.utils_appears import BAND_NAME_MAP, ADDITIONAL_DATA_LAYERS, HLS_PRODUCT_LAYERS, \
+    harmonized_layer
+
+# CMR-STAC collections searched for granules, those of the ingested products by default
+HLS_STAC_COLLECTIONS = [collection.strip() for collection in os.getenv(
+    "HLS_STAC_COLLECTIONS", ",".join(stac_collection(product) for product in HLS_PRODUCTS)
+).split(",") if collection.strip()]
+STAC_PAGE_SIZE = 100
+
+def asset_s3_href(asset: dict) -> str:
+    """s3:// href of a STAC asset.
+
+    LP DAAC assets are published as https links to the protected bucket, with the
+    s3 location as an alternate; without it the bucket is the first path element.
+    """
+
+    href = asset.get('alternate', {}).get('s3', {}).get('href') or asset['href']
+    if href.startswith('s3://'):
+        return href
+    return f"s3:/{urlparse(href).path}"
+
+def granule_from_item(item: dict) -> dict:
+    """Id, product, capture date and the s3 href of each layer of the product's layer_profile in a STAC item.
+
+    Layers are keyed by their harmonized name, as for the AppEEARS files (b04, b8a, fmask, ...).
+    """
+
+    product = item['collection'].split('_')[0]
+    capture_date = datetime.fromisoformat(item['properties']['datetime'].replace('Z', '+00:00')).date()
+    profile = {layer.lower() for layer in layer_profile(product)} if product in HLS_PRODUCT_LAYERS else set()
+    assets = {}
+    for name, asset in item.get('assets', {}).items():
+        layer = harmonized_layer(product, name)
+        if name.lower() in profile and (layer in BAND_NAME_MAP or layer in ADDITIONAL_DATA_LAYERS):
+            assets[layer] = asset_s3_href(asset)
+    return {"id": item['id'], "product": product, "date": capture_date, "assets": assets}
+
+async def search_hls_granules(geometry: dict,
+                              start_date: date,
+                              end_date: date,
+                              collections: list = HLS_STAC_COLLECTIONS
+                              ) -> list:
+    """HLS granules intersecting a GeoJSON geometry between two dates (both included), oldest first."""
+
+    body = {
+        "collections": collections,
+        "intersects": geometry,
+        "datetime": f"{start_date.isoformat()}T00:00:00Z/{end_date.isoformat()}T23:59:59Z",
+        "limit": STAC_PAGE_SIZE
+    }
+    status, page = await cmr_stac_client.search(body)
+    granules = []
+    while True:
+        if status != 200:
+            raise APIError(f"CMR-STAC search failed: HTTP {status}", status=status)
+        granules.extend(granule_from_item(item) for item in page.get('features', []))
+        next_link = next((link for link in page.get('links', []) if link.get('rel') == 'next'), None)
+        if next_link is None or not page.get('features'):
+            break
+        status, page = await cmr_stac_client.next_page(next_link)
+
+    logger.info(f"Found {len(granules)} HLS granules in {collections} ({start_date} - {end_date})")
+    return sorted(granules, key=lambda granule: (granule['date'], granule['id']))
@@ -0,0 +1,344 @@
+# app/jobs/appears_jobs.py
+import os
+import asyncio
+from datetime import date, timedelta
+from sqlalchemy import update, func, and_
+from sqlalchemy.future import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config.log_config import logger
+from app.database.database import ingest_session
+from app.metrics.prometheus import stage_timer, INGEST_STAGE_SECONDS
+from app.external_apis.clients import appears_client, APIError
+from app.models import Place
+from app.models.appears_job import AppearsJob, JOB_QUEUED, JOB_SUBMITTING, JOB_SUBMITTED, JOB_INGESTING, JOB_DONE, \
+    JOB_FAILED, ACTIVE_JOB_STATUSES
+from app.external_apis.appears.indices import calculate_indices_for_place, refresh_place_index_stats
+from app.external_apis.appears.harmonized_landsat_sentinel_data import submit_hls_task, \
+    list_task_files, download_and_process_task_files, refresh_place_index_stats_from_cogs
+from app.external_apis.hls_s3.ingest import s3_source_enabled, fetch_and_store_hls_data_direct
+from app.storage.cog_store import cog_backend_enabled
+
+JOB_POLL_INTERVAL = int(os.getenv("APPEARS_JOB_POLL_INTERVAL", "60"))  # seconds
+JOB_INGEST_CONCURRENCY = int(os.getenv("APPEARS_JOB_INGEST_CONCURRENCY", "2"))
+NDVI_WINDOW_DAYS = 7
+# Queued jobs of the same date window are submitted together, one feature per place, up to these limits
+APPEARS_BATCH_MAX_FEATURES = int(os.getenv("APPEARS_BATCH_MAX_FEATURES", "100"))
+APPEARS_BATCH_MAX_AREA_KM2 = float(os.getenv("APPEARS_BATCH_MAX_AREA_KM2", "5000"))
+# Claimed jobs still not submitted after this long belong to a worker that died, they are queued again
+JOB_CLAIM_TIMEOUT = int(os.getenv("APPEARS_JOB_CLAIM_TIMEOUT", "900"))  # seconds
+# Same for jobs still ingesting, downloading and storing a large task takes longer than submitting it
+JOB_INGEST_CLAIM_TIMEOUT = int(os.getenv("APPEARS_JOB_INGEST_CLAIM_TIMEOUT", "7200"))  # seconds
+
+async def get_or_create_ndvi_job(place_id: int,
+                                 db: AsyncSession,
+                                 start_date: date = None,
+                                 end_date: date = None,
+                                 wake_up_worker: bool = True
+                                 ) -> tuple:
+    """Returns (job, created). Requests for a window that already has an active job join it.
+
+    Callers queueing many jobs pass wake_up_worker=False and wake the worker once at the
+    end, so the jobs are submitted together.
+    """
+
+    end_date = end_date or date.today()
+    start_date = start_date or end_date - timedelta(days=NDVI_WINDOW_DAYS)
+
+    statement = select(AppearsJob).where(
+        AppearsJob.place_id == place_id,
+        AppearsJob.start_date == start_date,
+        AppearsJob.end_date == end_date,
+        AppearsJob.status.in_(ACTIVE_JOB_STATUSES)
+    )
+    job = (await db.execute(statement)).scalars().first()
+    if job:
+        logger.info(f"Joining active job {job.id} for place {place_id} ({start_date} - {end_date})")
+        return job, False
+
+    job = AppearsJob(place_id=place_id, start_date=start_date, end_date=end_date, status=JOB_QUEUED)
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent request created the same job first
+        await db.rollback()
+        return (await db.execute(statement)).scalars().first(), False
+    await db.refresh(job)
+    logger.info(f"Created job {job.id} for place {place_id} ({start_date} - {end_date})")
+    if wake_up_worker:
+        appears_job_worker.wake_up()
+    return job, True
+
+def batch_jobs(jobs: list,
+               max_features: int = APPEARS_BATCH_MAX_FEATURES,
+               max_area_km2: float = APPEARS_BATCH_MAX_AREA_KM2
+               ) -> list:
+    """Packs queued jobs into AppEEARS task batches.
+
+    Jobs only share a task with jobs of the same date window, since a task has one
+    date range. Batches are filled in order until the next job would exceed the
+    feature count or the total area; a place larger than the area limit goes alone.
+    """
+
+    batches = []
+    windows = {}
+    for job in jobs:
+        windows.setdefault((job.start_date, job.end_date), []).append(job)
+    for window_jobs in windows.values():
+        batch, area = [], 0.0
+        for job in window_jobs:
+            if batch and (len(batch) >= max_features or area + job.area_km2 > max_area_km2):
+                batches.append(batch)
+                batch, area = [], 0.0
+            batch.append(job)
+            area += job.area_km2
+        batches.append(batch)
+    return batches
+
+class AppearsJobWorker:
+    """Background worker that drives AppEEARS jobs from submission to ingest.
+
+    One loop submits queued jobs, batching many places into each AppEEARS task, and
+    polls every submitted task with a single status call, then hands finished tasks
+    to a bounded pool of ingest coroutines. Each task is ingested once for all of its
+    jobs. With HLS_SOURCE=s3 batches skip AppEEARS and go straight to ingest, reading
+    the granules from S3.
+    """
+
+    def __init__(self,
+                 poll_interval: int = JOB_POLL_INTERVAL,
+                 ingest_concurrency: int = JOB_INGEST_CONCURRENCY
+                 ):
+        self.poll_interval = poll_interval
+        self.ingest_concurrency = ingest_concurrency
+        self._loop_task = None
+        self._ingest_tasks = {}
+        self._wake_up = None
+        self._ingest_slots = None
+
+    async def start(self):
+        self._wake_up = asyncio.Event()
+        self._ingest_slots = asyncio.Semaphore(self.ingest_concurrency)
+        # Jobs left behind by a restart are released by the first iteration, once their claim expires
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info("AppEEARS job worker started")
+
+    async def stop(self):
+        tasks = [task for task in [self._loop_task, *self._ingest_tasks.values()] if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def wake_up(self):
+        if self._wake_up is not None:
+            self._wake_up.set()
+
+    async def _run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.exception(f"AppEEARS job worker iteration failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake_up.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake_up.clear()
+
+    async def run_once(self):
+        async with ingest_session() as db:
+            await self.release_expired_claims(db)
+            await self.submit_queued_jobs(db)
+            await self.poll_submitted_jobs(db)
+
+    async def release_expired_claims(self, db: AsyncSession):
+        """Hands the jobs claimed by a worker that died back to the queue or to the poll.
+
+        Claims only expire with age, so jobs another live worker is submitting or ingesting
+        stay with it. Ingests picked up again are idempotent thanks to the upsert; direct S3
+        ingests have no AppEEARS task, they are queued again.
+        """
+
+        expired_ingest = and_(
+            AppearsJob.status == JOB_INGESTING,
+            AppearsJob.updated_at < func.now() - timedelta(seconds=JOB_INGEST_CLAIM_TIMEOUT)
+        )
+        await db.execute(
+            update(AppearsJob).where(expired_ingest, AppearsJob.task_id.is_(None)).values(status=JOB_QUEUED)
+        )
+        await db.execute(update(AppearsJob).where(expired_ingest).values(status=JOB_SUBMITTED))
+        await db.execute(
+            update(AppearsJob).where(
+                AppearsJob.status == JOB_SUBMITTING,
+                AppearsJob.updated_at < func.now() - timedelta(seconds=JOB_CLAIM_TIMEOUT)
+            ).values(status=JOB_QUEUED)
+        )
+        await db.commit()
+
+    async def claim_queued_jobs(self, db: AsyncSession) -> list:
+        """Moves the queued jobs to 'submitting' and returns their ids.
+
+        Rows locked by another worker's claim are skipped, so each job is claimed, and
+        submitted, by a single worker.
+        """
+
+        queued = select(AppearsJob.id).where(AppearsJob.status == JOB_QUEUED) \
+            .order_by(AppearsJob.id).with_for_update(skip_locked=True)
+        job_ids = (await db.execute(
+            update(AppearsJob).where(AppearsJob.id.in_(queued.scalar_subquery()))
+            .values(status=JOB_SUBMITTING).returning(AppearsJob.id)
+        )).scalars().all()
+        await db.commit()
+        return job_ids
+
+    async def claim_submitted_jobs(self, db: AsyncSession, task_id: str) -> set:
+        """Moves the submitted jobs of a finished task to 'ingesting' and returns the ids claimed.
+
+        The task's advisory lock keeps two workers from splitting its jobs, and like
+        claim_queued_jobs rows claimed by another worker are skipped, so each task is
+        downloaded and ingested by a single worker.
+        """
+
+        locked = (await db.execute(select(func.pg_try_advisory_xact_lock(func.hashtext(task_id))))).scalar()
+        if not locked:
+            await db.commit()
+            return set()
+        submitted = select(AppearsJob.id).where(AppearsJob.task_id == task_id, AppearsJob.status == JOB_SUBMITTED) \
+            .with_for_update(skip_locked=True)
+        claimed = (await db.execute(
+            update(AppearsJob).where(AppearsJob.status == JOB_SUBMITTED, AppearsJob.id.in_(submitted.scalar_subquery()))
+            .values(status=JOB_INGESTING).returning(AppearsJob.id)
+        )).scalars().all()
+        await db.commit()
+        return set(claimed)
+
+    async def submit_queued_jobs(self, db: AsyncSession):
+        job_ids = await self.claim_queued_jobs(db)
+        if not job_ids:
+            return
+        jobs = (await db.execute(
+            select(AppearsJob.id, AppearsJob.place_id, AppearsJob.start_date, AppearsJob.end_date, Place.location,
+                   (func.ST_Area(Place.location) / 1e6).label('area_km2'))
+            .join(Place, Place.id == AppearsJob.place_id)
+            .where(AppearsJob.id.in_(job_ids))
+            .order_by(AppearsJob.id)
+        )).all()
+        for batch in batch_jobs(jobs):
+            if s3_source_enabled():
+                # No task to wait for, the granules are read from S3 right away
+                await self._update_jobs(db, [job.id for job in batch], status=JOB_INGESTING)
+                task_key = f"s3-{batch[0].id}"
+                self._ingest_tasks[task_key] = asyncio.create_task(self._ingest(task_key, batch))
+                continue
+            try:
+                response = await submit_hls_task(
+                    places=[(job.place_id, job.location) for job in batch],
+                    start_date=batch[0].start_date, end_date=batch[0].end_date
+                )
+            except APIError as e:
+                response = {"error": str(e)}
+            if response.get("error"):
+                await self._update_jobs(db, [job.id for job in batch], status=JOB_FAILED, error=response["error"])
+                continue
+            # Features are numbered from 1 in the order the places were given
+            for feature_id, job in enumerate(batch, start=1):
+                await db.execute(
+                    update(AppearsJob).where(AppearsJob.id == job.id)
+                    .values(status=JOB_SUBMITTED, task_id=response["task_id"], feature_id=feature_id)
+                )
+            await db.commit()
+            logger.info(f"Submitted {len(batch)} jobs in task {response['task_id']}")
+
+    async def poll_submitted_jobs(self, db: AsyncSession):
+        jobs = (await db.execute(
+            select(AppearsJob.id, AppearsJob.task_id, AppearsJob.place_id, AppearsJob.feature_id,
+                   # Measured by the database, updated_at is a naive timestamp of its clock
+                   func.extract('epoch', func.localtimestamp() - AppearsJob.updated_at).label('waited_seconds'))
+            .where(AppearsJob.status == JOB_SUBMITTED, AppearsJob.task_id.notin_(list(self._ingest_tasks)))
+        )).all()
+        if not jobs:
+            return
+
+        status, statuses = await appears_client.all_task_statuses()
+        if status != 200:
+            logger.error(f"Could not poll AppEEARS task statuses: HTTP {status}")
+            return
+        task_statuses = {task['task_id']: task.get('status') for task in statuses}
+        tasks = {}
+        for job in jobs:
+            tasks.setdefault(job.task_id, []).append(job)
+        logger.info(f"Polled {len(tasks)} tasks of {len(jobs)} submitted jobs in one call")
+
+        for task_id, task_jobs in tasks.items():
+            task_status = task_statuses.get(task_id)
+            job_ids = [job.id for job in task_jobs]
+            if task_status == 'done':
+                claimed = await self.claim_submitted_jobs(db, task_id)
+                task_jobs = [job for job in task_jobs if job.id in claimed]
+                if not task_jobs:
+                    continue
+                # updated_at was last set when the task was submitted; the wait runs from
+                # the earliest updated_at of the task's jobs
+                INGEST_STAGE_SECONDS.labels("appears", "poll_wait").observe(
+                    float(max(job.waited_seconds for job in task_jobs))
+                )
+                self._ingest_tasks[task_id] = asyncio.create_task(self._ingest(task_id, task_jobs))
+            elif task_status in ('error', 'expired', 'deleted'):
+                await self._update_jobs(db, job_ids, status=JOB_FAILED, error=f"AppEEARS task {task_status}")
+
+    async def _update_jobs(self, db: AsyncSession, job_ids: list, **values):
+        await db.execute(update(AppearsJob).where(AppearsJob.id.in_(job_ids)).values(**values))
+        await db.commit()
+
+    async def _ingest(self, task_id: str, jobs: list):
+        try:
+            async with self._ingest_slots, ingest_session() as db:
+                try:
+                    if task_id.startswith("s3-"):
+                        result = await fetch_and_store_hls_data_direct(
+                            places=[(job.place_id, job.location) for job in jobs],
+                            start_date=jobs[0].start_date, end_date=jobs[0].end_date, db=db
+                        )
+                    else:
+                        files = await list_task_files(task_id=task_id)
+                        result = await download_and_process_task_files(
+                            task_id=task_id, files=files, places={job.feature_id: job.place_id for job in jobs},
+                            db=db
+                        )
+                except Exception as e:
+                    logger.exception(f"Ingest of task {task_id} failed: {e}")
+                    await db.rollback()
+                    await self._update_jobs(db, [job.id for job in jobs], status=JOB_FAILED, error=str(e))
+                    return
+
+                for job in jobs:
+                    place_result = result["places"][job.place_id]
+                    try:
+                        await self._refresh_indices(db, job.place_id, place_result)
+                        values = {"status": JOB_DONE, "result": place_result}
+                    except Exception as e:
+                        logger.exception(f"Indices of job {job.id} failed: {e}")
+                        await db.rollback()
+                        values = {"status": JOB_FAILED, "error": str(e)}
+                    await self._update_jobs(db, [job.id], **values)
+                    logger.info(f"Job {job.id} finished with status {values['status']}")
+        finally:
+            self._ingest_tasks.pop(task_id, None)
+
+    async def _refresh_indices(self, db: AsyncSession, place_id: int, result: dict):
+        # Indices are computed at ingest, this only fills rows of those dates still missing them
+        capture_dates = [date.fromisoformat(capture_date) for capture_date in result["dates"]]
+        with stage_timer("appears", "indices"):
+            if cog_backend_enabled():
+                # The index bands are already in the COGs, only their stats are left
+                await refresh_place_index_stats_from_cogs(db=db, place_id=place_id, capture_dates=capture_dates,
+                                                          cloud_fractions=result["cloud_fractions"])
+            else:
+                await calculate_indices_for_place(db=db, place_id=place_id, capture_dates=capture_dates)
+                if capture_dates:
+                    await refresh_place_index_stats(db=db, place_id=place_id, capture_dates=capture_dates,
+                                                    cloud_fractions=result["cloud_fractions"])
+
+appears_job_worker = AppearsJobWorker()
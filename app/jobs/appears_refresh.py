@@ -0,0 +1,79 @@
+# app/jobs/appears_refresh.py
+import os
+import asyncio
+from sqlalchemy.future import select
+from datetime import date, datetime, timedelta
+
+from app.models import Place
+from app.config.log_config import logger
+from app.database.database import ingest_session
+from app.jobs.appears_jobs import appears_job_worker, get_or_create_ndvi_job
+
+# Hours of the day (local time, like a cron hour field) when every place is refreshed; empty disables it
+APPEARS_REFRESH_HOURS = [int(hour) for hour in os.getenv("APPEARS_REFRESH_HOURS", "3").split(",") if hour.strip()]
+# Days covered by each refresh; HLS scenes show up in AppEEARS a few days after acquisition
+APPEARS_REFRESH_WINDOW_DAYS = int(os.getenv("APPEARS_REFRESH_WINDOW_DAYS", "5"))
+
+def next_run_at(hours: list, now: datetime) -> datetime:
+    """First of the given hours of the day strictly after `now`."""
+
+    for days in (0, 1):
+        day = now.date() + timedelta(days=days)
+        for hour in sorted(hours):
+            run_at = datetime.combine(day, datetime.min.time()) + timedelta(hours=hour)
+            if run_at > now:
+                return run_at
+
+class AppearsRefreshScheduler:
+    """Background loop that queues an NDVI job for every place at the configured hours.
+
+    All jobs of a refresh share the same date window, so the AppEEARS job worker
+    packs them into a handful of multi-place tasks instead of one task per place.
+    """
+
+    def __init__(self,
+                 hours: list = APPEARS_REFRESH_HOURS,
+                 window_days: int = APPEARS_REFRESH_WINDOW_DAYS
+                 ):
+        self.hours = hours
+        self.window_days = window_days
+        self._loop_task = None
+
+    async def start(self):
+        if not self.hours:
+            logger.info("AppEEARS refresh scheduler disabled")
+            return
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(f"AppEEARS refresh scheduler started, runs at hours {sorted(self.hours)}")
+
+    async def stop(self):
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            now = datetime.now()
+            run_at = next_run_at(self.hours, now)
+            await asyncio.sleep((run_at - now).total_seconds())
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.exception(f"AppEEARS refresh failed: {e}")
+
+    async def run_once(self) -> dict:
+        end_date = date.today()
+        start_date = end_date - timedelta(days=self.window_days)
+        created = 0
+        async with ingest_session() as db:
+            place_ids = (await db.execute(select(Place.id).order_by(Place.id))).scalars().all()
+            for place_id in place_ids:
+                _, job_created = await get_or_create_ndvi_job(place_id=place_id, db=db, start_date=start_date,
+                                                              end_date=end_date, wake_up_worker=False)
+                created += job_created
+        appears_job_worker.wake_up()
+        logger.info(f"Queued {created} refresh jobs for {len(place_ids)} places ({start_date} - {end_date})")
+        return {"places": len(place_ids), "created": created, "start_date": start_date.isoformat(),
+                "end_date": end_date.isoformat()}
+
+appears_refresh_scheduler = AppearsRefreshScheduler()
@@ -0,0 +1,67 @@
+# app/jobs/firms_sync.py
+import os
+import asyncio
+
+from app.config.log_config import logger
+from app.database.database import ingest_session
+from app.metrics.prometheus import stage_timer
+from app.external_apis.firms.wildfires import sync_firms
+from app.external_apis.firms.rollups import refresh_daily_cells
+from app.external_apis.firms.place_fire_events import match_detections_to_places
+
+FIRMS_SYNC_INTERVAL = int(os.getenv("FIRMS_SYNC_INTERVAL", "1800"))  # seconds
+FIRMS_SYNC_SOURCES = [source.strip() for source in os.getenv("FIRMS_SYNC_SOURCES", "VIIRS_SNPP_NRT,MODIS_NRT").split(",")]
+FIRMS_SYNC_COUNTRIES = [country.strip() for country in os.getenv("FIRMS_SYNC_COUNTRIES", "ARG").split(",")]
+
+class FirmsSyncScheduler:
+    """Background loop that keeps wildfire_data up to date for the configured sources and countries.
+
+    Every `interval` seconds each (source, country) pair is synced from its watermark,
+    the daily grid rollups of the days it touched are rebuilt and the new detections
+    are matched against the places, so reads never wait on FIRMS.
+    """
+
+    def __init__(self,
+                 sources: list = FIRMS_SYNC_SOURCES,
+                 countries: list = FIRMS_SYNC_COUNTRIES,
+                 interval: int = FIRMS_SYNC_INTERVAL
+                 ):
+        self.sources = sources
+        self.countries = countries
+        self.interval = interval
+        self._loop_task = None
+
+    async def start(self):
+        self._loop_task = asyncio.create_task(self._run())
+        logger.info(f"FIRMS sync scheduler started for {self.sources} in {self.countries}")
+
+    async def stop(self):
+        if self._loop_task:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+
+    async def _run(self):
+        while True:
+            await self.run_once()
+            await asyncio.sleep(self.interval)
+
+    async def run_once(self) -> list:
+        results = []
+        for country in self.countries:
+            for source in self.sources:
+                try:
+                    async with ingest_session() as db:
+                        result = await sync_firms(source=source, country=country, db=db)
+                        if result.get("inserted"):
+                            with stage_timer("firms", "rollup"):
+                                await refresh_daily_cells(db, since=result["first_acq_date"])
+                            with stage_timer("firms", "place_join"):
+                                await match_detections_to_places(db, first_id=result["first_id"],
+                                                                 last_id=result["last_id"])
+                except Exception as e:
+                    logger.exception(f"FIRMS sync of {source} for {country} failed: {e}")
+                    result = {"error": str(e)}
+                results.append({"source": source, "country": country, **result})
+        return results
+
+firms_sync_scheduler = FirmsSyncScheduler()
@@ -1,4 +1,5 @@
 # app/main.py
+import time
 from typing import List
 from sqlalchemy import func
 from dotenv import load_dotenv
@@ -7,10 +8,16 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from fastapi.responses import HTMLResponse
 from fastapi import FastAPI, Depends, Request
+from starlette.routing import Match
 
 from app.models import Place
 from app.router import router
-from app.database.database import get_db
+from app.metrics.prometheus import REQUEST_SECONDS
+from app.database.database import get_db, engine, ingest_engine
+from app.jobs.firms_sync import firms_sync_scheduler
+from app.jobs.appears_jobs import appears_job_worker
+from app.jobs.appears_refresh import appears_refresh_scheduler
+from app.external_apis.clients import appears_client, firms_client, cmr_stac_client
 
 # Load the environment variables from the .env file
 load_dotenv()
@@ -26,6 +33,42 @@ env = Environment(
 # Register the router
 app.include_router(router)
 
+@app.middleware("http")
+async def observe_request_latency(request: Request, call_next):
+    started_at = time.perf_counter()
+    response = await call_next(request)
+    REQUEST_SECONDS.labels(route_tag(request), request.method, response.status_code).observe(
+        time.perf_counter() - started_at
+    )
+    return response
+
+def route_tag(request: Request) -> str:
+    """Tag of the router (from app/router.py) that serves the request, to keep the label set small."""
+
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match == Match.FULL:
+            tags = getattr(route, "tags", None)
+            return tags[0] if tags else route.path
+    return "unmatched"
+
+@app.on_event("startup")
+async def start_background_workers():
+    await appears_job_worker.start()
+    await appears_refresh_scheduler.start()
+    await firms_sync_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_background_workers():
+    await appears_refresh_scheduler.stop()
+    await appears_job_worker.stop()
+    await firms_sync_scheduler.stop()
+    await appears_client.close()
+    await firms_client.close()
+    await cmr_stac_client.close()
+    await ingest_engine.dispose()
+    await engine.dispose()
+
 @app.get("/", response_class=HTMLResponse)
 async def read_root(request: Request, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Place))
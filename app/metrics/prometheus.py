@@ -0,0 +1,77 @@
+# app/metrics/prometheus.py
+import time
+from contextlib import contextmanager
+from prometheus_client import Counter, Histogram
+from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily, REGISTRY
+
+from app.database.database import engine_metrics
+
+REQUEST_SECONDS = Histogram(
+    "climatech_http_request_seconds", "HTTP request latency per router", ["router", "method", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+INGEST_STAGE_SECONDS = Histogram(
+    "climatech_ingest_stage_seconds", "Time spent in each ingest stage", ["pipeline", "stage"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600, 14400)
+)
+ROWS_WRITTEN = Counter("climatech_rows_written_total", "Rows written by the ingest pipelines", ["table"])
+BYTES_DOWNLOADED = Counter("climatech_bytes_downloaded_total", "Bytes downloaded from external APIs", ["api"])
+PIXELS_DROPPED = Counter(
+    "climatech_ingest_pixels_dropped_total", "Raster pixels dropped before the DB write", ["pipeline", "reason"]
+)
+CLIP_RATIO = Histogram(
+    "climatech_ingest_clip_ratio", "Share of each raster outside the place polygon", ["pipeline"],
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+)
+SCENES_SCREENED = Counter(
+    "climatech_ingest_scenes_screened_total", "Scenes screened on their Fmask before the band downloads",
+    ["pipeline", "outcome"]
+)
+BYTES_SKIPPED = Counter(
+    "climatech_ingest_bytes_skipped_total", "Bytes of band files not downloaded for scenes skipped by the screening",
+    ["pipeline"]
+)
+TILE_CACHE_REQUESTS = Counter(
+    "climatech_hls_tile_cache_requests_total", "COG blocks looked up in the HLS S3 tile cache", ["result"]
+)
+EXTERNAL_API_SECONDS = Histogram(
+    "climatech_external_api_seconds", "Latency of each external API call attempt", ["api", "method", "status"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+)
+
+@contextmanager
+def stage_timer(pipeline: str, stage: str):
+    """Observes the duration of the block in climatech_ingest_stage_seconds, also when it raises."""
+
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        INGEST_STAGE_SECONDS.labels(pipeline, stage).observe(time.perf_counter() - started_at)
+
+class DatabasePoolCollector:
+    """Exports the EngineMetrics of every engine at scrape time."""
+
+    def collect(self):
+        gauges = {
+            name: GaugeMetricFamily(f"climatech_db_pool_{name}", f"Database pool {name.replace('_', ' ')}",
+                                    labels=["engine"])
+            for name in ("pool_size", "checked_out", "overflow", "utilization")
+        }
+        # Counter name -> EngineMetrics snapshot key
+        counter_keys = {"checkouts": "checkouts", "queries": "queries", "query_seconds": "query_seconds_total",
+                        "slow_queries": "slow_queries"}
+        counters = {
+            name: CounterMetricFamily(f"climatech_db_{name}", f"Database {name.replace('_', ' ')}", labels=["engine"])
+            for name in counter_keys
+        }
+        for engine, metrics in engine_metrics.items():
+            snapshot = metrics.snapshot()
+            for name, gauge in gauges.items():
+                gauge.add_metric([engine], snapshot[name])
+            for name, counter in counters.items():
+                counter.add_metric([engine], snapshot[counter_keys[name]])
+        yield from gauges.values()
+        yield from counters.values()
+
+REGISTRY.register(DatabasePoolCollector())
@@ -3,3 +3,9 @@ from .base import Base
 from .place import Place
 from .harmonized_landsat_sentinel_data import HarmonizedLandsatSentinelData
 from .wild_fire_data import WildFireData
+from .appears_job import AppearsJob
+from .firms_sync_state import FirmsSyncState
+from .wildfire_daily_cell import WildfireDailyCell
+from .place_fire_event import PlaceFireEvent
+from .place_index_stats import PlaceIndexStats
+from .hls_scene import HlsScene
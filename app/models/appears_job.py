@@ -0,0 +1,34 @@
+# app/models/appears_job.py
+from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Index, func, text
+from .base import Base
+
+JOB_QUEUED = 'queued'          # Waiting to be submitted to AppEEARS
+JOB_SUBMITTING = 'submitting'  # Claimed by a worker, being submitted (or read from S3)
+JOB_SUBMITTED = 'submitted'    # AppEEARS task running, polled by the worker
+JOB_INGESTING = 'ingesting'    # Task done, files being downloaded and stored
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+ACTIVE_JOB_STATUSES = (JOB_QUEUED, JOB_SUBMITTING, JOB_SUBMITTED, JOB_INGESTING)
+
+class AppearsJob(Base):
+    __tablename__ = 'appears_jobs'
+    __table_args__ = (
+        # At most one active job per place and date window, duplicate requests join it
+        Index('uq_appears_jobs_active_window', 'place_id', 'start_date', 'end_date', unique=True,
+              postgresql_where=text("status IN ('queued', 'submitting', 'submitted', 'ingesting')")),
+    )
+    id = Column(Integer, primary_key=True)
+    place_id = Column(Integer, ForeignKey('places.id', ondelete="CASCADE"), nullable=False, index=True)
+    place = relationship("Place")
+
+    start_date = Column(Date, nullable=False)
+    end_date = Column(Date, nullable=False)
+    status = Column(String, nullable=False, default=JOB_QUEUED, index=True)
+    task_id = Column(String, index=True)  # AppEEARS task id once submitted, shared by the jobs batched in it
+    feature_id = Column(Integer, nullable=False, default=1, server_default=text('1'))  # aid of the place in the task
+    error = Column(String)
+    result = Column(JSONB)  # Ingest summary: scenes and rows written
+    created_at = Column(DateTime, server_default=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
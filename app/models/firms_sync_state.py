@@ -0,0 +1,12 @@
+# app/models/firms_sync_state.py
+from sqlalchemy import Column, String, Date, DateTime, func
+from .base import Base
+
+class FirmsSyncState(Base):
+    """Watermark of the FIRMS detections already stored, per source and country."""
+
+    __tablename__ = 'firms_sync_state'
+    source = Column(String, primary_key=True)  # FIRMS source, e.g. VIIRS_SNPP_NRT
+    country = Column(String, primary_key=True)  # ISO 3166-1 alpha-3 code
+    last_acq_date = Column(Date)  # Most recent acquisition date received
+    synced_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
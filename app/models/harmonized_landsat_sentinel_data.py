@@ -2,19 +2,27 @@
 from geoalchemy2 import Geography
 from sqlalchemy.orm import relationship
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, Float, DateTime, ForeignKey, Index
 from .base import Base
 
 class HarmonizedLandsatSentinelData(Base):
     __tablename__ = 'harmonized_landsat_sentinel_data'
-    id = Column(Integer, primary_key=True)
+    # Range partitioned by month of capture_date, see app/database/partitions.py.
+    # Every index is created on each partition; the unique index leads with
+    # (place_id, capture_date), so it also serves the per-place lookups.
+    __table_args__ = (
+        Index('uq_hls_place_date_pixel', 'place_id', 'capture_date', 'pixel_key', unique=True),
+        {'postgresql_partition_by': 'RANGE (capture_date)'},
+    )
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Unique together with capture_date, the partition key
     place_id = Column(Integer, ForeignKey('places.id', ondelete="CASCADE"), nullable=True)
     
     # Utiliza una cadena de texto para referirse a la clase relacionada
     place = relationship("Place", back_populates="satellite_data")
     
-    capture_date = Column(DateTime, index=True)
+    capture_date = Column(DateTime, primary_key=True)
     location = Column(Geography(geometry_type='POINT', srid=4326))
+    pixel_key = Column(BigInteger, nullable=False)  # Quantized lon/lat of the pixel centre, see hls_scenes.pixel_keys
 
     b01_coastal_aerosol = Column(Float)
     b02_blue = Column(Float)
@@ -30,5 +38,9 @@ class HarmonizedLandsatSentinelData(Base):
     b11_swir1 = Column(Float)
     b12_swir2 = Column(Float)
     ndvi = Column(Float)
+    evi = Column(Float)
+    ndwi = Column(Float)
+    nbr = Column(Float)
+    savi = Column(Float)
     
     additional_data = Column(JSONB)  # Stores additional data like SAA, SZA, VAA, VZA, etc.
\ No newline at end of file
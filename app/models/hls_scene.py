@@ -0,0 +1,30 @@
+# app/models/hls_scene.py
+from geoalchemy2 import Geography
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, ForeignKey, Index, func
+from .base import Base
+
+class HlsScene(Base):
+    """A scene kept as a COG in the object store instead of one row per pixel, see app/storage/cog_store.py.
+
+    A place can have several scenes on one date, one per product and tile or granule.
+    """
+
+    __tablename__ = 'hls_scenes'
+    __table_args__ = (
+        Index('uq_hls_scenes_place_date_scene', 'place_id', 'capture_date', 'product', 'scene_id', unique=True),
+    )
+    id = Column(Integer, primary_key=True)
+    place_id = Column(Integer, ForeignKey('places.id', ondelete="CASCADE"), nullable=False)
+    capture_date = Column(DateTime, nullable=False)
+    product = Column(String, nullable=False)  # HLSS30 or HLSL30
+    scene_id = Column(String, nullable=False)  # S3 granule id, or the UTM zone of AppEEARS files ('mosaic' if none)
+
+    storage_key = Column(String, nullable=False)  # Path of the COG inside the store, <place_id>/<date>/<product>_<scene_id>.tif
+    footprint = Column(Geography(geometry_type='POLYGON', srid=4326))  # Bounds of the raster
+    bands = Column(JSONB, nullable=False)  # Band and index names, in band order
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    valid_pixels = Column(Integer, nullable=False)
+    size_bytes = Column(BigInteger, nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
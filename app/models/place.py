@@ -11,5 +11,7 @@ class Place(Base):
     description = Column(String, index=True)
     location = Column(Geography(geometry_type='POLYGON', srid=4326), index=True)
     
-    # Utiliza una cadena de texto para referirse a la clase relacionada
-    satellite_data = relationship("HarmonizedLandsatSentinelData", back_populates="place", cascade="all, delete")
\ No newline at end of file
+    # Utiliza una cadena de texto para referirse a la clase relacionada.
+    # The pixels are deleted by the ON DELETE CASCADE of the database, not loaded one by one
+    satellite_data = relationship("HarmonizedLandsatSentinelData", back_populates="place", cascade="all, delete",
+                                  passive_deletes=True)
@@ -0,0 +1,22 @@
+# app/models/place_fire_event.py
+from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, Index, func
+from .base import Base
+
+class PlaceFireEvent(Base):
+    """A wildfire detection inside, or within the alert buffer of, a place."""
+
+    __tablename__ = 'place_fire_events'
+    __table_args__ = (
+        Index('uq_place_fire_events_place_wildfire', 'place_id', 'wildfire_id', unique=True),
+        Index('ix_place_fire_events_place_acq_date', 'place_id', 'acq_date'),
+    )
+    id = Column(Integer, primary_key=True)
+    place_id = Column(Integer, ForeignKey('places.id', ondelete="CASCADE"), nullable=False)
+    place = relationship("Place")
+    wildfire_id = Column(Integer, ForeignKey('wildfire_data.id', ondelete="CASCADE"), nullable=False)
+    wildfire = relationship("WildFireData")
+
+    acq_date = Column(DateTime, nullable=False)  # Copied from the detection, to list events by date
+    distance_m = Column(Float, nullable=False)  # 0 when the detection is inside the place
+    created_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,19 @@
+# app/models/place_index_stats.py
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, func
+from .base import Base
+
+class PlaceIndexStats(Base):
+    """Per place, capture date and spectral index summary of the stored pixels, filled at ingest."""
+
+    __tablename__ = 'place_index_stats'
+    place_id = Column(Integer, ForeignKey('places.id', ondelete="CASCADE"), primary_key=True)
+    capture_date = Column(DateTime, primary_key=True)
+    index_name = Column(String, primary_key=True)  # Key of SPECTRAL_INDICES, e.g. 'ndvi'
+
+    mean = Column(Float)
+    median = Column(Float)
+    p10 = Column(Float)
+    p90 = Column(Float)
+    valid_pixels = Column(Integer, nullable=False)  # Pixels where the index is defined
+    cloud_fraction = Column(Float)  # Share of observed pixels masked by Fmask, NULL if unknown
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
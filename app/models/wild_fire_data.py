@@ -1,10 +1,14 @@
 # app/models/wild_fire_data.py
 from geoalchemy2 import Geography
-from sqlalchemy import Column, Integer, Float, DateTime, String
+from sqlalchemy import Column, Integer, Float, DateTime, String, Index
 from .base import Base
 
 class WildFireData(Base):
     __tablename__ = 'wildfire_data'
+    __table_args__ = (
+        # Natural key of a detection, re-downloaded windows are not stored twice
+        Index('uq_wildfire_detection', 'satellite', 'acq_date', 'acq_time', 'latitude', 'longitude', unique=True),
+    )
     id = Column(Integer, primary_key=True)
     latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False)
@@ -0,0 +1,18 @@
+# app/models/wildfire_daily_cell.py
+from sqlalchemy import Column, Integer, SmallInteger, String, Date, Float
+from .base import Base
+
+class WildfireDailyCell(Base):
+    """Daily rollup of wildfire detections on a lon/lat grid, one row per grid level, day, satellite and cell."""
+
+    __tablename__ = 'wildfire_daily_cells'
+    grid_level = Column(SmallInteger, primary_key=True)  # Index into CLUSTER_GRID_SIZES
+    acq_date = Column(Date, primary_key=True)
+    satellite = Column(String, primary_key=True)
+    cell_x = Column(Integer, primary_key=True)  # floor(longitude / cell size)
+    cell_y = Column(Integer, primary_key=True)  # floor(latitude / cell size)
+    count = Column(Integer, nullable=False)
+    max_frp = Column(Float)
+    max_confidence = Column(SmallInteger)  # 1 low, 2 nominal, 3 high
+    sum_latitude = Column(Float, nullable=False)  # Sums, so cells of several days merge into a centroid
+    sum_longitude = Column(Float, nullable=False)
@@ -1,10 +1,13 @@
 # app/router.py
 from fastapi import APIRouter
-from app.endpoints import places, terrain, map, ndvi, wild_fires
+from app.endpoints import places, terrain, map, ndvi, wild_fires, tiles, health
 
 router = APIRouter()
 router.include_router(places.router, prefix="/places", tags=["Places"])
 router.include_router(terrain.router, prefix="/terrain", tags=["Terrain"])
 router.include_router(map.router, prefix="/map", tags=["Map"])
 router.include_router(ndvi.router, prefix="/ndvi", tags=["NDVI"])
-router.include_router(wild_fires.router, tags=["Wildfires"])
\ No newline at end of file
+router.include_router(wild_fires.router, tags=["Wildfires"])
+router.include_router(tiles.router, prefix="/tiles", tags=["Tiles"])
+router.include_router(health.router, prefix="/health", tags=["Health"])
+router.include_router(health.metrics_router, tags=["Metrics"])
@@ -0,0 +1,206 @@
+# app/storage/cog_store.py
+import os
+import math
+import shutil
+import rasterio
+import numpy as np
+from affine import Affine
+from rasterio.io import MemoryFile
+from rasterio.enums import Resampling
+from rasterio.windows import Window, from_bounds
+from rasterio.shutil import copy as copy_raster
+
+from app.config.log_config import logger
+from app.external_apis.appears.hls_scenes import pixel_centre_coordinates, pixel_keys
+
+# "rows" stores one harmonized_landsat_sentinel_data row per pixel, "cog" one COG per scene
+HLS_STORAGE_BACKEND = os.getenv("HLS_STORAGE_BACKEND", "rows")
+COG_STORE_DIR = os.getenv("COG_STORE_DIR", os.path.join("data", "cogs"))
+
+# Float bands with NaN as nodata: DEFLATE with the floating point predictor, 256 px blocks.
+# Bands are interleaved by band, so reading one band only decodes that band's blocks;
+# the COG layout comes from copying the overviews built in memory ahead of the data.
+COG_BLOCK_SIZE = 256
+COG_OPTIONS = {
+    "tiled": True,
+    "blockxsize": COG_BLOCK_SIZE,
+    "blockysize": COG_BLOCK_SIZE,
+    "compress": "DEFLATE",
+    "predictor": 3,
+    "zlevel": 6,
+    "interleave": "band",
+    "copy_src_overviews": True,
+    "bigtiff": "IF_SAFER",
+}
+
+def overview_factors(height: int, width: int) -> list:
+    """Power of two reductions until the raster fits in one block."""
+    factors = []
+    factor = 2
+    while max(height, width) / factor >= COG_BLOCK_SIZE / 2:
+        factors.append(factor)
+        factor *= 2
+    return factors
+
+def cog_backend_enabled() -> bool:
+    return HLS_STORAGE_BACKEND == "cog"
+
+class CogStore:
+    """Scenes stored as Cloud-Optimized GeoTIFFs in a local directory used as an object store.
+
+    A scene is one float32 COG under `<store_dir>/<place_id>/<date>/<product>_<scene_id>.tif`
+    holding every band and spectral index of the scene as a named band, NaN where there
+    is no clear pixel. A date can have several scenes (products, tiles or granules),
+    readers merge them.
+    COGs are tiled and carry overviews, so a window or a downsampled read only decodes
+    the blocks it needs.
+    """
+
+    def __init__(self, store_dir: str = COG_STORE_DIR):
+        self.store_dir = store_dir
+
+    def key(self, place_id: int, capture_date, product: str, scene_id: str) -> str:
+        return f"{place_id}/{capture_date.isoformat()}/{product}_{scene_id}.tif"
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.store_dir, *key.split('/'))
+
+    def write_scene(self, key: str, scene: dict) -> dict:
+        """Writes the pixel columns of an assembled scene back on its grid as a COG.
+
+        Blocking, run it in a thread. The file is written next to its final path and
+        moved in place, so readers never see a partial COG.
+        """
+
+        bands = list(scene['columns'])
+        height, width = scene['height'], scene['width']
+        data = np.full((len(bands), height, width), np.nan, dtype=np.float32)
+        for index, band in enumerate(bands):
+            data[index, scene['rows'], scene['cols']] = scene['columns'][band]
+
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        partial_path = f"{path}.partial"
+        profile = {
+            'driver': 'GTiff',
+            'height': height,
+            'width': width,
+            'count': len(bands),
+            'dtype': 'float32',
+            'crs': scene['crs'] or 'EPSG:4326',
+            'transform': scene['transform'],
+            'nodata': np.nan,
+        }
+        with MemoryFile() as memory_file:
+            with memory_file.open(**profile) as dataset:
+                dataset.write(data)
+                dataset.descriptions = tuple(bands)
+                dataset.build_overviews(overview_factors(height, width), Resampling.average)
+            with memory_file.open() as dataset:
+                copy_raster(dataset, partial_path, driver='GTiff', **COG_OPTIONS)
+        os.replace(partial_path, path)
+
+        west, north = scene['transform'] * (0, 0)
+        east, south = scene['transform'] * (width, height)
+        size_bytes = os.path.getsize(path)
+        logger.debug(f"Wrote COG {key} with {len(bands)} bands of {width}x{height} pixels ({size_bytes:,} bytes)")
+        return {"bands": bands, "width": width, "height": height, "size_bytes": size_bytes,
+                "bounds": (west, min(south, north), east, max(south, north))}
+
+    def read_window(self,
+                    key: str,
+                    bands: list,
+                    bounds: tuple = None,
+                    max_size: int = None
+                    ) -> tuple:
+        """Reads the named bands inside lon/lat `bounds` (west, south, east, north).
+
+        With `max_size` the window is read downsampled so neither side exceeds it,
+        which GDAL serves from the overviews. Bands the scene lacks are all NaN.
+        Returns ({band: 2D array}, transform), or (None, None) when the window is
+        outside the scene.
+        """
+
+        with rasterio.open(self.path(key)) as src:
+            present = [band for band in bands if band in src.descriptions]
+            indexes = [src.descriptions.index(band) + 1 for band in present]
+            full = Window(0, 0, src.width, src.height)
+            if bounds is None:
+                window = full
+            else:
+                window = from_bounds(*bounds, transform=src.transform)
+                col_start, row_start = math.floor(window.col_off), math.floor(window.row_off)
+                col_stop = math.ceil(window.col_off + window.width)
+                row_stop = math.ceil(window.row_off + window.height)
+                col_start, row_start = max(col_start, 0), max(row_start, 0)
+                col_stop, row_stop = min(col_stop, src.width), min(row_stop, src.height)
+                if col_stop <= col_start or row_stop <= row_start:
+                    return None, None
+                window = Window(col_start, row_start, col_stop - col_start, row_stop - row_start)
+
+            out_height, out_width = int(window.height), int(window.width)
+            if max_size and max(out_height, out_width) > max_size:
+                scale = max_size / max(out_height, out_width)
+                out_height, out_width = max(1, round(out_height * scale)), max(1, round(out_width * scale))
+            arrays = {band: np.full((out_height, out_width), np.nan, dtype=np.float32) for band in bands}
+            if indexes:
+                data = src.read(indexes, window=window, out_shape=(len(indexes), out_height, out_width),
+                                resampling=Resampling.nearest)
+                arrays.update({band: data[index] for index, band in enumerate(present)})
+            transform = src.window_transform(window) * Affine.scale(window.width / out_width,
+                                                                    window.height / out_height)
+        return arrays, transform
+
+    def read_points(self,
+                    key: str,
+                    band: str,
+                    bounds: tuple = None,
+                    max_size: int = None
+                    ) -> tuple:
+        """Longitudes, latitudes and values of the pixels with a value, as read_window would return them."""
+
+        longitudes, latitudes, values = self.read_scene_points([key], [band], bounds, max_size)
+        return longitudes, latitudes, values[band]
+
+    def read_scene_points(self,
+                          keys: list,
+                          bands: list,
+                          bounds: tuple = None,
+                          max_size: int = None
+                          ) -> tuple:
+        """Longitudes, latitudes and {band: values} of the pixels with a value in any band, over the scenes of a date.
+
+        The scenes are merged like the row backend merges them: a pixel covered by
+        several scenes (overlapping tiles) is kept once, from the last of `keys`.
+        """
+
+        longitudes, latitudes, values = [], [], {band: [] for band in bands}
+        for key in keys:
+            arrays, transform = self.read_window(key, bands, bounds, max_size)
+            if arrays is None:
+                continue
+            scene_longitudes, scene_latitudes = pixel_centre_coordinates(transform, *arrays[bands[0]].shape)
+            rows, cols = np.nonzero(np.any([~np.isnan(arrays[band]) for band in bands], axis=0))
+            longitudes.append(scene_longitudes[rows, cols])
+            latitudes.append(scene_latitudes[rows, cols])
+            for band in bands:
+                values[band].append(arrays[band][rows, cols].astype(np.float64))
+        if not longitudes:
+            empty = np.empty(0, dtype=np.float64)
+            return empty, empty, {band: empty for band in bands}
+
+        longitudes, latitudes = np.concatenate(longitudes), np.concatenate(latitudes)
+        values = {band: np.concatenate(band_values) for band, band_values in values.items()}
+        if len(keys) > 1:
+            # Last occurrence of each pixel, in reading order
+            keys_reversed = pixel_keys(longitudes, latitudes)[::-1]
+            _, last = np.unique(keys_reversed, return_index=True)
+            kept = np.sort(longitudes.size - 1 - last)
+            longitudes, latitudes = longitudes[kept], latitudes[kept]
+            values = {band: band_values[kept] for band, band_values in values.items()}
+        return longitudes, latitudes, values
+
+    def delete_place(self, place_id: int):
+        shutil.rmtree(os.path.join(self.store_dir, str(place_id)), ignore_errors=True)
+
+cog_store = CogStore()
@@ -0,0 +1,100 @@
+# app/tiles/render.py
+import io
+import mercantile
+import numpy as np
+from PIL import Image
+
+from app.external_apis.appears.indices import SPECTRAL_INDICES
+from app.external_apis.appears.utils_appears import BAND_NAME_MAP
+
+TILE_SIZE = 256
+EARTH_RADIUS = 6378137.0  # Web Mercator sphere, in meters
+HLS_PIXEL_SIZE = 0.00026949458523585647  # 30 m in degrees, fallback when a tile has a single pixel
+
+# Value range mapped onto the colormap for each renderable layer
+LAYER_RANGES = {
+    **{name: (-1.0, 1.0) for name in SPECTRAL_INDICES},
+    **{column: (0.0, 3000.0) for column in BAND_NAME_MAP.values()},
+}
+
+# Same gradient as the frontend used for the NDVI heatmap
+GRADIENT = [
+    (0.0, (0, 0, 128)),
+    (0.2, (0, 0, 255)),
+    (0.4, (0, 128, 0)),
+    (0.6, (0, 255, 0)),
+    (0.8, (255, 255, 0)),
+    (1.0, (255, 0, 0)),
+]
+
+def _build_colormap() -> np.ndarray:
+    stops = np.array([stop for stop, _ in GRADIENT])
+    colors = np.array([color for _, color in GRADIENT], dtype=np.float64)
+    positions = np.linspace(0, 1, 256)
+    colormap = np.zeros((256, 4), dtype=np.uint8)
+    for channel in range(3):
+        colormap[:, channel] = np.interp(positions, stops, colors[:, channel])
+    colormap[:, 3] = 255
+    return colormap
+
+COLORMAP = _build_colormap()
+
+def tile_query_bounds(z: int, x: int, y: int) -> tuple:
+    """Lon/lat bounds of a tile, padded by one HLS pixel so edge pixels are not clipped."""
+
+    bounds = mercantile.bounds(x, y, z)
+    return (bounds.west - HLS_PIXEL_SIZE, bounds.south - HLS_PIXEL_SIZE,
+            bounds.east + HLS_PIXEL_SIZE, bounds.north + HLS_PIXEL_SIZE)
+
+def _grid_step(coordinates: np.ndarray) -> float:
+    steps = np.diff(np.unique(coordinates))
+    steps = steps[steps > 1e-7]
+    return float(steps.min()) if steps.size else HLS_PIXEL_SIZE
+
+def render_tile(longitudes: np.ndarray,
+                latitudes: np.ndarray,
+                values: np.ndarray,
+                layer: str,
+                z: int,
+                x: int,
+                y: int
+                ) -> bytes:
+    """Renders stored pixel values into a colormapped 256x256 PNG tile.
+
+    The pixels are first put back on their native lon/lat grid, then every tile pixel
+    samples the grid cell under its centre (nearest neighbour), so the whole tile is
+    resampled with array operations whatever the zoom level.
+    """
+
+    image = np.zeros((TILE_SIZE, TILE_SIZE, 4), dtype=np.uint8)
+    if values.size:
+        lon_step, lat_step = _grid_step(longitudes), _grid_step(latitudes)
+        west, north = longitudes.min(), latitudes.max()
+        cols = np.round((longitudes - west) / lon_step).astype(np.int64)
+        rows = np.round((north - latitudes) / lat_step).astype(np.int64)
+        grid = np.full((rows.max() + 1, cols.max() + 1), np.nan, dtype=np.float32)
+        grid[rows, cols] = values
+
+        # Centres of the tile pixels, in lon/lat
+        bounds = mercantile.xy_bounds(x, y, z)
+        pixel = (np.arange(TILE_SIZE) + 0.5) / TILE_SIZE
+        tile_lons = np.degrees((bounds.left + pixel * (bounds.right - bounds.left)) / EARTH_RADIUS)
+        tile_lats = np.degrees(2 * np.arctan(np.exp((bounds.top - pixel * (bounds.top - bounds.bottom)) / EARTH_RADIUS))
+                               - np.pi / 2)
+        sample_cols = np.round((tile_lons - west) / lon_step).astype(np.int64)
+        sample_rows = np.round((north - tile_lats) / lat_step).astype(np.int64)
+
+        inside = (sample_rows[:, np.newaxis] >= 0) & (sample_rows[:, np.newaxis] < grid.shape[0]) \
+            & (sample_cols[np.newaxis, :] >= 0) & (sample_cols[np.newaxis, :] < grid.shape[1])
+        sampled = np.full((TILE_SIZE, TILE_SIZE), np.nan, dtype=np.float32)
+        row_index, col_index = np.nonzero(inside)
+        sampled[row_index, col_index] = grid[sample_rows[row_index], sample_cols[col_index]]
+
+        low, high = LAYER_RANGES[layer]
+        has_value = ~np.isnan(sampled)
+        color_index = np.clip((sampled[has_value] - low) / (high - low) * 255, 0, 255).astype(np.uint8)
+        image[has_value] = COLORMAP[color_index]
+
+    buffer = io.BytesIO()
+    Image.fromarray(image, mode='RGBA').save(buffer, format='PNG', optimize=False)
+    return buffer.getvalue()
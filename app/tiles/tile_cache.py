@@ -0,0 +1,93 @@
+# app/tiles/tile_cache.py
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+from app.config.log_config import logger
+
+TILE_CACHE_SIZE = int(os.getenv("TILE_CACHE_SIZE", "2048"))  # tiles kept in memory
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "climatech", "tiles"))
+
+def file_version(stat: os.stat_result) -> str:
+    """Changes whenever the file is written again, a new file gets a new inode or mtime."""
+
+    return f"{stat.st_ino:x}-{stat.st_mtime_ns:x}"
+
+class TileCache:
+    """Two level cache of rendered tiles: an in-memory LRU in front of a directory on disk.
+
+    Tiles are keyed by (place_id, date, layer, z, x, y) and stored on disk under
+    `<cache_dir>/<place_id>/<date>/<layer>/<z>/<x>/<y>.png`, so everything rendered
+    for a place and date can be dropped at once when new data is ingested.
+
+    The file on disk is the reference shared by every worker: a tile in memory is only
+    served while its file is still the one it was read from, and its version (inode and
+    mtime of the file) is what the ETag is built from.
+    """
+
+    def __init__(self, max_size: int = TILE_CACHE_SIZE, cache_dir: str = TILE_CACHE_DIR):
+        self.max_size = max_size
+        self.cache_dir = cache_dir
+        self._tiles = OrderedDict()
+
+    def _path(self, key: tuple) -> str:
+        place_id, date, layer, z, x, y = key
+        return os.path.join(self.cache_dir, str(place_id), str(date), layer, str(z), str(x), f"{y}.png")
+
+    def get(self, key: tuple):
+        """Returns (tile, version) or None when the tile is not cached."""
+
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            # Invalidated, possibly by another worker
+            self._tiles.pop(key, None)
+            return None
+        cached = self._tiles.get(key)
+        if cached is not None and cached[1] == file_version(stat):
+            self._tiles.move_to_end(key)
+            return cached
+        try:
+            with open(path, 'rb') as f:
+                tile, version = f.read(), file_version(os.fstat(f.fileno()))
+        except FileNotFoundError:
+            self._tiles.pop(key, None)
+            return None
+        self._remember(key, tile, version)
+        return tile, version
+
+    def put(self, key: tuple, tile: bytes) -> str:
+        """Stores a tile and returns its version."""
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename, so a concurrent reader never sees a half written tile
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(tile)
+            f.flush()
+            version = file_version(os.fstat(f.fileno()))
+        os.replace(temp_path, path)
+        self._remember(key, tile, version)
+        return version
+
+    def _remember(self, key: tuple, tile: bytes, version: str):
+        self._tiles[key] = (tile, version)
+        self._tiles.move_to_end(key)
+        while len(self._tiles) > self.max_size:
+            self._tiles.popitem(last=False)
+
+    def invalidate(self, place_id: int, date):
+        """Drops every cached tile of a place and date, for all layers and zoom levels.
+
+        Other workers drop their copies in memory on their next lookup, once the files are gone.
+        """
+
+        for key in [key for key in self._tiles if key[0] == place_id and key[1] == str(date)]:
+            del self._tiles[key]
+        shutil.rmtree(os.path.join(self.cache_dir, str(place_id), str(date)), ignore_errors=True)
+        logger.info(f"Tile cache invalidated for place {place_id} on {date}")
+
+tile_cache = TileCache()
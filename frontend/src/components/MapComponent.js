@@ -1,10 +1,62 @@
 //  frontend/src/MapComponent.js
 import React, { useEffect, useState, useRef } from 'react';
 import L from 'leaflet';
-import 'leaflet.heat';
 import 'leaflet/dist/leaflet.css';
 import { useParams, useNavigate } from 'react-router-dom';
 
+const NDVI_JOB_POLL_INTERVAL_MS = 10000;
+const MAX_CANVAS_SIZE = 4096;
+const NDVI_GRADIENT = [
+  [0.0, [0, 0, 128]],
+  [0.2, [0, 0, 255]],
+  [0.4, [0, 128, 0]],
+  [0.6, [0, 255, 0]],
+  [0.8, [255, 255, 0]],
+  [1.0, [255, 0, 0]]
+];
+
+// 256 RGB entries for NDVI values from -1 to 1
+const NDVI_COLORMAP = (() => {
+  const colormap = new Uint8ClampedArray(256 * 3);
+  for (let i = 0; i < 256; i++) {
+    const t = i / 255;
+    let stop = 1;
+    while (stop < NDVI_GRADIENT.length - 1 && NDVI_GRADIENT[stop][0] < t) stop++;
+    const [t0, c0] = NDVI_GRADIENT[stop - 1];
+    const [t1, c1] = NDVI_GRADIENT[stop];
+    const f = (t - t0) / (t1 - t0);
+    for (let c = 0; c < 3; c++) colormap[i * 3 + c] = c0[c] + (c1[c] - c0[c]) * f;
+  }
+  return colormap;
+})();
+
+// Draws one canvas pixel per raster pixel, so a million points cost a single typed array pass
+const renderNDVICanvas = (longitudes, latitudes, ndvi, bounds, pixelSize) => {
+  const [west, south, east, north] = bounds;
+  const step = pixelSize > 0 ? pixelSize : Math.max(east - west, north - south) / MAX_CANVAS_SIZE;
+  const width = Math.min(MAX_CANVAS_SIZE, Math.round((east - west) / step) + 1);
+  const height = Math.min(MAX_CANVAS_SIZE, Math.round((north - south) / step) + 1);
+  const canvas = document.createElement('canvas');
+  canvas.width = width;
+  canvas.height = height;
+  const context = canvas.getContext('2d');
+  const image = context.createImageData(width, height);
+  const xScale = (width - 1) / Math.max(east - west, step);
+  const yScale = (height - 1) / Math.max(north - south, step);
+  for (let i = 0; i < ndvi.length; i++) {
+    const x = Math.round((longitudes[i] - west) * xScale);
+    const y = Math.round((north - latitudes[i]) * yScale);
+    const color = Math.max(0, Math.min(255, Math.round((ndvi[i] + 1) * 127.5))) * 3;
+    const offset = (y * width + x) * 4;
+    image.data[offset] = NDVI_COLORMAP[color];
+    image.data[offset + 1] = NDVI_COLORMAP[color + 1];
+    image.data[offset + 2] = NDVI_COLORMAP[color + 2];
+    image.data[offset + 3] = 255;
+  }
+  context.putImageData(image, 0, 0);
+  return canvas;
+};
+
 const MapComponent = () => {
   const { placeId } = useParams();
   const navigate = useNavigate();
@@ -73,11 +125,42 @@ const MapComponent = () => {
     }
   };
 
+  const refreshDates = () => {
+    fetch(`/ndvi/dates/${placeId}`)
+      .then(response => response.json())
+      .then(data => {
+        setDates(data.dates);
+      });
+  };
+
+  const pollNDVIJob = (jobId) => {
+    fetch(`/ndvi/jobs/${jobId}`)
+      .then(response => response.json())
+      .then(job => {
+        if (job.status === 'done') {
+          refreshDates();
+          alert('NDVI data processed and updated successfully');
+        } else if (job.status === 'failed') {
+          alert(`Failed to process NDVI data: ${job.error}`);
+        } else {
+          setTimeout(() => pollNDVIJob(jobId), NDVI_JOB_POLL_INTERVAL_MS);
+        }
+      })
+      .catch(error => {
+        console.error('Error polling NDVI job:', error);
+      });
+  };
+
   const fetchNDVI = () => {
     fetch(`/ndvi/${placeId}`)
-        .then(response => response.json())
-        .then(data => {
-            alert(`NDVI Data: ${data.ndvi}`);
+        .then(response => response.json().then(data => ({ status: response.status, data })))
+        .then(({ status, data }) => {
+            if (status === 202) {
+              console.log(`NDVI job ${data.job_id} is ${data.status}`);
+              pollNDVIJob(data.job_id);
+            } else {
+              alert(data.message || data.detail);
+            }
         })
         .catch(error => {
             console.error('Error fetching NDVI data:', error);
@@ -85,6 +168,19 @@ const MapComponent = () => {
         });
   };
 
+  // Tiles are rendered and cached by the server, only the visible ones are fetched
+  const showNDVITiles = () => {
+    if (!selectedDate) {
+      alert('Please select a date first.');
+      return;
+    }
+    const tileDate = selectedDate.slice(0, 10);
+    L.tileLayer(`/tiles/ndvi/${placeId}/${tileDate}/{z}/{x}/{y}.png`, {
+      opacity: 0.8,
+      maxZoom: 18
+    }).addTo(mapRef.current);
+  };
+
   const showNDVIHeatmap = () => {
     if (!selectedDate) {
       console.log('No date selected');
@@ -94,32 +190,32 @@ const MapComponent = () => {
   
     console.log(`Fetching NDVI heatmap data for date: ${selectedDate}`);
     const startFetchTime = Date.now();
-    fetch(`/ndvi/heatmap/${placeId}?date=${selectedDate}`)
+    fetch(`/ndvi/heatmap/${placeId}?date=${selectedDate}&format=f32`)
       .then(response => {
-        console.log(`Data received in ${Date.now() - startFetchTime}ms`);
-        return response.json();
+        if (!response.ok) {
+          throw new Error(`HTTP ${response.status}`);
+        }
+        const count = parseInt(response.headers.get('X-Point-Count'), 10);
+        const bounds = response.headers.get('X-Bounds').split(',').map(Number);
+        const pixelSize = parseFloat(response.headers.get('X-Pixel-Size'));
+        return response.arrayBuffer().then(buffer => ({ buffer, count, bounds, pixelSize }));
       })
-      .then(data => {
-        console.log(`Received ${data.data.length} data points`);
-        const heatData = data.data.map(d => [d.latitude, d.longitude, d.ndvi]);
-        console.log(`Mapped heatData:`, heatData.slice(0, 10)); // Log the first 10 items to check structure
-  
-        const layer = L.heatLayer(heatData, {
-          radius: 25,
-          blur: 15,
-          gradient: {
-            0.0: 'navy',
-            0.2: 'blue',
-            0.4: 'green',
-            0.6: 'lime',
-            0.8: 'yellow',
-            1.0: 'red'
-          }
+      .then(({ buffer, count, bounds, pixelSize }) => {
+        console.log(`Received ${count} data points in ${Date.now() - startFetchTime}ms`);
+        const longitudes = new Float32Array(buffer, 0, count);
+        const latitudes = new Float32Array(buffer, count * 4, count);
+        const ndvi = new Float32Array(buffer, count * 8, count);
+
+        const startRenderTime = Date.now();
+        const [west, south, east, north] = bounds;
+        const canvas = renderNDVICanvas(longitudes, latitudes, ndvi, bounds, pixelSize);
+        // Pixel centres are at the bounds, the overlay has to cover the whole outer pixels
+        const half = pixelSize / 2;
+        const layer = L.imageOverlay(canvas.toDataURL(), [[south - half, west - half], [north + half, east + half]], {
+          opacity: 0.8
         });
-  
-        console.log(`Adding layer to map`);
         layer.addTo(mapRef.current);
-        console.log(`Layer added to map successfully`);
+        console.log(`Layer rendered in ${Date.now() - startRenderTime}ms`);
       })
       .catch(error => {
         console.error('Error fetching NDVI heatmap data:', error);
@@ -146,6 +242,9 @@ const MapComponent = () => {
         <button className="btn btn-success" onClick={showNDVIHeatmap}>
           Show NDVI
         </button>
+        <button className="btn btn-success" onClick={showNDVITiles}>
+          Show NDVI Tiles
+        </button>
         <button className="btn btn-primary" onClick={toggleGeoJSONVisibility}>Toggle GeoJSON Visibility</button>
         <button className="btn btn-danger" onClick={clearMap}>Clear Map</button>
       </div>
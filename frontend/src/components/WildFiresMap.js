@@ -1,28 +1,75 @@
 // frontend/src/components/WildFiresMap.js
-import React, { useEffect, useState } from 'react';
-import { MapContainer, TileLayer, Marker, Popup } from 'react-leaflet';
+import React, { useEffect, useState, useCallback } from 'react';
+import { MapContainer, TileLayer, Marker, Popup, CircleMarker, useMapEvents } from 'react-leaflet';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 
+const WILDFIRES_MAX_PAGES = 20;
+const WILDFIRES_WINDOW_DAYS = 3;
+const POINTS_MIN_ZOOM = 11; // Below this zoom detections are shown as grid clusters
+
+// Follows next_cursor until every detection of the window is loaded
+const fetchWildFires = async (params) => {
+    let detections = [];
+    let cursor = null;
+    for (let page = 0; page < WILDFIRES_MAX_PAGES; page++) {
+        const query = new URLSearchParams(params);
+        if (cursor) query.set('cursor', cursor);
+        const response = await fetch(`/wildfires?${query}`);
+        if (!response.ok) {
+            throw new Error('Network response was not ok');
+        }
+        const data = await response.json();
+        detections = detections.concat(data.detections);
+        cursor = data.next_cursor;
+        if (!cursor) break;
+    }
+    return detections;
+};
+
+const fetchWildFireClusters = async (params) => {
+    const response = await fetch(`/wildfires/clusters?${new URLSearchParams(params)}`);
+    if (!response.ok) {
+        throw new Error('Network response was not ok');
+    }
+    return (await response.json()).cells;
+};
+
+// Reloads the detections, or their clusters, whenever the view changes
+const ViewportLoader = ({ onViewChange }) => {
+    const map = useMapEvents({
+        moveend: () => onViewChange(map),
+    });
+    useEffect(() => {
+        onViewChange(map);
+    }, [map, onViewChange]);
+    return null;
+};
+
 const WildFiresMap = () => {
     const [wildFires, setWildFires] = useState([]);
+    const [clusters, setClusters] = useState([]);
 
-    useEffect(() => {
-        console.log('Fetching wildfire data...');
-        fetch('/wildfires?satellite=MODIS_NRT&days=3') // Ajusta según tus necesidades
-            .then(response => {
-                if (!response.ok) {
-                    throw new Error('Network response was not ok');
-                }
-                return response.json();
-            })
-            .then(data => {
-                console.log('Data received:', data);
-                setWildFires(data);
-            })
-            .catch(error => {
-                console.error('Error fetching data:', error);
-            });
+    const loadView = useCallback((map) => {
+        const zoom = map.getZoom();
+        const bbox = map.getBounds().toBBoxString();
+        const startDate = new Date(Date.now() - WILDFIRES_WINDOW_DAYS * 24 * 60 * 60 * 1000).toISOString().slice(0, 10);
+        console.log(`Fetching wildfire data at zoom ${zoom}...`);
+        if (zoom >= POINTS_MIN_ZOOM) {
+            fetchWildFires({ bbox, start_date: startDate, limit: 5000 })
+                .then(data => {
+                    setClusters([]);
+                    setWildFires(data);
+                })
+                .catch(error => console.error('Error fetching data:', error));
+        } else {
+            fetchWildFireClusters({ zoom, bbox, start_date: startDate })
+                .then(cells => {
+                    setWildFires([]);
+                    setClusters(cells);
+                })
+                .catch(error => console.error('Error fetching clusters:', error));
+        }
     }, []);
 
     // Configuración del icono de incendio
@@ -44,6 +91,20 @@ const WildFiresMap = () => {
                 url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png"
                 attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
             />
+            <ViewportLoader onViewChange={loadView} />
+            {clusters.map(cell => (
+                <CircleMarker
+                    key={`${cell.latitude},${cell.longitude}`}
+                    center={[cell.latitude, cell.longitude]}
+                    radius={Math.min(30, 4 + 3 * Math.log2(cell.count))}
+                    pathOptions={{ color: '#d7301f', fillOpacity: 0.6, weight: 1 }}>
+                    <Popup>
+                        Focos: {cell.count}<br />
+                        FRP máximo: {cell.max_frp}<br />
+                        Confianza máxima: {cell.max_confidence}
+                    </Popup>
+                </CircleMarker>
+            ))}
             {wildFires.map(fire => (
                 <Marker
                     key={fire.id}
@@ -62,4 +123,4 @@ const WildFiresMap = () => {
     );
 };
 
-export default WildFiresMap;
\ No newline at end of file
+export default WildFiresMap;
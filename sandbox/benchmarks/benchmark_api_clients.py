@@ -0,0 +1,47 @@
+# sandbox/benchmarks/benchmark_api_clients.py
+"""Measures latency, concurrency and retry behaviour of the async API clients against the fake server.
+
+Run from the repository root:
+    python -m sandbox.benchmarks.benchmark_api_clients
+"""
+import os
+import time
+import asyncio
+
+from app.external_apis.clients import AppEEARSClient, FIRMSClient
+from tests.fake_nasa_apis import fake_nasa_server
+
+REQUESTS = 64
+LATENCY = 0.1
+
+async def run(pool_size: int, fail_every: int = 0):
+    async with fake_nasa_server(latency=LATENCY, fail_every=fail_every) as server:
+        appears = AppEEARSClient(base_url=f"{server.url}/api", pool_size=pool_size, backoff=0.05)
+        firms = FIRMSClient(base_url=f"{server.url}/firms/api", pool_size=pool_size, backoff=0.05)
+        status, task = await appears.submit_task({"task_type": "area"})
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[appears.task_status(task["task_id"]) for _ in range(REQUESTS // 2)],
+            *[firms.country_csv("MODIS_NRT", "ARG", 3) for _ in range(REQUESTS // 2)]
+        )
+        elapsed = time.perf_counter() - start
+        await appears.close()
+        await firms.close()
+
+        ok = sum(1 for status, _ in responses if status == 200)
+        print(f"pool={pool_size:>3} fail_every={fail_every:>2} ok={ok}/{REQUESTS} "
+              f"elapsed={elapsed:.2f}s sequential={REQUESTS * LATENCY:.2f}s "
+              f"logins={server.stats['logins']} peak_in_flight={server.stats['max_in_flight']} "
+              f"failures_retried={server.stats['failures']}")
+
+async def main():
+    os.environ.setdefault("APPEARS_USER", "fake")
+    os.environ.setdefault("APPEARS_PASS", "fake")
+    os.environ.setdefault("FIRMS_MAP_KEY", "fake")
+    for pool_size in (1, 8, 32):
+        await run(pool_size)
+    await run(16, fail_every=5)
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+# sandbox/benchmarks/benchmark_extract_tif.py
+"""Compares the per-pixel raster loop against the vectorized scene parser (assemble_scene) on synthetic GeoTIFFs.
+
+Run from the repository root:
+    python -m sandbox.benchmarks.benchmark_extract_tif
+"""
+import os
+import time
+import tempfile
+import rasterio
+import numpy as np
+from rasterio.transform import from_origin
+
+from app.external_apis.appears.hls_scenes import assemble_scene, parse_hls_file_name
+
+SIZES = [64, 256, 512, 1024, 2048]
+LEGACY_MAX_SIZE = 512  # The per-pixel loop takes minutes beyond this size
+PIXEL_SIZE = 0.00026949458523585647  # 30 m in degrees, as returned by AppEEARS in geographic projection
+
+def write_synthetic_tif(path: str, size: int):
+    """Writes a single band int16 GeoTIFF with a nodata border, like an AppEEARS area output."""
+    data = np.random.randint(0, 10000, size=(size, size), dtype=np.int16)
+    data[:, : size // 10] = -9999
+    profile = {
+        'driver': 'GTiff',
+        'height': size,
+        'width': size,
+        'count': 1,
+        'dtype': 'int16',
+        'crs': 'EPSG:4326',
+        'transform': from_origin(-60.0, -34.0, PIXEL_SIZE, PIXEL_SIZE),
+        'nodata': -9999
+    }
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(data, 1)
+
+def legacy_extract(file_path: str):
+    """The original row/column loop, kept here as the baseline."""
+    data_points = []
+    with rasterio.open(file_path) as src:
+        band_data = src.read(1)
+        for row in range(src.height):
+            for col in range(src.width):
+                longitude, latitude = src.xy(row, col)
+                data_points.append({
+                    'latitude': latitude,
+                    'longitude': longitude,
+                    'value': band_data[row, col]
+                })
+    return data_points
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        print(f"{'pixels':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+        for size in SIZES:
+            file_name = f"HLSS30.020_B04_doy2024180_aid0001_{size}.tif"
+            file_path = os.path.join(tmp_dir, file_name)
+            write_synthetic_tif(file_path, size)
+
+            file_info = parse_hls_file_name(file_name)
+            start = time.perf_counter()
+            assemble_scene({file_info['layer']: file_path}, file_info['date'])
+            vectorized = time.perf_counter() - start
+
+            if size <= LEGACY_MAX_SIZE:
+                start = time.perf_counter()
+                legacy_extract(file_path)
+                legacy = time.perf_counter() - start
+                print(f"{size * size:>10} {legacy:>12.3f} {vectorized:>15.4f} {legacy / vectorized:>8.0f}x")
+            else:
+                print(f"{size * size:>10} {'-':>12} {vectorized:>15.4f} {'-':>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# sandbox/benchmarks/benchmark_firms_ingest.py
+"""Measures FIRMS CSV parse and insert throughput on the recorded VIIRS fixture.
+
+The fixture is repeated to reach country sized, multi-day pulls. Parsing is compared
+against the original per-field split loop; inserts need the database configured in
+app.database.database and are skipped when it cannot be reached. Each insert runs in
+a transaction that is rolled back, so no detection is left in wildfire_data.
+
+Run from the repository root:
+    python -m sandbox.benchmarks.benchmark_firms_ingest
+"""
+import os
+import time
+import asyncio
+from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import WildFireData
+from app.database.database import engine
+from app.external_apis.firms.wildfires import iter_firms_chunks, firms_records, store_firms_csv
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "fixtures", "firms_viirs_snpp_arg.csv")
+SIZES = [10_000, 100_000, 500_000]
+LEGACY_MAX_SIZE = 100_000
+
+def build_csv(rows: int) -> str:
+    with open(FIXTURE) as f:
+        header, *lines = f.read().splitlines()
+    repeated = (lines * (rows // len(lines) + 1))[:rows]
+    return "\n".join([header, *repeated]) + "\n"
+
+def legacy_parse(csv_text: str) -> list:
+    """The original parsing of get_wildfires, on the MODIS column names it expected."""
+    data = csv_text.replace('bright_ti4', 'brightness').replace('bright_ti5', 'bright_t31').splitlines()
+    header = data[0].split(',')
+    return [
+        WildFireData(
+            latitude=float(row.split(',')[header.index('latitude')]),
+            longitude=float(row.split(',')[header.index('longitude')]),
+            brightness=float(row.split(',')[header.index('brightness')]),
+            scan=float(row.split(',')[header.index('scan')]),
+            track=float(row.split(',')[header.index('track')]),
+            acq_date=datetime.strptime(row.split(',')[header.index('acq_date')], '%Y-%m-%d'),
+            acq_time=row.split(',')[header.index('acq_time')],
+            satellite=row.split(',')[header.index('satellite')],
+            confidence=row.split(',')[header.index('confidence')],
+            version=row.split(',')[header.index('version')],
+            bright_t31=float(row.split(',')[header.index('bright_t31')]),
+            frp=float(row.split(',')[header.index('frp')]),
+            daynight=row.split(',')[header.index('daynight')],
+            location=f"POINT({row.split(',')[header.index('longitude')]} {row.split(',')[header.index('latitude')]})"
+        ) for row in data[1:]
+    ]
+
+def parse(csv_text: str) -> int:
+    rows = 0
+    for chunk in iter_firms_chunks(csv_text):
+        rows += sum(1 for _ in firms_records(chunk))
+    return rows
+
+async def insert(csv_text: str) -> float:
+    """Times store_firms_csv inside an outer transaction that is rolled back afterwards.
+
+    The session joins the transaction with savepoints, so the commit of
+    store_firms_csv only releases its savepoint.
+    """
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            async with AsyncSession(bind=connection, join_transaction_mode="create_savepoint") as db:
+                start = time.perf_counter()
+                await store_firms_csv(csv_text, db)
+                return time.perf_counter() - start
+        finally:
+            await transaction.rollback()
+
+async def main():
+    print(f"{'rows':>8} {'legacy parse/s':>15} {'parse/s':>12} {'insert/s':>12}")
+    database_available = True
+    for rows in SIZES:
+        csv_text = build_csv(rows)
+
+        start = time.perf_counter()
+        parse(csv_text)
+        parse_rate = rows / (time.perf_counter() - start)
+
+        legacy_rate = '-'
+        if rows <= LEGACY_MAX_SIZE:
+            start = time.perf_counter()
+            legacy_parse(csv_text)
+            legacy_rate = f"{rows / (time.perf_counter() - start):,.0f}"
+
+        insert_rate = '-'
+        if database_available:
+            try:
+                insert_rate = f"{rows / await insert(csv_text):,.0f}"
+            except (OSError, ConnectionError) as e:
+                print(f"Database not reachable, skipping inserts: {e}")
+                database_available = False
+        print(f"{rows:>8} {legacy_rate:>15} {parse_rate:>12,.0f} {insert_rate:>12}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,117 @@
+# sandbox/benchmarks/benchmark_hls_s3.py
+"""Reads the window of a place from fixture HLS COGs through the S3 path, against the fake server.
+
+Fixture granules (every HLSS30 or HLSL30 band and Fmask, UTM tiles of 1830x1830 px
+as COGs, one of them mostly cloudy) are served S3 path-style by the fake NASA server, which
+also answers the STAC search and the S3 credentials. For each granule it reports
+the read latency with a cold and a warm tile cache, and the bytes fetched against
+the size of the files. Only the layers of layer_profile are read; the scenes are
+assembled with the ingest code but not written.
+
+Run from the repository root:
+    python -m sandbox.benchmarks.benchmark_hls_s3
+"""
+import os
+import time
+import asyncio
+import tempfile
+import rasterio
+import numpy as np
+from datetime import date
+from shapely.geometry import box
+from rasterio.io import MemoryFile
+from rasterio.shutil import copy as copy_raster
+from rasterio.transform import from_origin
+from rasterio.warp import transform_bounds
+
+from app.external_apis.clients import appears_client, cmr_stac_client
+from app.external_apis.hls_s3.stac import search_hls_granules
+from app.external_apis.hls_s3.ingest import read_granule
+from app.external_apis.hls_s3.cog_reader import HlsCogReader
+from app.external_apis.appears.hls_scenes import assemble_scene
+from tests.fake_nasa_apis import fake_nasa_server
+
+SIZE = 1830
+CRS = 'EPSG:32720'  # UTM 20S
+WEST, NORTH = 300000.0, 6200040.0
+BUCKET = "lp-prod-protected"
+GRANULES = [("HLS.S30.T20HNH.2024170T140051.v2.0", 0.0), ("HLS.L30.T20HNH.2024172T135712.v2.0", 0.3),
+            ("HLS.S30.T20HNH.2024175T140049.v2.0", 0.95), ("HLS.S30.T20HNH.2024180T140051.v2.0", 0.1)]
+PRODUCT_LAYERS = {
+    "HLSS30": ["B01", "B02", "B03", "B04", "B05", "B06", "B07", "B08", "B09", "B10", "B11", "B12", "B8A"],
+    "HLSL30": ["B01", "B02", "B03", "B04", "B05", "B06", "B07", "B09", "B10", "B11"],
+}
+PLACE_SIZE = 2000  # metres
+LATENCY = 0.02
+
+def write_cog(path: str, data: np.ndarray, nodata):
+    profile = {'driver': 'GTiff', 'height': SIZE, 'width': SIZE, 'count': 1, 'dtype': data.dtype.name,
+               'crs': CRS, 'transform': from_origin(WEST, NORTH, 30, 30), 'nodata': nodata}
+    with MemoryFile() as memory_file:
+        with memory_file.open(**profile) as dataset:
+            dataset.write(data, 1)
+        with memory_file.open() as dataset:
+            copy_raster(dataset, path, driver='COG', compress='DEFLATE', blocksize=256)
+
+def write_fixture_granules(s3_dir: str) -> int:
+    """HLS-like granules: smooth fields with noise, Fmask cloudy on `cloud_fraction` of the rows."""
+    rng = np.random.default_rng(0)
+    rows, cols = np.mgrid[0:SIZE, 0:SIZE] / SIZE
+    field = np.sin(rows * 7) * np.cos(cols * 5)
+    for granule_id, cloud_fraction in GRANULES:
+        product = f"HLS{granule_id.split('.')[1]}"
+        directory = os.path.join(s3_dir, BUCKET, f"{product}.020", granule_id)
+        os.makedirs(directory)
+        for index, layer in enumerate(PRODUCT_LAYERS[product]):
+            data = 1500 + 800 * field * (1 + index / 10) + rng.normal(0, 40, (SIZE, SIZE))
+            write_cog(os.path.join(directory, f"{granule_id}.{layer}.tif"), data.astype(np.int16), -9999)
+        fmask = np.zeros((SIZE, SIZE), dtype=np.uint8)
+        fmask[: int(SIZE * cloud_fraction)] = 0b10
+        write_cog(os.path.join(directory, f"{granule_id}.Fmask.tif"), fmask, 255)
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(s3_dir) for name in names)
+
+def place_geometry():
+    """A PLACE_SIZE square in the middle of the tile, in lon/lat."""
+    centre_x, centre_y = WEST + SIZE * 15, NORTH - SIZE * 15
+    half = PLACE_SIZE / 2
+    return box(*transform_bounds(CRS, 'EPSG:4326', centre_x - half, centre_y - half, centre_x + half, centre_y + half))
+
+async def timed_read(granule: dict, geometry, reader: HlsCogReader) -> tuple:
+    start = time.perf_counter()
+    files, skipped = await read_granule(granule, 1, geometry, reader)
+    elapsed = time.perf_counter() - start
+    scene = assemble_scene({layer: memory_file.name for layer, memory_file in files.items()},
+                           granule['date'], 1, geometry) if files else None
+    for memory_file in files.values():
+        memory_file.close()
+    return elapsed, skipped, scene
+
+async def main():
+    os.environ.setdefault("APPEARS_USER", "fake")
+    os.environ.setdefault("APPEARS_PASS", "fake")
+    with tempfile.TemporaryDirectory() as s3_dir:
+        total_bytes = write_fixture_granules(s3_dir)
+        async with fake_nasa_server(latency=LATENCY, s3_dir=s3_dir) as server:
+            appears_client.base_url = f"{server.url}/api"
+            cmr_stac_client.base_url = f"{server.url}/stac"
+            reader = HlsCogReader(endpoint=f"{server.url}/s3")
+            geometry = place_geometry()
+
+            start = time.perf_counter()
+            granules = await search_hls_granules(geometry.__geo_interface__, date(2024, 6, 1), date(2024, 6, 30))
+            print(f"STAC search: {len(granules)} granules in {time.perf_counter() - start:.3f}s")
+            print(f"{'granule':<36} {'cold (s)':>9} {'warm (s)':>9} {'pixels':>7} {'outcome':>8}")
+            for granule in granules:
+                cold, skipped, scene = await timed_read(granule, geometry, reader)
+                warm, _, _ = await timed_read(granule, geometry, reader)
+                outcome = "skipped" if skipped else "kept"
+                pixels = scene['pixels'] if scene else 0
+                print(f"{granule['id']:<36} {cold:>9.3f} {warm:>9.3f} {pixels:>7} {outcome:>8}")
+
+            print(f"Fetched {server.stats['s3_bytes']:,} bytes in {server.stats['s3_requests']} S3 requests, "
+                  f"the files hold {total_bytes:,} bytes ({server.stats['s3_bytes'] / total_bytes:.1%})")
+        await appears_client.close()
+        await cmr_stac_client.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
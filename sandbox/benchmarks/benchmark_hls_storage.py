@@ -0,0 +1,195 @@
+# sandbox/benchmarks/benchmark_hls_storage.py
+"""Compares the row per pixel layout of harmonized_landsat_sentinel_data against one COG per scene.
+
+Synthetic AppEEARS-like scenes (13 bands, Fmask and angles) are assembled with the
+ingest code, then stored both ways. For each layout it reports the bytes stored and
+the latency of the two reads the API makes: every NDVI pixel of a date (heatmap)
+and the pixels of a small bbox (a tile at zoom 14).
+
+The row layout needs the database configured in app.database.database; it is
+skipped when the database cannot be reached, and only an estimate of the heap size
+from the column layout is printed.
+
+Run from the repository root:
+    python -m sandbox.benchmarks.benchmark_hls_storage
+"""
+import os
+import time
+import asyncio
+import tempfile
+import rasterio
+import mercantile
+import numpy as np
+from datetime import date, datetime
+from sqlalchemy import text
+from rasterio.transform import from_origin
+
+from app.models import Place
+from app.storage.cog_store import CogStore
+from app.tiles.render import tile_query_bounds
+from app.database.database import async_session, get_asyncpg_connection
+from app.external_apis.appears.hls_scenes import assemble_scene
+from app.external_apis.appears.utils_appears import BAND_NAME_MAP
+from app.external_apis.appears.harmonized_landsat_sentinel_data import bulk_store_scene_in_db
+
+SIZES = [256, 512, 1024]
+REPEATS = 5
+PIXEL_SIZE = 0.00026949458523585647  # 30 m in degrees, as returned by AppEEARS in geographic projection
+WEST, NORTH = -60.0, -34.0
+TILE_ZOOM = 14
+CAPTURE_DATE = date(2024, 7, 1)
+
+def write_layer(path: str, data: np.ndarray, nodata):
+    profile = {
+        'driver': 'GTiff',
+        'height': data.shape[0],
+        'width': data.shape[1],
+        'count': 1,
+        'dtype': data.dtype.name,
+        'crs': 'EPSG:4326',
+        'transform': from_origin(WEST, NORTH, PIXEL_SIZE, PIXEL_SIZE),
+        'nodata': nodata
+    }
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(data, 1)
+
+def write_synthetic_scene(directory: str, size: int) -> dict:
+    """Smooth fields plus sensor noise, a cloud in one corner and near constant angles."""
+    rng = np.random.default_rng(size)
+    rows, cols = np.mgrid[0:size, 0:size] / size
+    field = np.sin(rows * 7) * np.cos(cols * 5)
+    paths = {}
+    for index, layer in enumerate(BAND_NAME_MAP):
+        data = 1500 + 800 * field * (1 + index / 10) + rng.normal(0, 40, (size, size))
+        paths[layer] = os.path.join(directory, f"{layer}.tif")
+        write_layer(paths[layer], data.astype(np.int16), -9999)
+    fmask = np.zeros((size, size), dtype=np.uint8)
+    fmask[: size // 5, : size // 5] = 0b10  # cloud
+    paths['fmask'] = os.path.join(directory, "fmask.tif")
+    write_layer(paths['fmask'], fmask, 255)
+    for layer in ['saa', 'sza', 'vaa', 'vza']:
+        paths[layer] = os.path.join(directory, f"{layer}.tif")
+        write_layer(paths[layer], (3000 + rows * 50).astype(np.uint16), 40000)
+    return paths
+
+def timed(function, *args) -> float:
+    """Median seconds of REPEATS calls."""
+    durations = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        function(*args)
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations))
+
+async def timed_async(function, *args) -> float:
+    durations = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await function(*args)
+        durations.append(time.perf_counter() - start)
+    return float(np.median(durations))
+
+def tile_bounds(size: int) -> tuple:
+    """Padded bounds of the zoom 14 tile over the centre of the scene."""
+    centre = WEST + size * PIXEL_SIZE / 2, NORTH - size * PIXEL_SIZE / 2
+    tile = mercantile.tile(*centre, TILE_ZOOM)
+    return tile_query_bounds(tile.z, tile.x, tile.y)
+
+def estimated_row_bytes(scene: dict) -> int:
+    """Heap bytes of one pixel row from the column layout, without indexes or page overhead.
+
+    Tuple header with null bitmap, id, place_id, capture_date, the geography point, pixel_key,
+    one float per band and index column (stored or NULL) and the additional_data jsonb.
+    """
+    float_columns = len(BAND_NAME_MAP) + 5
+    additional_data = 16 + 28 * len(scene['additional_data'])
+    return 32 + 4 + 4 + 8 + 32 + 8 + 8 * float_columns + additional_data
+
+def cog_layout(scene: dict, directory: str, bounds: tuple) -> dict:
+    store = CogStore(os.path.join(directory, "store"))
+    key = store.key(0, scene['date'], 'HLSS30', 'mosaic')
+    start = time.perf_counter()
+    written = store.write_scene(key, scene)
+    return {
+        "bytes": written['size_bytes'],
+        "write": time.perf_counter() - start,
+        "heatmap": timed(store.read_points, key, 'ndvi'),
+        "tile": timed(store.read_points, key, 'ndvi', bounds),
+    }
+
+async def relation_bytes(db) -> int:
+    result = await db.execute(text("""
+        SELECT COALESCE(sum(pg_total_relation_size(inhrelid)), 0)
+        FROM pg_inherits WHERE inhparent = 'harmonized_landsat_sentinel_data'::regclass
+    """))
+    return int(result.scalar())
+
+async def rows_layout(scene: dict, bounds: tuple) -> dict:
+    capture_date = datetime.combine(scene['date'], datetime.min.time())
+    west, south, east, north = bounds
+    async with async_session() as db:
+        place = Place(name="benchmark_hls_storage", description="Removed by the benchmark",
+                      location=f"SRID=4326;POLYGON(({WEST} {NORTH}, {WEST + 1} {NORTH}, {WEST + 1} {NORTH - 1}, "
+                               f"{WEST} {NORTH - 1}, {WEST} {NORTH}))")
+        db.add(place)
+        await db.commit()
+        await db.refresh(place)
+        place_id = place.id
+        try:
+            before = await relation_bytes(db)
+            start = time.perf_counter()
+            await bulk_store_scene_in_db(place_id, scene, db)
+            write = time.perf_counter() - start
+            await db.execute(text("ANALYZE harmonized_landsat_sentinel_data"))
+            stored = await relation_bytes(db) - before
+
+            connection = await get_asyncpg_connection(db)
+            heatmap = await timed_async(connection.fetch, """
+                SELECT ST_X(location::geometry), ST_Y(location::geometry), ndvi
+                FROM harmonized_landsat_sentinel_data
+                WHERE place_id = $1 AND ndvi IS NOT NULL AND capture_date = $2
+            """, place_id, capture_date)
+            tile = await timed_async(connection.fetch, """
+                SELECT ST_X(location::geometry), ST_Y(location::geometry), ndvi
+                FROM harmonized_landsat_sentinel_data
+                WHERE place_id = $1 AND capture_date = $2 AND ndvi IS NOT NULL
+                  AND ST_X(location::geometry) BETWEEN $3 AND $4
+                  AND ST_Y(location::geometry) BETWEEN $5 AND $6
+            """, place_id, capture_date, west, east, south, north)
+        finally:
+            # The pixels go with the place through ON DELETE CASCADE
+            await db.rollback()
+            await db.execute(text("DELETE FROM places WHERE id = :id"), {"id": place_id})
+            await db.commit()
+    return {"bytes": stored, "write": write, "heatmap": heatmap, "tile": tile}
+
+async def main():
+    database_available = True
+    print(f"{'pixels':>9} {'layout':>6} {'stored bytes':>14} {'bytes/px':>9} {'write (s)':>10} "
+          f"{'heatmap (ms)':>13} {'tile (ms)':>10}")
+    for size in SIZES:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scene = assemble_scene(write_synthetic_scene(tmp_dir, size), CAPTURE_DATE)
+            bounds = tile_bounds(size)
+            pixels = scene['pixels']
+
+            cog = cog_layout(scene, tmp_dir, bounds)
+            print(f"{pixels:>9} {'cog':>6} {cog['bytes']:>14,} {cog['bytes'] / pixels:>9.1f} {cog['write']:>10.3f} "
+                  f"{cog['heatmap'] * 1000:>13.1f} {cog['tile'] * 1000:>10.2f}")
+
+            if database_available:
+                try:
+                    rows = await rows_layout(scene, bounds)
+                    print(f"{pixels:>9} {'rows':>6} {rows['bytes']:>14,} {rows['bytes'] / pixels:>9.1f} "
+                          f"{rows['write']:>10.3f} {rows['heatmap'] * 1000:>13.1f} {rows['tile'] * 1000:>10.2f}")
+                    continue
+                except (OSError, ConnectionError) as e:
+                    print(f"Database not reachable, skipping the row layout: {e}")
+                    database_available = False
+            row_bytes = estimated_row_bytes(scene)
+            print(f"{pixels:>9} {'rows':>6} {row_bytes * pixels:>13,}* {row_bytes:>9.1f} {'-':>10} {'-':>13} {'-':>10}")
+    if not database_available:
+        print("* heap estimate from the column layout, indexes excluded")
+
+if __name__ == "__main__":
+    asyncio.run(main())
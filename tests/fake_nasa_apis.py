@@ -0,0 +1,239 @@
+# tests/fake_nasa_apis.py
+"""Local stand-in for the AppEEARS, FIRMS and CMR-STAC APIs and the LP DAAC bucket, to exercise the clients offline.
+
+Every request waits `latency` seconds, and every `fail_every`-th request is answered
+with `fail_status` (503 by default, with a Retry-After header when `retry_after` is
+set) so the retry path gets exercised. AppEEARS calls need a token issued by the
+login; `revoke_tokens` makes the next calls answer 401. The server keeps counters of
+logins, requests, failures and the peak number of requests in flight.
+
+With `s3_dir`, the files under it are served S3 path-style at /s3/<bucket>/<key>
+(range requests included, for GDAL's /vsis3 with AWS_S3_ENDPOINT pointing here) and
+the granules laid out as <bucket>/<product>/<granule id>/<granule id>.<layer>.tif are
+returned by the STAC search at /stac/search. S3 reads must be signed with an access
+key from /api/s3credentials, valid `credentials_ttl` seconds; `revoke_s3_credentials`
+makes the next reads answer 403, and `refuse_s3_reads` every read from then on.
+
+Point the app at it with:
+    APPEARS_API_URL=http://127.0.0.1:8089/api FIRMS_API_URL=http://127.0.0.1:8089/firms/api
+    python -m tests.fake_nasa_apis
+"""
+import os
+import re
+import uuid
+import asyncio
+from aiohttp import web
+from collections import Counter
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+FIRMS_HEADER = "latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight"
+FIRMS_ROW = "-27.46,-58.98,310.2,1.0,1.0,{date},0412,Terra,MODIS,{confidence},6.1NRT,290.5,12.3,N"
+BUNDLE_FILE_SIZE = 256 * 1024
+# AppEEARS paths that need a bearer token
+AUTHORIZED_PREFIXES = ("/api/task", "/api/status", "/api/bundle")
+# e.g. HLS.S30.T20HNH.2024180T135719.v2.0
+# Access key of a SigV4 Authorization header
+CREDENTIAL_PATTERN = re.compile(r"Credential=(?P<access_key>[^/]+)/")
+GRANULE_PATTERN = re.compile(r"^HLS\.(?P<sensor>[SL]30)\.T\w+\.(?P<doy>\d{7})T\d{6}\.v2\.0$")
+
+class FakeNASAServer:
+
+    def __init__(self, latency: float = 0.05, fail_every: int = 0, polls_until_done: int = 2, s3_dir: str = None,
+                 fail_status: int = 503, retry_after: int = None, credentials_ttl: int = 3600):
+        self.latency = latency
+        self.fail_every = fail_every
+        self.fail_status = fail_status
+        self.retry_after = retry_after
+        self.tokens = set()
+        self.credentials_ttl = credentials_ttl
+        self.s3_access_keys = set()
+        self.s3_reads_refused = False
+        self.s3_key_requests = Counter()  # Requests per S3 key
+        self.polls_until_done = polls_until_done
+        self.s3_dir = s3_dir
+        self.stats = {"requests": 0, "logins": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0,
+                      "s3_credentials": 0, "s3_requests": 0, "s3_bytes": 0}
+        self.tasks = {}
+        self.url = None
+
+    @web.middleware
+    async def simulate_network(self, request, handler):
+        self.stats["requests"] += 1
+        request_number = self.stats["requests"]
+        self.stats["in_flight"] += 1
+        self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+        try:
+            await asyncio.sleep(self.latency)
+            if self.fail_every and request_number % self.fail_every == 0:
+                self.stats["failures"] += 1
+                headers = {"Retry-After": str(self.retry_after)} if self.retry_after is not None else {}
+                return web.Response(status=self.fail_status, text="Service Unavailable", headers=headers)
+            if request.path.startswith(AUTHORIZED_PREFIXES) and \
+                    request.headers.get("Authorization", "").removeprefix("Bearer ") not in self.tokens:
+                return web.json_response({"message": "You are not authorized"}, status=401)
+            return await handler(request)
+        finally:
+            self.stats["in_flight"] -= 1
+
+    def revoke_tokens(self):
+        self.tokens.clear()
+
+    def revoke_s3_credentials(self):
+        self.s3_access_keys.clear()
+
+    def refuse_s3_reads(self):
+        self.s3_reads_refused = True
+
+    async def login(self, request):
+        self.stats["logins"] += 1
+        expiration = datetime.now(timezone.utc) + timedelta(hours=48)
+        token = uuid.uuid4().hex
+        self.tokens.add(token)
+        return web.json_response({"token": token, "token_type": "Bearer",
+                                  "expiration": expiration.strftime('%Y-%m-%dT%H:%M:%SZ')})
+
+    async def submit_task(self, request):
+        task_id = str(uuid.uuid4())
+        self.tasks[task_id] = {"polls": 0, "params": await request.json()}
+        return web.json_response({"task_id": task_id, "status": "pending"}, status=202)
+
+    def _task_status(self, task_id: str) -> dict:
+        task = self.tasks[task_id]
+        task["polls"] += 1
+        status = "done" if task["polls"] > self.polls_until_done else "processing"
+        return {"task_id": task_id, "status": status}
+
+    async def task_status(self, request):
+        task_id = request.match_info["task_id"]
+        if task_id not in self.tasks:
+            return web.json_response({"message": "Task not found"}, status=404)
+        return web.json_response(self._task_status(task_id))
+
+    async def all_task_statuses(self, request):
+        return web.json_response([self._task_status(task_id) for task_id in self.tasks])
+
+    async def bundle(self, request):
+        task_id = request.match_info["task_id"]
+        # One set of files per feature of the submitted area, numbered from aid0001 like AppEEARS does
+        # and one file per requested layer, HLSS30 and HLSL30 acquired on different days
+        task_params = self.tasks.get(task_id, {}).get("params", {}).get("params", {})
+        features = len(task_params.get("geo", {}).get("features", [])) or 1
+        layers = [(layer["product"], layer["layer"]) for layer in task_params.get("layers", [])] or \
+            [("HLSS30.020", layer) for layer in ("B04", "B8A", "Fmask")]
+        days = {"HLSS30.020": (170, 175, 180), "HLSL30.020": (172, 179)}
+        files = [
+            {"file_id": f"{product}-{layer}-{doy}-{aid}", "file_name": f"{product}_{layer}_doy2024{doy}_aid{aid:04d}.tif",
+             "file_size": BUNDLE_FILE_SIZE, "file_type": "tif"}
+            for aid in range(1, features + 1) for product, layer in layers for doy in days.get(product, (170,))
+        ]
+        return web.json_response({"task_id": task_id, "files": files})
+
+    async def bundle_file(self, request):
+        body = b"\0" * BUNDLE_FILE_SIZE
+        range_header = request.headers.get("Range")
+        if range_header:
+            offset = int(range_header.split("=")[1].rstrip("-"))
+            return web.Response(status=206, body=body[offset:])
+        return web.Response(body=body)
+
+    async def product(self, request):
+        return web.json_response({"ProductAndVersion": request.match_info["product_id"]})
+
+    async def s3_credentials(self, request):
+        self.stats["s3_credentials"] += 1
+        expiration = datetime.now(timezone.utc) + timedelta(seconds=self.credentials_ttl)
+        access_key = uuid.uuid4().hex
+        self.s3_access_keys.add(access_key)
+        return web.json_response({"accessKeyId": access_key, "secretAccessKey": "fake", "sessionToken": "fake",
+                                  "expiration": expiration.strftime('%Y-%m-%d %H:%M:%S+00:00')})
+
+    def _stac_items(self) -> list:
+        items = []
+        for root, _, file_names in os.walk(self.s3_dir or ""):
+            granule_id = os.path.basename(root)
+            match = GRANULE_PATTERN.match(granule_id)
+            if not match:
+                continue
+            acquired = datetime.strptime(match.group("doy"), "%Y%j").replace(tzinfo=timezone.utc)
+            assets = {}
+            for file_name in sorted(file_names):
+                key = os.path.relpath(os.path.join(root, file_name), self.s3_dir).replace(os.sep, "/")
+                layer = file_name[len(granule_id) + 1:-len(".tif")]
+                assets[layer] = {"href": f"https://data.lpdaac.earthdatacloud.nasa.gov/{key}"}
+            items.append({"type": "Feature", "id": granule_id, "collection": f"HLS{match.group('sensor')}_2.0",
+                          "properties": {"datetime": acquired.strftime('%Y-%m-%dT%H:%M:%S.000Z')},
+                          "assets": assets})
+        return sorted(items, key=lambda item: item["id"])
+
+    async def stac_search(self, request):
+        body = await request.json()
+        start, end = [datetime.fromisoformat(value.replace("Z", "+00:00")) for value in body["datetime"].split("/")]
+        items = [item for item in self._stac_items()
+                 if item["collection"] in body.get("collections", [item["collection"]])
+                 and start <= datetime.fromisoformat(item["properties"]["datetime"].replace("Z", "+00:00")) <= end]
+        limit, page = body.get("limit", 10), body.get("page", 1)
+        links = []
+        if page * limit < len(items):
+            links.append({"rel": "next", "method": "POST", "href": f"{self.url}/stac/search",
+                          "body": {**body, "page": page + 1}})
+        return web.json_response({"type": "FeatureCollection", "features": items[(page - 1) * limit:page * limit],
+                                  "links": links})
+
+    async def s3_object(self, request):
+        path = os.path.join(self.s3_dir or "", request.match_info["bucket"], request.match_info["key"])
+        credential = CREDENTIAL_PATTERN.search(request.headers.get("Authorization", ""))
+        if self.s3_reads_refused or not credential or credential.group("access_key") not in self.s3_access_keys:
+            return web.Response(status=403, text="AccessDenied")
+        if not os.path.isfile(path):
+            return web.Response(status=404, text="NoSuchKey")
+        self.stats["s3_requests"] += 1
+        self.s3_key_requests[f"{request.match_info['bucket']}/{request.match_info['key']}"] += 1
+        size = os.path.getsize(path)
+        if request.method == "GET":
+            # slice(None, None) without a Range header, negative start for suffix ranges
+            byte_range = request.http_range
+            start = byte_range.start or 0
+            self.stats["s3_bytes"] += min(byte_range.stop or size, size) - (size + start if start < 0 else start)
+        return web.FileResponse(path)
+
+    async def firms_country_csv(self, request):
+        days = int(request.match_info["days"])
+        today = datetime.now().date()
+        rows = [FIRMS_ROW.format(date=(today - timedelta(days=day)).isoformat(), confidence=50 + day)
+                for day in range(days)]
+        return web.Response(text="\n".join([FIRMS_HEADER] + rows), content_type="text/csv")
+
+    def app(self) -> web.Application:
+        app = web.Application(middlewares=[self.simulate_network])
+        app.router.add_post("/api/login", self.login)
+        app.router.add_post("/api/task", self.submit_task)
+        app.router.add_get("/api/task/{task_id}", self.task_status)
+        app.router.add_get("/api/status", self.all_task_statuses)
+        app.router.add_get("/api/bundle/{task_id}", self.bundle)
+        app.router.add_get("/api/bundle/{task_id}/{file_id}", self.bundle_file)
+        app.router.add_get("/api/product/{product_id}", self.product)
+        app.router.add_post("/api/s3credentials", self.s3_credentials)
+        app.router.add_get("/firms/api/country/csv/{map_key}/{satellite}/{country}/{days}", self.firms_country_csv)
+        app.router.add_post("/stac/search", self.stac_search)
+        app.router.add_get("/s3/{bucket}/{key:.+}", self.s3_object)
+        return app
+
+@asynccontextmanager
+async def fake_nasa_server(host: str = "127.0.0.1", port: int = 0, **kwargs):
+    """Runs a FakeNASAServer for the duration of the block; `server.url` is its base URL."""
+
+    server = FakeNASAServer(**kwargs)
+    runner = web.AppRunner(server.app())
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    server.url = f"http://{host}:{bound_port}"
+    try:
+        yield server
+    finally:
+        await runner.cleanup()
+
+if __name__ == "__main__":
+    web.run_app(FakeNASAServer().app(), host="127.0.0.1", port=8089)
@@ -0,0 +1,119 @@
+# tests/test_api_clients.py
+"""AppEEARS/FIRMS clients against the fake NASA server: retries, token handling and pool limits."""
+import time
+import asyncio
+import pytest
+
+from app.external_apis.clients import AppEEARSClient, FIRMSClient, APIError
+from tests.fake_nasa_apis import fake_nasa_server
+
+@pytest.fixture(autouse=True)
+def appears_credentials(monkeypatch):
+    monkeypatch.setenv("APPEARS_USER", "fake")
+    monkeypatch.setenv("APPEARS_PASS", "fake")
+    monkeypatch.setenv("FIRMS_MAP_KEY", "fake")
+
+def run(test, **server_options):
+    """Runs `test(server)` against a fake server started for it."""
+
+    async def main():
+        async with fake_nasa_server(**server_options) as server:
+            return await test(server)
+    return asyncio.run(main())
+
+@pytest.mark.parametrize("fail_status", [429, 500, 502, 503, 504])
+def test_retries_retryable_statuses(fail_status):
+    async def test(server):
+        client = FIRMSClient(base_url=f"{server.url}/firms/api", backoff=0.01)
+        try:
+            responses = [await client.country_csv("MODIS_NRT", "ARG", 1) for _ in range(4)]
+        finally:
+            await client.close()
+        assert [status for status, _ in responses] == [200] * 4
+        # Requests 2, 4 and 6 fail and are retried
+        assert server.stats["failures"] == 3
+
+    run(test, latency=0, fail_every=2, fail_status=fail_status)
+
+def test_honours_retry_after():
+    async def test(server):
+        client = FIRMSClient(base_url=f"{server.url}/firms/api", backoff=0.01)
+        try:
+            await client.country_csv("MODIS_NRT", "ARG", 1)
+            # The next request gets a 429
+            started_at = time.perf_counter()
+            status, _ = await client.country_csv("MODIS_NRT", "ARG", 1)
+        finally:
+            await client.close()
+        assert status == 200
+        # The backoff alone would retry after a few milliseconds
+        assert time.perf_counter() - started_at >= 1
+        assert server.stats["failures"] == 1
+
+    run(test, latency=0, fail_every=2, fail_status=429, retry_after=1)
+
+def test_gives_up_after_max_retries():
+    async def test(server):
+        client = FIRMSClient(base_url=f"{server.url}/firms/api", backoff=0.01, max_retries=2)
+        try:
+            status, _ = await client.country_csv("MODIS_NRT", "ARG", 1)
+        finally:
+            await client.close()
+        # The last answer is handed back to the caller once the retries are spent
+        assert status == 503
+        assert server.stats["requests"] == 3
+
+    run(test, latency=0, fail_every=1)
+
+def test_connection_errors_raise_api_error():
+    async def test():
+        client = FIRMSClient(base_url="http://127.0.0.1:9", backoff=0.01, max_retries=1)
+        try:
+            with pytest.raises(APIError):
+                await client.country_csv("MODIS_NRT", "ARG", 1)
+        finally:
+            await client.close()
+
+    asyncio.run(test())
+
+def test_reuses_the_token():
+    async def test(server):
+        client = AppEEARSClient(base_url=f"{server.url}/api")
+        try:
+            status, task = await client.submit_task({"task_type": "area"})
+            responses = await asyncio.gather(*[client.task_status(task["task_id"]) for _ in range(10)])
+        finally:
+            await client.close()
+        assert status == 202
+        assert {status for status, _ in responses} == {200}
+        assert server.stats["logins"] == 1
+
+    run(test, latency=0.01)
+
+def test_logs_in_again_on_401():
+    async def test(server):
+        client = AppEEARSClient(base_url=f"{server.url}/api")
+        try:
+            _, task = await client.submit_task({"task_type": "area"})
+            server.revoke_tokens()
+            status, body = await client.task_status(task["task_id"])
+        finally:
+            await client.close()
+        assert status == 200
+        assert body["task_id"] == task["task_id"]
+        assert server.stats["logins"] == 2
+
+    run(test, latency=0)
+
+@pytest.mark.parametrize("pool_size", [1, 4])
+def test_pool_size_limits_concurrency(pool_size):
+    async def test(server):
+        client = FIRMSClient(base_url=f"{server.url}/firms/api", pool_size=pool_size)
+        try:
+            responses = await asyncio.gather(*[client.country_csv("MODIS_NRT", "ARG", 1) for _ in range(12)])
+        finally:
+            await client.close()
+        assert {status for status, _ in responses} == {200}
+        assert server.stats["max_in_flight"] == pool_size
+
+    run(test, latency=0.05)
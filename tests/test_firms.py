@@ -0,0 +1,53 @@
+# tests/test_firms.py
+"""Chunked parsing of FIRMS CSVs into typed columns."""
+import pytest
+import numpy as np
+import pandas as pd
+
+from app.external_apis.firms.wildfires import FIRMS_COLUMNS, iter_firms_chunks, firms_records
+
+MODIS_CSV = """latitude,longitude,brightness,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_t31,frp,daynight
+-34.5,-58.4,320.1,1.0,1.0,2024-06-01,0042,Terra,MODIS,85,6.1NRT,290.2,12.5,N
+-34.6,-58.5,330.4,1.1,1.0,2024-06-01,1305,Aqua,MODIS,20,6.1NRT,295.0,30.0,D
+-31.2,-64.1,310.0,1.2,1.1,2024-06-02,0310,Terra,MODIS,55,6.1NRT,288.9,8.0,N
+"""
+VIIRS_CSV = """latitude,longitude,bright_ti4,scan,track,acq_date,acq_time,satellite,instrument,confidence,version,bright_ti5,frp,daynight
+-27.1,-55.9,340.5,0.39,0.36,2024-06-03,0518,N,VIIRS,nominal,2.0NRT,291.7,4.2,N
+"""
+
+def parse(csv_text: str, chunk_size: int = 1000) -> list:
+    return list(iter_firms_chunks(csv_text, chunk_size=chunk_size))
+
+@pytest.mark.parametrize("chunk_size, chunk_rows", [(1000, [3]), (3, [3]), (2, [2, 1]), (1, [1, 1, 1])])
+def test_chunks(chunk_size, chunk_rows):
+    chunks = parse(MODIS_CSV, chunk_size)
+    assert [len(chunk) for chunk in chunks] == chunk_rows
+    assert pd.concat(chunks)['frp'].tolist() == [12.5, 30.0, 8.0]
+
+def test_modis_columns():
+    chunk, = parse(MODIS_CSV)
+    assert list(chunk.columns) == FIRMS_COLUMNS
+    assert chunk['brightness'].dtype == np.float64 and chunk['latitude'].tolist() == [-34.5, -34.6, -31.2]
+    assert chunk['acq_date'].tolist() == [pd.Timestamp(2024, 6, 1), pd.Timestamp(2024, 6, 1), pd.Timestamp(2024, 6, 2)]
+    # Texts are kept as sent, leading zeros included
+    assert chunk['acq_time'].tolist() == ['0042', '1305', '0310']
+    assert chunk['confidence'].tolist() == ['85', '20', '55']
+    assert chunk['version'].tolist() == ['6.1NRT'] * 3
+
+def test_viirs_brightness_aliases():
+    chunk, = parse(VIIRS_CSV)
+    assert chunk['brightness'].tolist() == [340.5] and chunk['bright_t31'].tolist() == [291.7]
+    assert chunk['confidence'].tolist() == ['nominal'] and chunk['version'].tolist() == ['2.0NRT']
+
+def test_missing_columns_come_back_empty():
+    chunk, = parse("latitude,longitude,acq_date,acq_time\n-34.5,-58.4,2024-06-01,0042\n")
+    assert list(chunk.columns) == FIRMS_COLUMNS
+    assert np.isnan(chunk['frp'][0]) and chunk['satellite'].isna().all()
+
+def test_records_in_column_order():
+    chunk, = parse(MODIS_CSV + "-30.0,-60.0,300.0,1.0,1.0,2024-06-02,2359,Aqua,MODIS,,6.1NRT,280.0,1.0,\n")
+    records = list(firms_records(chunk))
+    assert records[0] == (-34.5, -58.4, 320.1, 1.0, 1.0, 290.2, 12.5, pd.Timestamp(2024, 6, 1), '0042', 'Terra',
+                          '85', '6.1NRT', 'N')
+    # Missing texts are sent as None, not NaN
+    assert records[3][-4:] == ('Aqua', None, '6.1NRT', None)
@@ -0,0 +1,66 @@
+# tests/test_fmask.py
+"""Fmask bit decoding and the screening of scenes on their Fmask layer."""
+import pytest
+import rasterio
+import numpy as np
+from shapely.geometry import box
+from rasterio.transform import from_origin
+
+from app.external_apis.appears.hls_scenes import screen_fmask
+from app.external_apis.appears.utils_appears import FMASK_NODATA, decode_fmask, fmask_masked_pixels
+
+FLAGS = ['cloud', 'adjacent_cloud', 'cloud_shadow', 'snow_ice', 'water']
+
+@pytest.mark.parametrize("value, flags, aerosol_level, masked", [
+    (0b00000000, [], 0, False),
+    (0b00000001, [], 0, False),  # Cirrus, reserved in HLS v2.0
+    (0b00000010, ['cloud'], 0, True),
+    (0b00000100, ['adjacent_cloud'], 0, True),
+    (0b00001000, ['cloud_shadow'], 0, True),
+    (0b00010000, ['snow_ice'], 0, False),
+    (0b00100000, ['water'], 0, False),
+    (0b01000000, [], 1, False),
+    (0b11000000, [], 3, False),  # High aerosol, only masked when listed in FMASK_MASKED_FLAGS
+    (0b01101010, ['cloud', 'cloud_shadow', 'water'], 1, True),
+    (0b10110100, ['adjacent_cloud', 'snow_ice', 'water'], 2, True),
+])
+def test_decode_fmask(value, flags, aerosol_level, masked):
+    fmask = np.array([value], dtype=np.uint8)
+    decoded = decode_fmask(fmask)
+    assert [flag for flag in FLAGS if decoded[flag][0]] == flags
+    assert decoded['aerosol_level'][0] == aerosol_level
+    assert decoded['high_aerosol'][0] == (aerosol_level == 3)
+    assert fmask_masked_pixels(fmask)[0] == masked
+
+def write_fmask(path, fmask: np.ndarray):
+    profile = {'driver': 'GTiff', 'height': fmask.shape[0], 'width': fmask.shape[1], 'count': 1, 'dtype': 'uint8',
+               'crs': 'EPSG:4326', 'transform': from_origin(0.0, 10.0, 1.0, 1.0), 'nodata': FMASK_NODATA}
+    with rasterio.open(path, 'w', **profile) as dst:
+        dst.write(fmask, 1)
+
+def test_screen_fmask(tmp_path):
+    fmask = np.zeros((10, 10), dtype=np.uint8)
+    fmask[:, :2] = FMASK_NODATA  # 20 pixels not observed
+    fmask[:2, 2:] = 0b10  # 16 cloudy
+    fmask[2:4, 2:] = 0b1000  # 16 in cloud shadow
+    fmask[4, 2:] = 0b100000  # 8 water, clear
+    path = tmp_path / "HLSS30.020_Fmask_doy2024180_aid0001.tif"
+    write_fmask(path, fmask)
+
+    screened = screen_fmask(str(path))
+    assert screened["observed_pixels"] == 80
+    assert screened["cloudy_pixels"] == 32
+    assert screened["clear_fraction"] == pytest.approx(48 / 80)
+    assert screened["flag_pixels"] == {"cloud": 16, "adjacent_cloud": 0, "cloud_shadow": 16, "snow_ice": 0,
+                                       "water": 8, "high_aerosol": 0}
+
+    # Over the lower half of the raster only (rows 5-9): no cloud, 8 columns observed
+    screened = screen_fmask(str(path), place_id=-1, geometry=box(0.0, 0.0, 10.0, 5.0))
+    assert screened["observed_pixels"] == 40 and screened["cloudy_pixels"] == 0
+    assert screened["clear_fraction"] == 1.0
+
+def test_screen_fmask_without_observations(tmp_path):
+    path = tmp_path / "HLSS30.020_Fmask_doy2024180_aid0001.tif"
+    write_fmask(path, np.full((4, 4), FMASK_NODATA, dtype=np.uint8))
+    screened = screen_fmask(str(path))
+    assert screened["observed_pixels"] == 0 and screened["clear_fraction"] == 0.0
@@ -0,0 +1,216 @@
+# tests/test_hls_s3.py
+"""Direct S3 reads of HLS granules (HlsCogReader, read_granule, fetch_and_store_hls_data_direct) against the fake server."""
+import os
+import asyncio
+import pytest
+import rasterio
+import numpy as np
+from datetime import date
+from shapely.geometry import box
+from rasterio.io import MemoryFile
+from rasterio.windows import from_bounds
+from rasterio.shutil import copy as copy_raster
+from rasterio.transform import from_origin
+from rasterio.warp import transform_bounds
+from geoalchemy2.shape import from_shape
+
+from app.metrics.prometheus import TILE_CACHE_REQUESTS
+from app.external_apis.clients import appears_client, cmr_stac_client
+from app.external_apis.appears.layer_profiles import layer_profile
+from app.external_apis.hls_s3 import ingest
+from app.external_apis.hls_s3.stac import search_hls_granules
+from app.external_apis.hls_s3.cog_reader import HlsCogReader, S3Credentials, TileCache
+from tests.fake_nasa_apis import fake_nasa_server
+
+SIZE = 600  # pixels, 3x3 blocks of 256
+CRS = 'EPSG:32720'  # UTM 20S
+WEST, NORTH = 300000.0, 6200040.0
+BUCKET = "lp-prod-protected"
+# Granule id, share of the rows under cloud from the top
+GRANULES = [("HLS.S30.T20HNH.2024170T140051.v2.0", 0.0), ("HLS.L30.T20HNH.2024172T135712.v2.0", 0.3),
+            ("HLS.S30.T20HNH.2024175T140049.v2.0", 0.95)]
+CLOUDY_GRANULE = GRANULES[2][0]
+PLACE_SIZE = 4000  # metres, across the block boundary at pixel 256
+
+def write_cog(path: str, data: np.ndarray, nodata):
+    profile = {'driver': 'GTiff', 'height': SIZE, 'width': SIZE, 'count': 1, 'dtype': data.dtype.name,
+               'crs': CRS, 'transform': from_origin(WEST, NORTH, 30, 30), 'nodata': nodata}
+    with MemoryFile() as memory_file:
+        with memory_file.open(**profile) as dataset:
+            dataset.write(data, 1)
+        with memory_file.open() as dataset:
+            copy_raster(dataset, path, driver='COG', compress='DEFLATE', blocksize=256)
+
+@pytest.fixture(scope="module")
+def s3_dir(tmp_path_factory):
+    """Granules with the layers of layer_profile, every pixel of a layer unique so misplaced windows show."""
+
+    s3_dir = tmp_path_factory.mktemp("s3")
+    pixels = np.arange(SIZE * SIZE, dtype=np.int32).reshape(SIZE, SIZE) % 30000
+    for granule_id, cloud_fraction in GRANULES:
+        product = f"HLS{granule_id.split('.')[1]}"
+        directory = os.path.join(s3_dir, BUCKET, f"{product}.020", granule_id)
+        os.makedirs(directory)
+        for index, layer in enumerate(layer_profile(product)):
+            if layer == 'Fmask':
+                fmask = np.zeros((SIZE, SIZE), dtype=np.uint8)
+                fmask[: int(SIZE * cloud_fraction)] = 0b10
+                write_cog(os.path.join(directory, f"{granule_id}.Fmask.tif"), fmask, 255)
+            else:
+                data = (pixels + index * 100).astype(np.int16)
+                write_cog(os.path.join(directory, f"{granule_id}.{layer}.tif"), data, -9999)
+    return str(s3_dir)
+
+@pytest.fixture(autouse=True)
+def fresh_credentials(monkeypatch):
+    monkeypatch.setenv("APPEARS_USER", "fake")
+    monkeypatch.setenv("APPEARS_PASS", "fake")
+    monkeypatch.setattr(ingest, "s3_credentials", S3Credentials())
+
+def place_geometry():
+    centre_x, centre_y = WEST + 256 * 30, NORTH - 256 * 30
+    half = PLACE_SIZE / 2
+    return box(*transform_bounds(CRS, 'EPSG:4326', centre_x - half, centre_y - half, centre_x + half, centre_y + half))
+
+def run(test, s3_dir: str, **server_options):
+    """Runs `test(server, reader)` with the API clients pointed at a fake server serving `s3_dir`."""
+
+    async def main():
+        async with fake_nasa_server(latency=0, s3_dir=s3_dir, **server_options) as server:
+            appears_client.base_url = f"{server.url}/api"
+            cmr_stac_client.base_url = f"{server.url}/stac"
+            try:
+                return await test(server, HlsCogReader(endpoint=f"{server.url}/s3", cache=TileCache()))
+            finally:
+                await appears_client.close()
+                await cmr_stac_client.close()
+    base_urls = appears_client.base_url, cmr_stac_client.base_url
+    try:
+        return asyncio.run(main())
+    finally:
+        appears_client.base_url, cmr_stac_client.base_url = base_urls
+
+async def granules() -> dict:
+    found = await search_hls_granules(place_geometry().__geo_interface__, date(2024, 6, 1), date(2024, 6, 30))
+    return {granule['id']: granule for granule in found}
+
+def cache_hits() -> float:
+    return TILE_CACHE_REQUESTS.labels("hit")._value.get()
+
+@pytest.mark.parametrize("ttl, credential_requests", [(3600, 1), (240, 2)])
+def test_credentials_refreshed_before_expiry(s3_dir, ttl, credential_requests):
+    async def test(server, reader):
+        first = await ingest.s3_credentials.get()
+        second = await ingest.s3_credentials.get()
+        assert server.stats["s3_credentials"] == credential_requests
+        # Credentials within REFRESH_MARGIN of their expiration are replaced
+        assert (first['accessKeyId'] == second['accessKeyId']) == (credential_requests == 1)
+
+    run(test, s3_dir, credentials_ttl=ttl)
+
+def test_refused_read_retried_with_new_credentials(s3_dir):
+    async def test(server, reader):
+        granule = (await granules())[GRANULES[0][0]]
+        await ingest.s3_credentials.get()
+        server.revoke_s3_credentials()
+        files, grid = await ingest.read_layers(reader, {'b04': granule['assets']['b04']}, place_geometry().bounds)
+        assert list(files) == ['b04'] and grid is not None
+        assert server.stats["s3_credentials"] == 2
+        files['b04'].close()
+
+    run(test, s3_dir)
+
+def test_read_refused_twice_raises(s3_dir):
+    async def test(server, reader):
+        granule = (await granules())[GRANULES[0][0]]
+        server.refuse_s3_reads()
+        with pytest.raises(rasterio.errors.RasterioIOError):
+            await ingest.read_layers(reader, {'b04': granule['assets']['b04']}, place_geometry().bounds)
+        assert server.stats["s3_credentials"] == 2
+
+    run(test, s3_dir)
+
+def test_tile_cache_serves_repeated_reads(s3_dir):
+    async def test(server, reader):
+        href = (await granules())[GRANULES[0][0]]['assets']['b04']
+        credentials = await ingest.s3_credentials.get()
+        bounds = place_geometry().bounds
+        with reader.gdal_env(credentials):
+            first = await asyncio.to_thread(reader.read_window, href, bounds)
+            requests, hits = server.stats["s3_requests"], cache_hits()
+            second = await asyncio.to_thread(reader.read_window, href, bounds)
+        # The window spans 2x2 blocks, all cached with the header: no request at all
+        assert server.stats["s3_requests"] == requests
+        assert cache_hits() - hits == 4
+        np.testing.assert_array_equal(first['data'], second['data'])
+
+    run(test, s3_dir)
+
+def test_fmask_screening_skips_cloudy_granule(s3_dir):
+    async def test(server, reader):
+        found = await granules()
+        files, skipped = await ingest.read_granule(found[CLOUDY_GRANULE], 1, place_geometry(), reader)
+        assert files == {} and skipped['skipped'] and skipped['date'] == '2024-06-23'
+        assert skipped['cloudy_pixels'] == skipped['observed_pixels'] > 0
+        # Only the Fmask of the cloudy granule was fetched
+        assert [key for key in server.s3_key_requests if CLOUDY_GRANULE in key] == \
+            [f"{BUCKET}/HLSS30.020/{CLOUDY_GRANULE}/{CLOUDY_GRANULE}.Fmask.tif"]
+
+        files, skipped = await ingest.read_granule(found[GRANULES[1][0]], 1, place_geometry(), reader)
+        assert skipped is None
+        assert set(files) == set(found[GRANULES[1][0]]['assets'])
+        for memory_file in files.values():
+            memory_file.close()
+
+    run(test, s3_dir)
+
+def test_windows_align_with_the_file_grid(s3_dir):
+    async def test(server, reader):
+        granule = (await granules())[GRANULES[0][0]]
+        credentials = await ingest.s3_credentials.get()
+        bounds = place_geometry().bounds
+        with reader.gdal_env(credentials):
+            window = await asyncio.to_thread(reader.read_window, granule['assets']['b04'], bounds)
+        path = os.path.join(s3_dir, BUCKET, "HLSS30.020", granule['id'], f"{granule['id']}.B04.tif")
+        with rasterio.open(path) as src:
+            expected_window = from_bounds(*transform_bounds('EPSG:4326', src.crs, *bounds), transform=src.transform)
+            expected_window = expected_window.round_offsets(op='floor').round_lengths(op='ceil')
+            expected = src.read(1, window=expected_window)
+            expected_transform = src.window_transform(expected_window)
+        assert window['transform'] == expected_transform
+        np.testing.assert_array_equal(window['data'][:expected.shape[0], :expected.shape[1]], expected)
+
+        # Every layer of a granule lands on the grid of its Fmask
+        files, _ = await ingest.read_granule(granule, 1, place_geometry(), reader)
+        grids = set()
+        for memory_file in files.values():
+            with memory_file.open() as dataset:
+                grids.add((tuple(dataset.transform), dataset.shape))
+            memory_file.close()
+        assert len(files) == len(granule['assets']) and len(grids) == 1
+
+    run(test, s3_dir)
+
+def test_fetch_and_store_direct(s3_dir, monkeypatch):
+    stored = []
+
+    async def process_scene(layer_paths, capture_date, place_id, db, geometry=None, product=None, scene_id=None):
+        stored.append((capture_date, product, scene_id, sorted(layer_paths)))
+        return {"message": "Data processed successfully", "rows": 10, "date": capture_date.isoformat(),
+                "observed_pixels": 10, "cloudy_pixels": 0}
+
+    monkeypatch.setattr(ingest, "process_scene", process_scene)
+
+    async def test(server, reader):
+        return await ingest.fetch_and_store_hls_data_direct(
+            [(7, from_shape(place_geometry(), srid=4326))], date(2024, 6, 1), date(2024, 6, 30), db=None,
+            reader=reader
+        )
+
+    result = run(test, s3_dir)
+    assert sorted((capture_date, product, scene_id) for capture_date, product, scene_id, _ in stored) == [
+        (date(2024, 6, 18), "HLSS30", GRANULES[0][0]), (date(2024, 6, 20), "HLSL30", GRANULES[1][0])
+    ]
+    assert all(layers == sorted(['fmask', 'b02', 'b03', 'b04', 'b12', 'b8a']) for *_, layers in stored)
+    assert result["places"][7]["scenes"] == 3 and result["places"][7]["skipped_scenes"] == 1
+    assert result["rows"] == 20
@@ -0,0 +1,60 @@
+# tests/test_hls_scenes.py
+"""Pixel keys and AppEEARS file names of HLS scenes."""
+import pytest
+import numpy as np
+from datetime import date
+
+from app.external_apis.appears.hls_scenes import PIXEL_KEY_RESOLUTION, PIXEL_KEY_LON_CELLS, pixel_keys, \
+    parse_hls_file_name
+
+PIXEL_SIZE = 0.00026949458523585647  # 30 m in degrees
+
+@pytest.mark.parametrize("longitude, latitude, key", [
+    (-180.0, -90.0, 0),
+    (-180.0 + PIXEL_KEY_RESOLUTION, -90.0, 1),
+    (-180.0, -90.0 + PIXEL_KEY_RESOLUTION, PIXEL_KEY_LON_CELLS),
+    (0.0, 0.0, 9_000_000 * PIXEL_KEY_LON_CELLS + 18_000_000),
+    (180.0, 90.0, 18_000_000 * PIXEL_KEY_LON_CELLS + 36_000_000),
+])
+def test_pixel_key_formula(longitude, latitude, key):
+    assert pixel_keys(np.array([longitude]), np.array([latitude]))[0] == key
+
+@pytest.mark.parametrize("offset, same_key", [
+    (0.0, True),
+    (1e-9, True),  # Float noise of the pixel centre between two tasks
+    (0.4 * PIXEL_KEY_RESOLUTION, True),
+    (0.6 * PIXEL_KEY_RESOLUTION, False),
+    (PIXEL_SIZE, False),  # The neighbouring HLS pixel
+])
+def test_pixel_key_quantisation(offset, same_key):
+    # On a grid node, the offsets show where rounding switches to the next cell
+    longitudes, latitudes = np.array([-60.12345]), np.array([-34.98765])
+    key = pixel_keys(longitudes, latitudes)
+    assert (pixel_keys(longitudes + offset, latitudes) == key)[0] == same_key
+    assert (pixel_keys(longitudes, latitudes - offset) == key)[0] == same_key
+
+def test_pixel_keys_unique_over_a_scene():
+    cols, rows = np.meshgrid(np.arange(200), np.arange(200))
+    longitudes, latitudes = -60.0 + (cols + 0.5) * PIXEL_SIZE, -34.0 - (rows + 0.5) * PIXEL_SIZE
+    assert np.unique(pixel_keys(longitudes, latitudes)).size == longitudes.size
+
+@pytest.mark.parametrize("file_name, expected", [
+    ("HLSS30.020_B8A_doy2024180_aid0001_20N.tif",
+     {'product': 'HLSS30', 'layer': 'b8a', 'date': date(2024, 6, 28), 'aid': 1, 'scene_id': '20N'}),
+    ("HLSS30.020_B04_doy2024180_aid0012_9S.tif",
+     {'product': 'HLSS30', 'layer': 'b04', 'date': date(2024, 6, 28), 'aid': 12, 'scene_id': '9S'}),
+    ("HLSL30.020_B05_doy2024001_aid0002.tif",
+     {'product': 'HLSL30', 'layer': 'b8a', 'date': date(2024, 1, 1), 'aid': 2, 'scene_id': 'mosaic'}),
+    ("HLSL30.020_B07_doy2023365_aid0003.tif",
+     {'product': 'HLSL30', 'layer': 'b12', 'date': date(2023, 12, 31), 'aid': 3, 'scene_id': 'mosaic'}),
+    ("HLSS30.020_Fmask_doy2024180_aid0001.tif",
+     {'product': 'HLSS30', 'layer': 'fmask', 'date': date(2024, 6, 28), 'aid': 1, 'scene_id': 'mosaic'}),
+    # Sentinel-2 red edge, no column
+    ("HLSS30.020_B05_doy2024180_aid0001.tif",
+     {'product': 'HLSS30', 'layer': None, 'date': date(2024, 6, 28), 'aid': 1, 'scene_id': 'mosaic'}),
+    ("HLSS30.020_B04_doy2024180_aid0001.xml", None),
+    ("HLSS30.020_Statistics.csv", None),
+    ("scene.tif", None),
+])
+def test_parse_hls_file_name(file_name, expected):
+    assert parse_hls_file_name(file_name) == expected
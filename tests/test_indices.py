@@ -0,0 +1,66 @@
+# tests/test_indices.py
+"""Spectral indices computed in NumPy at ingest, their SQL counterparts and their summaries."""
+import pytest
+import numpy as np
+
+from app.external_apis.appears.indices import SPECTRAL_INDICES, compute_indices, index_missing_sql, summarize_index
+
+# Scaled reflectances: nir 0.5, red 0.1, blue 0.05, green 0.08, swir2 0.2
+BANDS = {'b8a_nir_narrow': 5000, 'b04_red': 1000, 'b02_blue': 500, 'b03_green': 800, 'b12_swir2': 2000}
+
+@pytest.mark.parametrize("name, expected", [
+    ('ndvi', (0.5 - 0.1) / (0.5 + 0.1)),
+    ('evi', 2.5 * (0.5 - 0.1) / (0.5 + 6 * 0.1 - 7.5 * 0.05 + 1)),
+    ('ndwi', (0.08 - 0.5) / (0.08 + 0.5)),
+    ('nbr', (0.5 - 0.2) / (0.5 + 0.2)),
+    ('savi', 1.5 * (0.5 - 0.1) / (0.5 + 0.1 + 0.5)),
+])
+def test_compute_indices(name, expected):
+    columns = {column: np.array([value], dtype=np.float32) for column, value in BANDS.items()}
+    values = compute_indices(columns)[name]
+    assert values.dtype == np.float32
+    assert values[0] == pytest.approx(expected, rel=1e-6)
+
+@pytest.mark.parametrize("columns, computed", [
+    (['b8a_nir_narrow', 'b04_red'], ['ndvi', 'savi']),
+    (['b8a_nir_narrow', 'b04_red', 'b02_blue'], ['ndvi', 'evi', 'savi']),
+    (['b8a_nir_narrow', 'b03_green'], ['ndwi']),
+    # The HLSS30 broad NIR (b08) and the old b05_nir column feed no index
+    (['b08_nir_broad', 'b05_nir', 'b04_red'], []),
+])
+def test_indices_need_all_their_bands(columns, computed):
+    indices = compute_indices({column: np.array([BANDS.get(column, 4000)], dtype=np.float32) for column in columns})
+    assert sorted(indices) == sorted(computed)
+
+def test_undefined_pixels_are_nan():
+    columns = {
+        'b8a_nir_narrow': np.array([0, np.nan, 5000], dtype=np.float32),
+        'b04_red': np.array([0, 1000, 1000], dtype=np.float32),
+    }
+    indices = compute_indices(columns)
+    # Zero denominator, then a missing band
+    assert np.isnan(indices['ndvi'][:2]).all() and np.isfinite(indices['ndvi'][2])
+    assert indices['savi'][0] == 0.0 and np.isnan(indices['savi'][1])
+
+@pytest.mark.parametrize("name, condition", [
+    ('ndvi', "(ndvi IS NULL AND b8a_nir_narrow IS NOT NULL AND b04_red IS NOT NULL)"),
+    ('nbr', "(nbr IS NULL AND b8a_nir_narrow IS NOT NULL AND b12_swir2 IS NOT NULL)"),
+])
+def test_index_missing_sql(name, condition):
+    assert index_missing_sql(name) == condition
+
+def test_every_index_reads_the_narrow_nir():
+    assert all(index['bands']['nir'] == 'b8a_nir_narrow' for index in SPECTRAL_INDICES.values() if 'nir' in index['bands'])
+
+@pytest.mark.parametrize("values, expected", [
+    (np.arange(1, 11, dtype=np.float32),
+     {"mean": 5.5, "median": 5.5, "p10": 1.9, "p90": 9.1, "valid_pixels": 10}),
+    (np.array([np.nan, 0.5, np.inf, np.nan], dtype=np.float32),
+     {"mean": 0.5, "median": 0.5, "p10": 0.5, "p90": 0.5, "valid_pixels": 1}),
+    (np.array([np.nan], dtype=np.float32),
+     {"mean": None, "median": None, "p10": None, "p90": None, "valid_pixels": 0}),
+    (np.empty(0, dtype=np.float32),
+     {"mean": None, "median": None, "p10": None, "p90": None, "valid_pixels": 0}),
+])
+def test_summarize_index(values, expected):
+    assert summarize_index(values) == pytest.approx(expected)
@@ -0,0 +1,54 @@
+# tests/test_layer_profiles.py
+"""Layers requested per HLS product and the mapping of the HLSL30 bands onto the HLSS30 ones."""
+import pytest
+
+from app.external_apis.appears.indices import SPECTRAL_INDICES
+from app.external_apis.appears.utils_appears import harmonized_layer
+from app.external_apis.appears.layer_profiles import layer_profile, check_names, \
+    appears_product_id, stac_collection
+
+@pytest.mark.parametrize("product, layer, harmonized", [
+    ('HLSL30', 'B05', 'b8a'),  # Landsat NIR
+    ('HLSL30', 'B06', 'b11'),
+    ('HLSL30', 'B07', 'b12'),
+    ('HLSL30', 'B09', 'b10'),  # Landsat cirrus
+    ('HLSL30', 'B10', None),  # Thermal
+    ('HLSL30', 'B11', None),
+    ('HLSS30', 'B8A', 'b8a'),
+    ('HLSS30', 'b8a', 'b8a'),
+    ('HLSS30', 'B08', 'b08'),
+    ('HLSS30', 'B05', None),  # Red edge
+    ('HLSS30', 'B12', 'b12'),
+    ('HLSS30', 'Fmask', 'fmask'),
+    ('HLSL30', 'FMASK', 'fmask'),
+    ('HLSX30', 'B04', None),
+])
+def test_harmonized_layer(product, layer, harmonized):
+    assert harmonized_layer(product, layer) == harmonized
+
+@pytest.mark.parametrize("product, indices, extra_layers, layers", [
+    ('HLSS30', ['ndvi'], [], ['Fmask', 'B04', 'B8A']),
+    ('HLSL30', ['ndvi'], [], ['Fmask', 'B04', 'B05']),
+    ('HLSS30', ['nbr'], [], ['Fmask', 'B12', 'B8A']),
+    ('HLSL30', ['nbr'], [], ['Fmask', 'B05', 'B07']),
+    ('HLSL30', ['ndvi', 'evi', 'ndwi'], [], ['Fmask', 'B02', 'B03', 'B04', 'B05']),
+    ('HLSS30', list(SPECTRAL_INDICES), [], ['Fmask', 'B02', 'B03', 'B04', 'B12', 'B8A']),
+    # Extra layers the product lacks are left out
+    ('HLSS30', ['ndvi'], ['SZA', 'B11', 'B99', 'Fmask'], ['Fmask', 'B04', 'B11', 'B8A', 'SZA']),
+    ('HLSL30', ['ndvi'], ['B8A'], ['Fmask', 'B04', 'B05']),
+])
+def test_layer_profile(product, indices, extra_layers, layers):
+    assert layer_profile(product, indices, extra_layers) == layers
+
+def test_check_names():
+    check_names("HLS_INGEST_INDICES", ['ndvi', 'nbr'], SPECTRAL_INDICES)
+    with pytest.raises(ValueError, match="nvdi.*Valid names: ndvi, evi, ndwi, nbr, savi"):
+        check_names("HLS_INGEST_INDICES", ['ndvi', 'nvdi'], SPECTRAL_INDICES)
+
+@pytest.mark.parametrize("product, appears_id, collection", [
+    ('HLSS30', 'HLSS30.020', 'HLSS30_2.0'),
+    ('HLSL30', 'HLSL30.020', 'HLSL30_2.0'),
+])
+def test_product_names(product, appears_id, collection):
+    assert appears_product_id(product) == appears_id
+    assert stac_collection(product) == collection
@@ -0,0 +1,34 @@
+# tests/test_tile_cache.py
+"""Rendered tile cache shared by several workers through its directory."""
+from app.tiles.tile_cache import TileCache
+
+KEY = (7, "2024-06-18", "ndvi", 12, 1400, 2460)
+
+def test_invalidation_reaches_other_workers(tmp_path):
+    worker, other_worker = TileCache(cache_dir=str(tmp_path)), TileCache(cache_dir=str(tmp_path))
+    version = worker.put(KEY, b"old")
+    assert other_worker.get(KEY) == (b"old", version)
+
+    worker.invalidate(KEY[0], KEY[1])
+    # The other worker still holds the tile in memory, but its file is gone
+    assert other_worker.get(KEY) is None
+
+    new_version = worker.put(KEY, b"new")
+    assert new_version != version
+    assert other_worker.get(KEY) == (b"new", new_version)
+
+def test_version_changes_with_identical_content(tmp_path):
+    cache = TileCache(cache_dir=str(tmp_path))
+    version = cache.put(KEY, b"tile")
+    assert cache.get(KEY) == (b"tile", version)
+    cache.invalidate(KEY[0], KEY[1])
+    # A tile rendered again after an ingest is a new version, even if it looks the same
+    assert cache.put(KEY, b"tile") != version
+
+def test_memory_limit(tmp_path):
+    cache = TileCache(max_size=2, cache_dir=str(tmp_path))
+    for y in range(3):
+        cache.put((*KEY[:5], y), bytes([y]))
+    assert len(cache._tiles) == 2
+    # Evicted from memory, still read back from disk
+    assert cache.get((*KEY[:5], 0))[0] == bytes([0])